@@ -0,0 +1,75 @@
+"""Agregados de desempenho por aluno, atualizados a cada resultado em vez de recalculados pelas telas.
+
+Ficam em desempenho[email]['agregados']:
+    areas:     {área: {acertos, total}} do diagnóstico e de todos os simulados
+    subareas:  {área: {subárea: {acertos, total}}}; sem subárea cadastrada, usa o nível da questão
+    recentes:  desempenho por área dos últimos JANELA_RECENTES resultados
+    janela:    soma de `recentes`, mantida ao entrar e sair cada resultado
+"""
+
+JANELA_RECENTES = 10
+
+
+def subarea_questao(questao):
+    """Subárea usada nos agregados: a cadastrada na questão ou, na falta dela, o nível"""
+    return questao.get('subarea') or questao.get('nivel') or "Geral"
+
+
+def _somar(destino, chave, acertos, total, sinal=1):
+    dados = destino.setdefault(chave, {'acertos': 0, 'total': 0})
+    dados['acertos'] += sinal * acertos
+    dados['total'] += sinal * total
+
+
+def registrar_resultado(agregados, desempenho_areas, desempenho_subareas=None):
+    """Incorpora um resultado (desempenho por área e, se houver, por subárea) aos agregados"""
+    for area, dados in desempenho_areas.items():
+        _somar(agregados['areas'], area, dados['acertos'], dados['total'])
+        _somar(agregados['janela'], area, dados['acertos'], dados['total'])
+    for area, subareas in (desempenho_subareas or {}).items():
+        for subarea, dados in subareas.items():
+            _somar(agregados['subareas'].setdefault(area, {}), subarea, dados['acertos'], dados['total'])
+
+    agregados['recentes'].append({area: dict(dados) for area, dados in desempenho_areas.items()})
+    if len(agregados['recentes']) > JANELA_RECENTES:
+        for area, dados in agregados['recentes'].pop(0).items():
+            _somar(agregados['janela'], area, dados['acertos'], dados['total'], sinal=-1)
+
+
+def obter_agregados(desempenho_aluno):
+    """Agregados do aluno; na primeira vez são montados a partir do histórico já gravado"""
+    agregados = desempenho_aluno.get('agregados')
+    if agregados is None:
+        agregados = {'areas': {}, 'subareas': {}, 'recentes': [], 'janela': {}}
+        resultados = list(desempenho_aluno.get('simulados', []))
+        if 'diagnostico_inicial' in desempenho_aluno:
+            resultados.insert(0, desempenho_aluno['diagnostico_inicial'])
+        for resultado in resultados:
+            registrar_resultado(agregados, resultado.get('desempenho_areas', {}))
+        desempenho_aluno['agregados'] = agregados
+    return agregados
+
+
+def desempenho_subareas(questoes, respostas):
+    """Acertos e total por área e subárea das questões respondidas ({id: resposta '1'-'5'})"""
+    resultado = {}
+    for questao in questoes:
+        resposta = respostas.get(questao['id'])
+        if resposta is None:
+            continue
+        correta = chr(65 + int(resposta) - 1) == questao['resposta_correta']
+        _somar(resultado.setdefault(questao['area'], {}), subarea_questao(questao), int(correta), 1)
+    return resultado
+
+
+def percentual_acertos(dados):
+    """Percentual de acertos de um agregado {acertos, total} (0 sem respostas)"""
+    return (dados['acertos'] / dados['total']) * 100 if dados['total'] > 0 else 0
+
+
+def atualizar_agregados(desempenho_aluno, resultado, subareas=None):
+    """Incorpora aos agregados um resultado que acabou de entrar no histórico do aluno"""
+    if 'agregados' not in desempenho_aluno:
+        obter_agregados(desempenho_aluno)  # montados a partir do histórico, que já inclui o resultado
+        return
+    registrar_resultado(desempenho_aluno['agregados'], resultado.get('desempenho_areas', {}), subareas)
@@ -0,0 +1,95 @@
+"""Sorteio ponderado de questões para o simulado personalizado.
+
+As áreas são sorteadas por uma tabela de alias (método de Vose: O(1) por sorteio depois de montada
+em O(áreas)) e, dentro da área, a questão é sorteada uniformemente. Montar uma prova de k questões
+custa O(k), independentemente do tamanho do banco.
+"""
+import random
+
+# Peso de um simulado em relação ao seguinte (mais recente); com 0.8 um simulado de 5 provas atrás
+# vale cerca de um terço do último
+FATOR_RECENCIA = 0.8
+# Quantos resultados recentes entram no cálculo (os mais antigos já pesam quase nada)
+JANELA_RECENCIA = 20
+# Peso mínimo de uma área, para que as áreas fortes ainda apareçam na prova
+PESO_MINIMO = 0.1
+
+
+class TabelaAlias:
+    """Tabela de alias para sortear índices com probabilidade proporcional aos pesos"""
+
+    def __init__(self, pesos):
+        n = len(pesos)
+        total = float(sum(pesos))
+        if n == 0 or total <= 0:
+            raise ValueError("É preciso ao menos um peso positivo.")
+        self.probabilidades = [0.0] * n
+        self.alias = [0] * n
+
+        escalados = [p * n / total for p in pesos]
+        pequenos = [i for i, p in enumerate(escalados) if p < 1.0]
+        grandes = [i for i, p in enumerate(escalados) if p >= 1.0]
+        while pequenos and grandes:
+            menor, maior = pequenos.pop(), grandes.pop()
+            self.probabilidades[menor] = escalados[menor]
+            self.alias[menor] = maior
+            escalados[maior] -= 1.0 - escalados[menor]
+            (pequenos if escalados[maior] < 1.0 else grandes).append(maior)
+        for i in pequenos + grandes:  # sobras por arredondamento
+            self.probabilidades[i] = 1.0
+
+    def sortear(self, rng=random):
+        """Sorteia um índice em O(1)"""
+        i = rng.randrange(len(self.probabilidades))
+        return i if rng.random() < self.probabilidades[i] else self.alias[i]
+
+
+def taxas_erro_areas(desempenho_aluno, areas):
+    """Taxa de erro de cada área, com os simulados recentes pesando mais que os antigos.
+
+    Usa o diagnóstico inicial como o resultado mais antigo e suaviza as taxas (áreas sem
+    histórico ficam com 0.5).
+    """
+    resultados = list(desempenho_aluno.get('simulados', [])[-JANELA_RECENCIA:])
+    if 'diagnostico_inicial' in desempenho_aluno and len(resultados) < JANELA_RECENCIA:
+        resultados.insert(0, desempenho_aluno['diagnostico_inicial'])
+
+    erros = {area: 0.0 for area in areas}
+    totais = {area: 0.0 for area in areas}
+    peso = 1.0
+    for resultado in reversed(resultados):
+        for area, dados in resultado.get('desempenho_areas', {}).items():
+            if area in totais:
+                erros[area] += peso * (dados['total'] - dados['acertos'])
+                totais[area] += peso * dados['total']
+        peso *= FATOR_RECENCIA
+    return {area: (erros[area] + 1) / (totais[area] + 2) for area in areas}
+
+
+def pesos_areas(desempenho_aluno, areas):
+    """Peso de sorteio de cada área: a taxa de erro recente, com um piso de PESO_MINIMO"""
+    return {area: max(taxa, PESO_MINIMO) for area, taxa in taxas_erro_areas(desempenho_aluno, areas).items()}
+
+
+def sortear_questoes(questoes_por_area, pesos, k, rng=random):
+    """Sorteia k questões distintas: primeiro a área pelos pesos, depois a questão dentro da área"""
+    areas = [area for area in pesos if pesos[area] > 0 and questoes_por_area.get(area)]
+    k = min(k, sum(len(questoes_por_area[area]) for area in areas))
+    usadas = {area: set() for area in areas}
+    escolhidas = []
+    while len(escolhidas) < k:
+        tabela = TabelaAlias([pesos[area] for area in areas])
+        while len(escolhidas) < k:
+            area = areas[tabela.sortear(rng)]
+            questoes = questoes_por_area[area]
+            if len(usadas[area]) == len(questoes):
+                break  # área esgotada: refaz a tabela sem ela
+            # Sorteio sem reposição por rejeição; barato enquanto a área não está quase esgotada
+            i = rng.randrange(len(questoes))
+            while i in usadas[area]:
+                i = rng.randrange(len(questoes))
+            usadas[area].add(i)
+            escolhidas.append(questoes[i])
+        areas = [area for area in areas if len(usadas[area]) < len(questoes_por_area[area])]
+    rng.shuffle(escolhidas)
+    return escolhidas
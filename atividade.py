@@ -0,0 +1,195 @@
+"""Atividade diária dos alunos em bitmaps: um bit por dia desde o cadastro (bit 0 = dia do cadastro).
+
+Marcar o dia de hoje é O(1) (no máximo acrescenta um byte ao bitmap). A sequência atual e a maior
+sequência saem de operações de bits sobre o bitmap inteiro, sem datas em texto nem `strptime`.
+
+Para perguntas sobre a turma toda ("quantos alunos estudaram 5 dos últimos 7 dias") cada aluno também
+tem uma janela dos últimos 64 dias num `array('Q')` (bit 0 = hoje), deslocada uma vez por dia; a
+contagem de bits é vetorizada com NumPy quando ele está instalado.
+
+Arquivos: um índice JSON (e-mails, dia do cadastro e tamanho de cada bitmap) e um binário com os
+bitmaps concatenados, gravados juntos como as estatísticas das questões.
+"""
+import os
+import json
+from array import array
+from datetime import date
+
+JANELA_RECENTES = 64  # dias na janela usada nas contagens da turma
+MASCARA_RECENTES = (1 << JANELA_RECENTES) - 1
+
+
+def sequencia_final(bits, posicao):
+    """Quantidade de bits 1 seguidos terminando em `posicao` (inclusive)"""
+    mascara = (1 << (posicao + 1)) - 1
+    zeros = ~bits & mascara  # os zeros viram uns; o mais alto deles interrompe a sequência
+    return posicao + 1 - zeros.bit_length()
+
+
+def maior_sequencia(bits):
+    """Comprimento da maior sequência de bits 1 (cada passo encurta todas as sequências em 1)"""
+    comprimento = 0
+    while bits:
+        bits &= bits >> 1
+        comprimento += 1
+    return comprimento
+
+
+class AtividadeDiaria:
+    """Bitmap de dias de estudo por aluno, com a janela recente de todos num array para contagens"""
+
+    def __init__(self, arquivo_indice, arquivo_dados, hoje=None):
+        self.ARQUIVO_INDICE = arquivo_indice
+        self.ARQUIVO_DADOS = arquivo_dados
+        self.hoje = (hoje or date.today()).toordinal()
+
+        self.emails = []       # ordinal -> e-mail
+        self.ordinais = {}     # e-mail -> ordinal
+        self.inicios = []      # ordinal -> dia (ordinal da data) do bit 0
+        self.bitmaps = []      # ordinal -> bytearray
+        self.recentes = array('Q')  # ordinal -> últimos 64 dias relativos a self.hoje
+
+        self.carregar()
+
+    def carregar(self):
+        """Carrega o índice e os bitmaps do disco e monta a janela recente"""
+        if not os.path.exists(self.ARQUIVO_INDICE) or not os.path.exists(self.ARQUIVO_DADOS):
+            return
+        try:
+            with open(self.ARQUIVO_INDICE, 'r') as f:
+                indice = json.load(f)
+            with open(self.ARQUIVO_DADOS, 'rb') as f:
+                for email, inicio, tamanho in zip(indice['emails'], indice['inicios'], indice['tamanhos']):
+                    bitmap = bytearray(f.read(tamanho))
+                    if len(bitmap) < tamanho:
+                        raise EOFError("bitmaps incompletos")
+                    self._incluir(email, inicio, bitmap)
+        except (json.JSONDecodeError, IOError, EOFError, KeyError) as e:
+            print(f"Erro ao carregar atividade diária: {e}")
+            self.emails, self.ordinais, self.inicios, self.bitmaps = [], {}, [], []
+            self.recentes = array('Q')
+
+    def salvar(self):
+        """Grava o índice e os bitmaps no disco"""
+        try:
+            with open(self.ARQUIVO_INDICE, 'w') as f:
+                json.dump({'emails': self.emails, 'inicios': self.inicios,
+                           'tamanhos': [len(b) for b in self.bitmaps]}, f)
+            with open(self.ARQUIVO_DADOS, 'wb') as f:
+                for bitmap in self.bitmaps:
+                    f.write(bitmap)
+        except IOError as e:
+            print(f"Erro ao salvar atividade diária: {e}")
+
+    def _incluir(self, email, inicio, bitmap):
+        self.ordinais[email] = len(self.emails)
+        self.emails.append(email)
+        self.inicios.append(inicio)
+        self.bitmaps.append(bitmap)
+        self.recentes.append(self._janela(inicio, bitmap))
+
+    def _janela(self, inicio, bitmap):
+        """Últimos 64 dias do bitmap com o bit 0 em self.hoje (bit j = j dias antes)"""
+        posicao = self.hoje - inicio
+        if posicao < 0:
+            return 0
+        tamanho = min(JANELA_RECENTES, posicao + 1)
+        bits = (int.from_bytes(bitmap, 'little') >> (posicao + 1 - tamanho)) & ((1 << tamanho) - 1)
+        return int(f"{bits:0{tamanho}b}"[::-1], 2)  # no bitmap o dia mais recente é o bit mais alto
+
+    def _virar_dia(self, hoje):
+        """Desloca a janela recente de todos os alunos quando o dia muda (uma vez por dia)"""
+        dia = hoje.toordinal()
+        if dia <= self.hoje:
+            return
+        deslocamento = dia - self.hoje
+        self.hoje = dia
+        if deslocamento >= JANELA_RECENTES:
+            self.recentes = array('Q', bytes(8 * len(self.recentes)))
+        else:
+            self.recentes = array('Q', ((x << deslocamento) & MASCARA_RECENTES for x in self.recentes))
+
+    def possui(self, email):
+        """Indica se o aluno já tem bitmap"""
+        return email in self.ordinais
+
+    def iniciar(self, email, dia_cadastro):
+        """Cria o bitmap (vazio) do aluno a partir do dia do cadastro"""
+        if email not in self.ordinais:
+            self._incluir(email, dia_cadastro.toordinal(), bytearray())
+
+    def registrar(self, email, dia):
+        """Marca `dia` como dia de estudo do aluno em O(1)"""
+        self._virar_dia(dia)
+        if email not in self.ordinais:
+            self.iniciar(email, dia)
+        ordinal = self.ordinais[email]
+        posicao = dia.toordinal() - self.inicios[ordinal]
+        if posicao < 0:
+            return  # antes do cadastro
+        bitmap = self.bitmaps[ordinal]
+        if len(bitmap) <= posicao >> 3:
+            bitmap.extend(bytes((posicao >> 3) + 1 - len(bitmap)))
+        bitmap[posicao >> 3] |= 1 << (posicao & 7)
+        atraso = self.hoje - dia.toordinal()
+        if atraso < JANELA_RECENTES:
+            self.recentes[ordinal] |= 1 << atraso
+
+    def _bits(self, email):
+        ordinal = self.ordinais.get(email)
+        if ordinal is None:
+            return None, 0
+        return ordinal, int.from_bytes(self.bitmaps[ordinal], 'little')
+
+    def sequencia_atual(self, email, hoje=None):
+        """Dias seguidos de estudo até hoje (ou até ontem, se o aluno ainda não estudou hoje)"""
+        ordinal, bits = self._bits(email)
+        if ordinal is None:
+            return 0
+        posicao = (hoje or date.today()).toordinal() - self.inicios[ordinal]
+        if posicao < 0:
+            return 0
+        if not (bits >> posicao) & 1:
+            posicao -= 1
+        return sequencia_final(bits, posicao) if posicao >= 0 else 0
+
+    def maior_sequencia(self, email):
+        """Maior sequência de dias seguidos de estudo do aluno"""
+        return maior_sequencia(self._bits(email)[1])
+
+    def dias_ativos(self, email, janela, hoje=None):
+        """Dias com estudo entre os últimos `janela` dias (hoje incluído)"""
+        ordinal, bits = self._bits(email)
+        if ordinal is None:
+            return 0
+        fim = (hoje or date.today()).toordinal() - self.inicios[ordinal]
+        inicio = max(0, fim - janela + 1)
+        if fim < 0:
+            return 0
+        return ((bits >> inicio) & ((1 << (fim - inicio + 1)) - 1)).bit_count()
+
+    def contar_ativos(self, minimo, janela=7, hoje=None, emails=None):
+        """Quantos alunos (todos, ou só os de `emails`) estudaram pelo menos `minimo` dos últimos `janela` dias.
+
+        Quando os `janela` dias até `hoje` cabem na janela recente (64 dias até o dia mais novo já visto),
+        a contagem é feita de uma vez sobre a janela de todos os alunos; para uma data passada a máscara é
+        deslocada pelos dias de atraso. Fora dela, a contagem usa o bitmap de cada aluno.
+        """
+        hoje = hoje or date.today()
+        self._virar_dia(hoje)
+        atraso = self.hoje - hoje.toordinal()  # > 0 quando `hoje` é uma data passada
+        if atraso + janela > JANELA_RECENTES:
+            alvo = self.emails if emails is None else emails
+            return sum(1 for email in alvo if self.dias_ativos(email, janela, hoje) >= minimo)
+        recentes = self.recentes
+        if emails is not None:
+            recentes = array('Q', (self.recentes[self.ordinais[e]] for e in emails if e in self.ordinais))
+        mascara = ((1 << janela) - 1) << atraso
+        try:
+            import numpy as np
+        except ImportError:
+            return sum(1 for x in recentes if (x & mascara).bit_count() >= minimo)
+        janelas = np.frombuffer(recentes, dtype=np.uint64) & np.uint64(mascara)
+        contagens = np.unpackbits(janelas.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+        return int((contagens >= minimo).sum())
+
@@ -0,0 +1,73 @@
+"""Barramento de eventos do sistema: o código de domínio publica o que aconteceu e os consumidores
+(conquistas, rankings, agregados, estatísticas) reagem, na ordem em que se inscreveram.
+
+Os consumidores só alteram os dados em memória; ao final de cada evento o barramento grava tudo
+uma única vez, em vez de cada consumidor chamar salvar_dados.
+"""
+import time
+
+
+class SimuladoConcluido:
+    """Um aluno terminou um simulado"""
+
+    def __init__(self, email, resultado, questoes, respostas, tempos, momentos):
+        self.email = email
+        self.resultado = resultado
+        self.questoes = questoes
+        self.respostas = respostas  # id da questão -> resposta ('1'-'5')
+        self.tempos = tempos        # id da questão -> tempos (ms) de exibição, resposta e revisão
+        self.momentos = momentos    # id da questão -> momento (epoch) da resposta
+
+
+class DiagnosticoConcluido:
+    """Um aluno terminou o teste diagnóstico"""
+
+    def __init__(self, email, resultado, questoes, respostas):
+        self.email = email
+        self.resultado = resultado
+        self.questoes = questoes
+        self.respostas = respostas
+
+
+class SemanaConcluida:
+    """Um aluno marcou uma semana do plano de estudo como concluída"""
+
+    def __init__(self, email, plano, semana):
+        self.email = email
+        self.plano = plano
+        self.semana = semana
+
+
+class LoginRealizado:
+    """Um aluno entrou no sistema"""
+
+    def __init__(self, email, momento):
+        self.email = email
+        self.momento = momento
+
+
+class Barramento:
+    """Entrega cada evento aos consumidores do seu tipo e grava os dados uma vez por evento"""
+
+    def __init__(self, persistir):
+        self.persistir = persistir
+        self.consumidores = {}  # tipo do evento -> funções, na ordem de inscrição
+        self.eventos_publicados = 0
+        self.tempo_consumidores_ns = 0
+
+    def inscrever(self, tipo_evento, consumidor):
+        """Inscreve uma função que recebe os eventos do tipo informado"""
+        self.consumidores.setdefault(tipo_evento, []).append(consumidor)
+
+    def publicar(self, evento, gravar=True):
+        """Executa os consumidores do evento e faz uma única gravação no final.
+
+        Com `gravar=False` os dados ficam só em memória (quem publicou cuida da persistência).
+        """
+        inicio = time.perf_counter_ns()
+        for consumidor in self.consumidores.get(type(evento), []):
+            consumidor(evento)
+        self.tempo_consumidores_ns += time.perf_counter_ns() - inicio
+        self.eventos_publicados += 1
+        if gravar:
+            self.persistir()
@@ -0,0 +1,76 @@
+"""Cache dos dados derivados (relatórios e telas de análise) por aluno, com versões e descarte LRU.
+
+A chave é (email, visão, versão dos dados do aluno). Quem altera os dados de um aluno chama
+`invalidar(email)`, que avança a versão e descarta as entradas antigas dele; enquanto nada muda, reabrir
+uma tela devolve o que já foi montado. O cache é limitado em entradas e em bytes (estimados), e descarta
+as menos usadas recentemente quando passa de um dos limites.
+"""
+import sys
+from collections import OrderedDict
+
+MAX_ENTRADAS = 2000
+MAX_BYTES = 16 * 1024 * 1024
+
+
+def tamanho_estimado(valor):
+    """Bytes aproximados de um valor feito de listas, tuplas, dicionários e textos"""
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho_estimado(k) + tamanho_estimado(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(tamanho_estimado(item) for item in valor)
+    return sys.getsizeof(valor)
+
+
+class CacheDerivados:
+    """Cache LRU de (email, visão, versão) -> valor montado, com contadores de acertos e faltas"""
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, max_bytes=MAX_BYTES):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.entradas = OrderedDict()  # (email, visão, versão) -> (valor, tamanho), da menos à mais recente
+        self.chaves_aluno = {}         # email -> chaves do aluno no cache
+        self.versoes = {}              # email -> versão atual dos dados
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+        self.descartes = 0
+
+    def versao(self, email):
+        """Versão atual dos dados do aluno"""
+        return self.versoes.get(email, 0)
+
+    def invalidar(self, email):
+        """Avança a versão dos dados do aluno (chamado por quem os altera) e descarta o que foi montado"""
+        self.versoes[email] = self.versao(email) + 1
+        for chave in self.chaves_aluno.pop(email, ()):
+            _, tamanho = self.entradas.pop(chave)
+            self.bytes -= tamanho
+
+    def obter(self, email, visao, montar):
+        """Valor da visão para a versão atual dos dados do aluno; chama `montar()` só em caso de falta"""
+        chave = (email, visao, self.versao(email))
+        entrada = self.entradas.get(chave)
+        if entrada is not None:
+            self.entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[0]
+
+        self.faltas += 1
+        valor = montar()
+        tamanho = tamanho_estimado(valor)
+        if tamanho > self.max_bytes:
+            return valor  # maior que o cache inteiro: não guarda
+        self.entradas[chave] = (valor, tamanho)
+        self.chaves_aluno.setdefault(email, set()).add(chave)
+        self.bytes += tamanho
+        while len(self.entradas) > self.max_entradas or self.bytes > self.max_bytes:
+            (email_antigo, visao_antiga, versao), (_, tamanho_antigo) = self.entradas.popitem(last=False)
+            self.chaves_aluno[email_antigo].discard((email_antigo, visao_antiga, versao))
+            self.bytes -= tamanho_antigo
+            self.descartes += 1
+        return valor
+
+    def estatisticas(self):
+        """Contadores do cache: acertos, faltas, descartes, entradas e bytes ocupados"""
+        return {"acertos": self.acertos, "faltas": self.faltas, "descartes": self.descartes,
+                "entradas": len(self.entradas), "bytes": self.bytes}
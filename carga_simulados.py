@@ -0,0 +1,235 @@
+"""Teste de carga do motor de simulados: executa milhares de sessões roteirizadas em paralelo.
+
+Cria um diretório de dados temporário com um banco de questões e alunos sintéticos, roda as sessões
+em threads contra o MotorSimulado e informa sessões/s, latência das respostas e custo de gravação.
+
+Uso: python carga_simulados.py --sessoes 2000 --concorrencia 50
+     python carga_simulados.py --sessoes 1000 --concorrencia 1000 --alunos 1000 --evento 20   (simulado do dia)
+     python carga_simulados.py --resgates 5000 --concorrencia 200   (resgate de recompensas por uma escola)
+"""
+import os
+import io
+import json
+import time
+import random
+import argparse
+import tempfile
+import importlib
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+AREAS = ["Linguagens", "Matemática", "Ciências Da Natureza", "Ciências Humanas"]
+NIVEIS = ["Fácil", "Médio", "Difícil"]
+
+
+def carregar_sistema():
+    """Importa a classe SistemaEstudoENEM do programa principal"""
+    return importlib.import_module("enem_level_up_corrigido_(mvp)").SistemaEstudoENEM
+
+
+def preparar_dados(diretorio, num_questoes, num_alunos, semente):
+    """Grava um banco de questões e uma lista de alunos sintéticos no diretório"""
+    rng = random.Random(semente)
+    questoes = [{
+        "id": f"Q{i}",
+        "area": AREAS[i % len(AREAS)],
+        "nivel": rng.choice(NIVEIS),
+        "enunciado": f"Questão sintética {i}",
+        "alternativas": [f"Alternativa {letra}" for letra in "ABCDE"],
+        "resposta_correta": rng.choice("ABCDE")
+    } for i in range(1, num_questoes + 1)]
+    usuarios = [{
+        "nome": f"Aluno Carga {i}",
+        "email": f"aluno{i}@carga.test",
+        "senha": "123456",
+        "serie": f"{rng.randint(1, 3)}º EM",
+        "escola": f"Escola {rng.randint(1, 10)}",
+        "idade": rng.randint(15, 19),
+        "areas_interesse": [rng.choice(AREAS)],
+        "data_cadastro": "2025-01-01 00:00:00",
+        "pontuacao": 0,
+        "nivel": 1
+    } for i in range(num_alunos)]
+
+    with open(os.path.join(diretorio, 'banco_simulados.json'), 'w') as f:
+        json.dump({"questoes": questoes, "proximo_id": num_questoes + 1}, f)
+    with open(os.path.join(diretorio, 'usuarios.json'), 'w') as f:
+        json.dump(usuarios, f)
+
+
+def percentil(valores_ordenados, q):
+    """Percentil q (0-1) de uma lista já ordenada"""
+    if not valores_ordenados:
+        return 0.0
+    return valores_ordenados[min(len(valores_ordenados) - 1, int(q * len(valores_ordenados)))]
+
+
+def executar_sessao(sistema, email, questoes, tamanho, rng, evento=None):
+    """Executa uma sessão completa e retorna as latências (ns) do início, das respostas e da finalização.
+
+    Num evento, a segunda sessão do mesmo aluno é recusada (como no sistema) e retorna None.
+    """
+    motor = sistema.motor
+    inicio = time.perf_counter_ns()
+    if evento:
+        if not sistema.eventos.inscrever(evento, email):
+            return None
+        numero_forma, questoes_lista = sistema.eventos.forma_do_aluno(evento, email, sistema.questoes_por_id())
+    else:
+        questoes_lista = rng.sample(questoes, tamanho)
+    simulado = {
+        "titulo": "Simulado de Carga",
+        "questoes": len(questoes_lista),
+        "duracao": len(questoes_lista) * 5,
+        "dificuldade": "Variada",
+        "questoes_lista": questoes_lista
+    }
+    sessao = motor.iniciar_simulado(email, "ENEM Completo", simulado)
+    latencia_inicio = time.perf_counter_ns() - inicio
+
+    latencias = []
+    while motor.proxima_questao(sessao) is not None:
+        inicio = time.perf_counter_ns()
+        motor.responder(sessao, rng.randint(1, 5))
+        latencias.append(time.perf_counter_ns() - inicio)
+
+    inicio = time.perf_counter_ns()
+    if evento:
+        sistema.eventos.registrar_resultado(evento, motor.finalizar_sem_registrar(sessao), numero_forma)
+    else:
+        motor.finalizar(sessao)
+    return latencia_inicio, latencias, time.perf_counter_ns() - inicio
+
+
+def executar_resgates(sistema, emails, args):
+    """Resgates simultâneos de recompensas: informa resgates/s e confere que nenhum estoque foi vendido a mais
+    e nenhum aluno passou do limite por item"""
+    catalogo = sistema.recompensas.catalogo
+    for email in emails:
+        sistema.desempenho.setdefault(email, {}).setdefault('gamificacao', {'pontos': 0, 'conquistas': []})
+        sistema.alterar_pontos(email, args.pontos_resgate, "carga")
+    estoque_inicial = {item['id']: sistema.recompensas.disponivel(item['id']) for item in catalogo}
+
+    def tarefa(n):
+        item, email = random.Random(args.semente + n).choice(catalogo), emails[n % len(emails)]
+        inicio = time.perf_counter_ns()
+        situacao = sistema.efetuar_resgate(email, item)
+        return item['id'], email, situacao, time.perf_counter_ns() - inicio
+
+    print(f"Executando {args.resgates} resgates ({args.concorrencia} simultâneos)...")
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+        resultados = list(executor.map(tarefa, range(args.resgates)))
+    duracao = time.perf_counter() - inicio
+
+    latencias = sorted(lat for _, _, _, lat in resultados)
+    situacoes, resgatados, por_aluno = {}, {}, {}
+    for item_id, email, situacao, _ in resultados:
+        situacoes[situacao] = situacoes.get(situacao, 0) + 1
+        if situacao == "ok":
+            resgatados[item_id] = resgatados.get(item_id, 0) + 1
+            por_aluno[(email, item_id)] = por_aluno.get((email, item_id), 0) + 1
+    print("\n" + "=" * 50)
+    print("RESULTADO DO TESTE DE RESGATES".center(50))
+    print("=" * 50)
+    print(f"Resgates: {args.resgates} em {duracao:.2f}s ({args.resgates / duracao:.0f} resgates/s)")
+    print("Situações: " + " | ".join(f"{nome} {quantidade}" for nome, quantidade in sorted(situacoes.items())))
+    print("Latência do resgate (ms): "
+          f"p50 {percentil(latencias, 0.5) / 1e6:.2f} | p90 {percentil(latencias, 0.9) / 1e6:.2f} | "
+          f"p99 {percentil(latencias, 0.99) / 1e6:.2f}")
+    print(f"Compare-and-swap refeitos: {sistema.recompensas.conflitos}")
+    for item in catalogo:
+        inicial = estoque_inicial[item['id']]
+        if inicial >= 0:
+            final, vendidos = sistema.recompensas.disponivel(item['id']), resgatados.get(item['id'], 0)
+            print(f"Estoque de {item['nome']}: {inicial} -> {final} "
+                  f"({vendidos} resgatadas, {'ok' if inicial - final == vendidos and final >= 0 else 'DIVERGENTE'})")
+    limites = {item['id']: item.get('limite_por_aluno') for item in catalogo}
+    excedidos = sum(1 for (_, item_id), quantidade in por_aluno.items()
+                    if limites[item_id] is not None and quantidade > limites[item_id])
+    print(f"Alunos acima do limite por item: {excedidos} ({'ok' if not excedidos else 'DIVERGENTE'})")
+    sistema.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do motor de simulados")
+    parser.add_argument('--sessoes', type=int, default=2000, help="Total de sessões a executar")
+    parser.add_argument('--concorrencia', type=int, default=50, help="Sessões simultâneas")
+    parser.add_argument('--questoes-banco', type=int, default=2000, help="Questões no banco sintético")
+    parser.add_argument('--questoes-simulado', type=int, default=45, help="Questões por sessão")
+    parser.add_argument('--alunos', type=int, default=500, help="Alunos sintéticos")
+    parser.add_argument('--evento', type=int, default=0, metavar='FORMAS',
+                        help="Simula um evento com FORMAS provas pré-geradas e resultados gravados em lote")
+    parser.add_argument('--resgates', type=int, default=0,
+                        help="Em vez de simulados, executa RESGATES resgates de recompensas simultâneos")
+    parser.add_argument('--pontos-resgate', type=int, default=5000, help="Pontos de cada aluno no teste de resgates")
+    parser.add_argument('--diretorio', default=None, help="Diretório de dados (padrão: temporário)")
+    parser.add_argument('--semente', type=int, default=42, help="Semente do gerador aleatório")
+    args = parser.parse_args()
+
+    diretorio = args.diretorio or tempfile.mkdtemp(prefix="carga_enem_")
+    os.makedirs(diretorio, exist_ok=True)
+    preparar_dados(diretorio, args.questoes_banco, args.alunos, args.semente)
+
+    # As telas imprimem conquistas e mensagens; durante a carga a saída é descartada
+    with contextlib.redirect_stdout(io.StringIO()):
+        sistema = carregar_sistema()(diretorio)
+    motor = sistema.motor
+    questoes = sistema.simulados['questoes']
+    emails = [u['email'] for u in sistema.usuarios]
+    if args.resgates:
+        executar_resgates(sistema, emails, args)
+        return
+    tamanho = min(args.questoes_simulado, len(questoes))
+    evento = None
+    if args.evento:
+        evento = "CARGA"
+        sistema.eventos.criar_evento(evento, "Evento de Carga", questoes, args.evento, tamanho, tamanho * 5)
+
+    def tarefa(n):
+        rng = random.Random(args.semente + n)
+        return executar_sessao(sistema, emails[n % len(emails)], questoes, tamanho, rng, evento)
+
+    print(f"Executando {args.sessoes} sessões ({args.concorrencia} simultâneas) em {diretorio}...")
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+            resultados = list(executor.map(tarefa, range(args.sessoes)))
+        sistema.encerrar()
+    duracao = time.perf_counter() - inicio
+    recusadas = sum(1 for resultado in resultados if resultado is None)
+    resultados = [resultado for resultado in resultados if resultado is not None]
+
+    inicios = sorted(ini for ini, _, _ in resultados)
+    latencias = sorted(lat for _, lat_sessao, _ in resultados for lat in lat_sessao)
+    finalizacoes = sorted(fin for _, _, fin in resultados)
+    tamanho_dados = sum(os.path.getsize(os.path.join(diretorio, nome)) for nome in os.listdir(diretorio)
+                        if os.path.isfile(os.path.join(diretorio, nome)))
+
+    print("\n" + "=" * 50)
+    print("RESULTADO DO TESTE DE CARGA".center(50))
+    print("=" * 50)
+    print(f"Sessões: {len(resultados)} em {duracao:.2f}s ({len(resultados) / duracao:.1f} sessões/s)")
+    if recusadas:
+        print(f"Sessões recusadas (aluno repetido no evento): {recusadas}")
+    print(f"Respostas: {len(latencias)} ({len(latencias) / duracao:.0f} respostas/s)")
+    print("Latência do início (ms): "
+          f"p50 {percentil(inicios, 0.5) / 1e6:.2f} | p90 {percentil(inicios, 0.9) / 1e6:.2f} | "
+          f"p99 {percentil(inicios, 0.99) / 1e6:.2f}")
+    print("Latência da resposta (µs): "
+          f"p50 {percentil(latencias, 0.5) / 1e3:.1f} | p90 {percentil(latencias, 0.9) / 1e3:.1f} | "
+          f"p99 {percentil(latencias, 0.99) / 1e3:.1f}")
+    print("Latência da finalização (ms): "
+          f"p50 {percentil(finalizacoes, 0.5) / 1e6:.1f} | p90 {percentil(finalizacoes, 0.9) / 1e6:.1f} | "
+          f"p99 {percentil(finalizacoes, 0.99) / 1e6:.1f}")
+    print(f"Gravações: {motor.gravacoes} | Tempo total gravando: {motor.tempo_persistencia_ns / 1e9:.2f}s "
+          f"({motor.tempo_persistencia_ns / 1e9 / duracao * 100:.0f}% do total, "
+          f"{motor.tempo_persistencia_ns / 1e6 / max(1, motor.gravacoes):.1f} ms por gravação)")
+    barramento = sistema.barramento
+    print(f"Consumidores de eventos: {barramento.eventos_publicados} eventos, "
+          f"{barramento.tempo_consumidores_ns / 1e6 / max(1, barramento.eventos_publicados):.2f} ms por evento")
+    print(f"Tamanho dos dados gravados: {tamanho_dados / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Ranking de pontos mantido ordenado a cada mudança, em vez de ordenado a cada exibição.
+
+As chaves (-pontos, email) ficam numa lista ordenada dividida em blocos de até 2 * TAMANHO_BLOCO chaves,
+com o maior elemento de cada bloco numa lista à parte e uma árvore de Fenwick sobre os tamanhos dos
+blocos. Achar o bloco é uma busca binária, inserir ou remover mexe só nele (no máximo 2 * TAMANHO_BLOCO
+elementos deslocados, não n), e a posição de um aluno é o prefixo da árvore mais a busca no bloco, em
+O(log n). O top K percorre os primeiros blocos em O(K), e o e-mail desempata (nomes repetidos não se
+confundem).
+"""
+from bisect import bisect_left, insort
+
+TAMANHO_BLOCO = 512  # chaves por bloco ao montar/dividir; um bloco com o dobro disso é dividido ao meio
+
+
+class RankingOrdenado:
+    """Lista ordenada em blocos de (-pontos, email) com o placar atual de cada e-mail"""
+
+    def __init__(self, pontos_por_email=None):
+        self.pontos = dict(pontos_por_email or {})
+        chaves = sorted((-pontos, email) for email, pontos in self.pontos.items())
+        self.blocos = [chaves[i:i + TAMANHO_BLOCO] for i in range(0, len(chaves), TAMANHO_BLOCO)]
+        self.maximos = [bloco[-1] for bloco in self.blocos]
+        self.arvore = None  # Fenwick dos tamanhos dos blocos; refeita quando blocos são criados ou removidos
+
+    def __len__(self):
+        return len(self.pontos)
+
+    def __contains__(self, email):
+        return email in self.pontos
+
+    def _montar_arvore(self):
+        self.arvore = [0] * (len(self.blocos) + 1)
+        for i, bloco in enumerate(self.blocos, 1):
+            self.arvore[i] += len(bloco)
+            pai = i + (i & -i)
+            if pai < len(self.arvore):
+                self.arvore[pai] += self.arvore[i]
+
+    def _ajustar(self, i, variacao):
+        """Soma `variacao` ao tamanho do bloco i na árvore"""
+        if self.arvore is None:
+            return
+        i += 1
+        while i < len(self.arvore):
+            self.arvore[i] += variacao
+            i += i & -i
+
+    def _antes(self, i):
+        """Quantas chaves há nos blocos anteriores ao bloco i"""
+        if self.arvore is None:
+            self._montar_arvore()
+        total = 0
+        while i > 0:
+            total += self.arvore[i]
+            i -= i & -i
+        return total
+
+    def _inserir(self, chave):
+        if not self.blocos:
+            self.blocos, self.maximos, self.arvore = [[chave]], [chave], None
+            return
+        i = min(bisect_left(self.maximos, chave), len(self.blocos) - 1)
+        bloco = self.blocos[i]
+        insort(bloco, chave)
+        self.maximos[i] = bloco[-1]
+        if len(bloco) > 2 * TAMANHO_BLOCO:
+            self.blocos[i:i + 1] = [bloco[:TAMANHO_BLOCO], bloco[TAMANHO_BLOCO:]]
+            self.maximos[i:i + 1] = [bloco[TAMANHO_BLOCO - 1], bloco[-1]]
+            self.arvore = None
+        else:
+            self._ajustar(i, 1)
+
+    def _remover(self, chave):
+        i = bisect_left(self.maximos, chave)
+        bloco = self.blocos[i]
+        del bloco[bisect_left(bloco, chave)]
+        if bloco:
+            self.maximos[i] = bloco[-1]
+            self._ajustar(i, -1)
+        else:
+            del self.blocos[i]
+            del self.maximos[i]
+            self.arvore = None
+
+    def _indice(self, chave):
+        """Quantas chaves são menores que `chave`"""
+        i = bisect_left(self.maximos, chave)
+        if i == len(self.blocos):
+            return len(self.pontos)
+        return self._antes(i) + bisect_left(self.blocos[i], chave)
+
+    def atualizar(self, email, pontos):
+        """Define os pontos do e-mail, reposicionando-o no ranking"""
+        anterior = self.pontos.get(email)
+        if anterior == pontos:
+            return
+        if anterior is not None:
+            self._remover((-anterior, email))
+        self.pontos[email] = pontos
+        self._inserir((-pontos, email))
+
+    def remover(self, email):
+        """Tira o e-mail do ranking"""
+        anterior = self.pontos.pop(email, None)
+        if anterior is not None:
+            self._remover((-anterior, email))
+
+    def posicao(self, email):
+        """Posição (1 = primeiro) do e-mail, ou None se ele não estiver no ranking.
+
+        Empates em pontos ficam com a mesma posição (a do primeiro e-mail com aqueles pontos).
+        """
+        pontos = self.pontos.get(email)
+        if pontos is None:
+            return None
+        return self._indice((-pontos, "")) + 1
+
+    def acima_de(self, pontos):
+        """Quantos e-mails têm mais pontos que `pontos`"""
+        return self._indice((-pontos, ""))
+
+    def topo(self, k):
+        """Os k primeiros como lista de (email, pontos)"""
+        topo = []
+        for bloco in self.blocos:
+            if len(topo) >= k:
+                break
+            topo.extend((email, -negativo) for negativo, email in bloco[:k - len(topo)])
+        return topo
+
+
+class PercentisDesempenho:
+    """Último percentual de cada aluno em rankings ordenados por partição, para responder percentis em O(log n).
+
+    Partições: ("geral",), ("area", área), ("turma", escola, série) e ("turma", escola, série, área).
+    """
+
+    def __init__(self):
+        self.particoes = {}
+
+    def _ranking(self, particao):
+        ranking = self.particoes.get(particao)
+        if ranking is None:
+            ranking = self.particoes[particao] = RankingOrdenado()
+        return ranking
+
+    def registrar(self, email, escola, serie, resultado):
+        """Atualiza as partições do aluno com um resultado (simulado ou diagnóstico) mais recente"""
+        self._ranking(("geral",)).atualizar(email, resultado['percentual'])
+        self._ranking(("turma", escola, serie)).atualizar(email, resultado['percentual'])
+        for area, dados in resultado.get('desempenho_areas', {}).items():
+            if dados['total'] > 0:
+                percentual = dados['acertos'] / dados['total'] * 100
+                self._ranking(("area", area)).atualizar(email, percentual)
+                self._ranking(("turma", escola, serie, area)).atualizar(email, percentual)
+
+    def percentil_superior(self, particao, email):
+        """Posição do aluno como percentual do tamanho da partição ("top 12%"), ou None se ele não estiver nela"""
+        ranking = self.particoes.get(particao)
+        if ranking is None or email not in ranking:
+            return None
+        return ranking.posicao(email) / len(ranking) * 100
+
+    def ranking(self, particao):
+        """Ranking ordenado da partição (vazio se ela não existir)"""
+        return self.particoes.get(particao) or RankingOrdenado()
+
+
+def chaves_periodo(momento):
+    """Chaves da semana (ISO) e do mês de um datetime, usadas nos placares por período"""
+    ano, semana, _ = momento.isocalendar()
+    return {"semana": f"{ano}-S{semana:02d}", "mes": momento.strftime("%Y-%m")}
+
+
+class PlacaresTurma:
+    """Rankings de pontos por turma (escola, série): total, da semana e do mês atuais.
+
+    Cada turma tem seus próprios RankingOrdenado, então ordenar uma turma de 40 alunos custa o mesmo
+    com mil ou um milhão de alunos na plataforma. Os rankings da semana e do mês são montados a partir
+    de contadores de pontos ganhos por período; ao virar a semana ou o mês os placares antigos saem.
+    """
+
+    def __init__(self, agora):
+        self.periodos = chaves_periodo(agora)
+        self.rankings = {}  # (período ou "total", escola, série) -> RankingOrdenado
+
+    def _ranking(self, periodo, escola, serie):
+        chave = (periodo, escola, serie)
+        ranking = self.rankings.get(chave)
+        if ranking is None:
+            ranking = self.rankings[chave] = RankingOrdenado()
+        return ranking
+
+    def _virar_periodos(self, agora):
+        periodos = chaves_periodo(agora)
+        if periodos != self.periodos:
+            antigos = {valor for tipo, valor in self.periodos.items() if periodos[tipo] != valor}
+            self.rankings = {chave: r for chave, r in self.rankings.items() if chave[0] not in antigos}
+            self.periodos = periodos
+
+    def carregar(self, email, escola, serie, pontos, pontos_periodos):
+        """Inclui um aluno com seus pontos totais e os contadores por período guardados"""
+        self._ranking("total", escola, serie).atualizar(email, pontos)
+        for periodo in self.periodos.values():
+            if pontos_periodos.get(periodo):
+                self._ranking(periodo, escola, serie).atualizar(email, pontos_periodos[periodo])
+
+    def registrar(self, email, escola, serie, pontos, pontos_periodos, variacao, agora):
+        """Aplica uma mudança de pontos; pontos ganhos (variação positiva) contam na semana e no mês.
+
+        `pontos_periodos` é o dicionário de contadores do aluno, atualizado aqui e gravado por quem chamou.
+        """
+        self._virar_periodos(agora)
+        self._ranking("total", escola, serie).atualizar(email, pontos)
+        if variacao <= 0:
+            return
+        for periodo in list(pontos_periodos):
+            if periodo not in self.periodos.values():
+                del pontos_periodos[periodo]
+        for periodo in self.periodos.values():
+            pontos_periodos[periodo] = pontos_periodos.get(periodo, 0) + variacao
+            self._ranking(periodo, escola, serie).atualizar(email, pontos_periodos[periodo])
+
+    def ranking(self, escola, serie, tipo="total", agora=None):
+        """Ranking da turma: tipo "total", "semana" ou "mes" (vazio se ninguém pontuou no período)"""
+        if agora is not None:
+            self._virar_periodos(agora)
+        periodo = "total" if tipo == "total" else self.periodos[tipo]
+        return self.rankings.get((periodo, escola, serie)) or RankingOrdenado()
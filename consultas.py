@@ -0,0 +1,466 @@
+"""Camada de consultas analíticas: filtrar, agrupar, agregar, ordenar e limitar sobre tabelas colunares.
+
+Tabelas disponíveis:
+    alunos            um registro por aluno (escola, série, pontos, último resultado...)
+    resultados        um registro por diagnóstico/simulado de cada aluno
+    resultados_areas  um registro por área de cada diagnóstico/simulado
+    respostas         um registro por resposta do registro colunar (registro_respostas/*.col)
+
+Cada tabela tem colunas base (arrays NumPy ou `np.memmap`) e dimensões: colunas como escola, série ou
+área da questão, guardadas uma vez por aluno/questão e ligadas por ordinal. Os filtros são empurrados
+para a leitura: são avaliados bloco a bloco nas colunas base (e, nas dimensões, uma vez por aluno ou
+questão), e só as linhas aprovadas das colunas realmente usadas são materializadas. Agrupamentos e
+agregados são vetorizados (np.unique/np.bincount), sem laços em Python por aluno. As tabelas montadas
+a partir do desempenho.json ficam em cache (colunas .npy em consultas_cache/) enquanto os arquivos de
+origem não mudam, e são reabertas como np.memmap.
+
+Uso: python consultas.py resultados_areas --filtro "escola=Escola 7" --agrupar area \\
+         --agregar "media=media:percentual" --agregar "alunos=distintos:email" --ordenar media --limite 5
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from registro_respostas import ler_colunas
+from exportacao_bi import iterar_objeto_json
+
+LINHAS_BLOCO = 1_000_000  # linhas lidas por vez das colunas base (limita a memória)
+DIRETORIO_CACHE = "consultas_cache"  # colunas das tabelas de desempenho, no diretório de dados
+ARQUIVO_CACHE = "cache.json"         # índice do cache, com a assinatura dos arquivos de origem
+VERSAO_CACHE = 1                     # muda quando o formato das colunas guardadas muda
+
+OPERADORES = {
+    "==": np.equal, "!=": np.not_equal, "<": np.less, "<=": np.less_equal,
+    ">": np.greater, ">=": np.greater_equal, "em": np.isin
+}
+
+
+def _converter(valor, dtype):
+    """Converte o valor de um filtro para o tipo da coluna"""
+    if isinstance(valor, (list, tuple, set)):
+        return np.array([_converter(v, dtype) for v in valor])
+    if dtype.kind == 'M':
+        return np.datetime64(valor)
+    if dtype.kind in 'iuf':
+        return float(valor)
+    return str(valor)
+
+
+class Tabela:
+    """Colunas base de mesmo comprimento e dimensões (chave ordinal, array de valores por ordinal)"""
+
+    def __init__(self, colunas, dimensoes=None):
+        self.colunas = colunas
+        self.dimensoes = dimensoes or {}  # nome -> (coluna base com o ordinal, valores por ordinal)
+        self.linhas = len(next(iter(colunas.values()))) if colunas else 0
+
+    def nomes(self):
+        """Colunas disponíveis na tabela"""
+        return list(self.colunas) + list(self.dimensoes)
+
+    def ler(self, colunas, predicados):
+        """Linhas que passam em todos os predicados (coluna, operador, valor), só das colunas pedidas"""
+        for nome in set(colunas) | {p[0] for p in predicados}:
+            if nome not in self.colunas and nome not in self.dimensoes:
+                raise ValueError(f"Coluna inexistente: {nome}")
+
+        # Predicados sobre dimensões viram um vetor booleano por ordinal, avaliado uma única vez
+        base, por_chave = [], {}
+        for nome, operador, valor in predicados:
+            if nome in self.dimensoes:
+                chave, valores = self.dimensoes[nome]
+                aprovado = OPERADORES[operador](valores, _converter(valor, valores.dtype))
+                por_chave[chave] = aprovado if chave not in por_chave else por_chave[chave] & aprovado
+            else:
+                base.append((self.colunas[nome], OPERADORES[operador], _converter(valor, self.colunas[nome].dtype)))
+
+        partes = {nome: [] for nome in colunas}
+        for inicio in range(0, self.linhas, LINHAS_BLOCO):
+            fim = min(inicio + LINHAS_BLOCO, self.linhas)
+            mascara = np.ones(fim - inicio, dtype=bool)
+            for coluna, operador, valor in base:
+                mascara &= operador(coluna[inicio:fim], valor)
+            for chave, aprovado in por_chave.items():
+                mascara &= aprovado[self.colunas[chave][inicio:fim]]
+            indices = np.flatnonzero(mascara) + inicio
+            for nome in colunas:
+                if nome in self.colunas:
+                    partes[nome].append(np.asarray(self.colunas[nome][indices]))
+                else:
+                    chave, valores = self.dimensoes[nome]
+                    partes[nome].append(valores[self.colunas[chave][indices]])
+        return {nome: np.concatenate(blocos) if blocos else np.empty(0) for nome, blocos in partes.items()}
+
+
+def _codigos(valores):
+    """Valores distintos e o código de cada linha"""
+    distintos, codigos = np.unique(valores, return_inverse=True)
+    return distintos, codigos.reshape(-1)
+
+
+def _agregar(funcao, valores, grupos, num_grupos):
+    """Agregado de `valores` por grupo (grupos = código do grupo de cada linha)"""
+    contagem = np.bincount(grupos, minlength=num_grupos)
+    if funcao == "contar":
+        return contagem
+    if funcao == "distintos":
+        _, codigos = _codigos(valores)
+        pares = np.unique(grupos.astype(np.int64) * (codigos.max(initial=0) + 1) + codigos)
+        return np.bincount(pares // (codigos.max(initial=0) + 1), minlength=num_grupos)
+    valores = valores.astype(float)
+    if funcao == "soma":
+        return np.bincount(grupos, weights=valores, minlength=num_grupos)
+    if funcao == "media":
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.bincount(grupos, weights=valores, minlength=num_grupos) / contagem
+    if funcao in ("minimo", "maximo"):
+        ordem = np.argsort(grupos, kind='stable')
+        inicios = np.flatnonzero(np.r_[True, np.diff(grupos[ordem]) != 0]) if len(ordem) else ordem
+        reduzir = np.minimum if funcao == "minimo" else np.maximum
+        resultado = np.full(num_grupos, np.nan)
+        if len(ordem):
+            resultado[grupos[ordem][inicios]] = reduzir.reduceat(valores[ordem], inicios)
+        return resultado
+    raise ValueError(f"Agregado desconhecido: {funcao}")
+
+
+class Consulta:
+    """Consulta declarativa sobre uma Tabela; os métodos devolvem a própria consulta para encadear"""
+
+    def __init__(self, tabela):
+        self.tabela = tabela
+        self.predicados = []
+        self.projecao = None
+        self.grupos = []
+        self.agregados = {}  # nome da saída -> (função, coluna)
+        self.ordem = []      # (coluna, decrescente)
+        self.limite = None
+
+    def filtrar(self, coluna, operador, valor):
+        """Mantém as linhas em que `coluna operador valor` (operadores: ==, !=, <, <=, >, >=, em)"""
+        if operador not in OPERADORES:
+            raise ValueError(f"Operador desconhecido: {operador}")
+        self.predicados.append((coluna, operador, valor))
+        return self
+
+    def selecionar(self, *colunas):
+        """Colunas do resultado (sem agrupamento)"""
+        self.projecao = list(colunas)
+        return self
+
+    def agrupar(self, *colunas):
+        """Agrupa pelas colunas informadas"""
+        self.grupos = list(colunas)
+        return self
+
+    def agregar(self, **saidas):
+        """Agregados nomeados: nome=(função, coluna), função em contar, soma, media, minimo, maximo, distintos"""
+        self.agregados.update(saidas)
+        return self
+
+    def ordenar(self, coluna, decrescente=False):
+        """Acrescenta um critério de ordenação (na ordem em que são informados)"""
+        self.ordem.append((coluna, decrescente))
+        return self
+
+    def limitar(self, quantidade):
+        """Limita o número de linhas do resultado"""
+        self.limite = quantidade
+        return self
+
+    def executar(self):
+        """Executa a consulta e devolve as linhas como dicionários"""
+        if self.agregados or self.grupos:
+            # só as colunas usadas; com apenas contar() lê a menor coluna base para contar as linhas
+            colunas = list(dict.fromkeys(self.grupos + [c for _, c in self.agregados.values() if c])) or \
+                [min(self.tabela.colunas, key=lambda nome: self.tabela.colunas[nome].dtype.itemsize)]
+        else:
+            colunas = self.projecao or self.tabela.nomes()
+        dados = self.tabela.ler(colunas, self.predicados)
+
+        if self.agregados or self.grupos:
+            linhas = len(dados[colunas[0]])
+            combinado = np.zeros(linhas, dtype=np.int64)
+            distintos_grupos = []
+            for nome in self.grupos:
+                distintos, codigos = _codigos(dados[nome])
+                distintos_grupos.append(distintos)
+                combinado = combinado * len(distintos) + codigos
+            chaves, grupos = np.unique(combinado, return_inverse=True)
+            grupos = grupos.reshape(-1)
+            if not self.grupos:
+                chaves, grupos = np.zeros(1, dtype=np.int64), np.zeros(linhas, dtype=np.int64)
+            resultado = {}
+            resto = chaves.copy()
+            for nome, distintos in reversed(list(zip(self.grupos, distintos_grupos))):
+                resultado[nome] = distintos[resto % len(distintos)]
+                resto //= len(distintos)
+            for saida, (funcao, coluna) in self.agregados.items():
+                valores = dados[coluna] if coluna else np.zeros(linhas)
+                resultado[saida] = _agregar(funcao, valores, grupos, len(chaves))
+            resultado = {nome: resultado[nome] for nome in self.grupos + list(self.agregados)}
+        else:
+            resultado = dados
+
+        total = len(next(iter(resultado.values()))) if resultado else 0
+        ordem = np.arange(total)
+        if self.ordem:
+            chaves_ordem = []
+            for coluna, decrescente in reversed(self.ordem):  # np.lexsort usa a última chave como principal
+                _, codigos = _codigos(resultado[coluna])
+                chaves_ordem.append(-codigos if decrescente else codigos)
+            ordem = np.lexsort(chaves_ordem)
+        if self.limite is not None:
+            ordem = ordem[:self.limite]
+        return [dict(zip(resultado, valores)) for valores in
+                zip(*(resultado[nome][ordem].tolist() for nome in resultado))]
+
+
+def _texto(valores):
+    return np.array(valores, dtype=str)
+
+
+COLUNAS_RESULTADOS = ("aluno", "tipo", "data", "area", "pontuacao", "total_questoes", "percentual")
+COLUNAS_AREAS = ("aluno", "tipo", "data", "area", "acertos", "total", "percentual")
+
+
+def _dimensoes_alunos(usuarios):
+    """Valores por ordinal de aluno das colunas de cadastro"""
+    return {
+        "email": _texto([u['email'] for u in usuarios]),
+        "nome": _texto([u['nome'] for u in usuarios]),
+        "escola": _texto([u.get('escola') or "" for u in usuarios]),
+        "serie": _texto([u.get('serie') or "" for u in usuarios])
+    }
+
+
+def _montar_colunas(nomes, linhas):
+    """Arrays tipados das colunas a partir de linhas (tuplas na ordem de `nomes`)"""
+    valores = list(zip(*linhas)) or [()] * len(nomes)
+    arrays = {}
+    for nome, coluna in zip(nomes, valores):
+        if nome == "data":
+            arrays[nome] = np.array(coluna, dtype='datetime64[s]')
+        elif nome in ("tipo", "area"):
+            arrays[nome] = _texto(coluna)
+        elif nome == "aluno":
+            arrays[nome] = np.array(coluna, dtype=np.int64)
+        else:
+            arrays[nome] = np.asarray(coluna)
+    return arrays
+
+
+def tabelas_desempenho(usuarios, desempenho):
+    """Tabelas alunos, resultados e resultados_areas montadas (uma vez) a partir de usuários e desempenho.
+
+    `desempenho` é o dicionário email -> desempenho ou uma sequência de pares (email, desempenho) lida
+    uma única vez (ex.: iterar_objeto_json). Cada resultado vira uma tupla, e as colunas são montadas de
+    uma vez no final.
+    """
+    ordinais = {u['email']: i for i, u in enumerate(usuarios)}
+    alunos = {"aluno": np.arange(len(usuarios)), "nivel": np.array([u.get('nivel', 1) for u in usuarios]),
+              "pontos": np.zeros(len(usuarios), dtype=np.int64), "simulados": np.zeros(len(usuarios), dtype=np.int64),
+              "diagnostico": np.full(len(usuarios), np.nan), "ultimo_percentual": np.full(len(usuarios), np.nan)}
+    resultados, areas = [], []
+
+    for email, desempenho_aluno in desempenho.items() if isinstance(desempenho, dict) else desempenho:
+        ordinal = ordinais.get(email)
+        if ordinal is None:  # desempenho de um e-mail sem cadastro
+            continue
+        simulados = desempenho_aluno.get('simulados', [])
+        diagnostico = desempenho_aluno.get('diagnostico_inicial')
+        alunos['pontos'][ordinal] = desempenho_aluno.get('gamificacao', {}).get('pontos', 0)
+        alunos['simulados'][ordinal] = len(simulados)
+        ultimo = simulados[-1] if simulados else diagnostico
+        if diagnostico:
+            alunos['diagnostico'][ordinal] = diagnostico['percentual']
+        if ultimo:
+            alunos['ultimo_percentual'][ordinal] = ultimo['percentual']
+
+        for tipo, resultado in ([("diagnostico", diagnostico)] if diagnostico else []) + \
+                [("simulado", s) for s in simulados]:
+            data = resultado['data'].replace(" ", "T")
+            resultados.append((ordinal, tipo, data, resultado.get('area') or "", resultado['pontuacao'],
+                               resultado['total_questoes'], resultado['percentual']))
+            for area, dados in resultado.get('desempenho_areas', {}).items():
+                if dados['total'] > 0:
+                    areas.append((ordinal, tipo, data, area, dados['acertos'], dados['total'],
+                                  dados['acertos'] / dados['total'] * 100))
+
+    dimensoes = {nome: ("aluno", valores) for nome, valores in _dimensoes_alunos(usuarios).items()}
+    return {"alunos": Tabela(alunos, dimensoes),
+            "resultados": Tabela(_montar_colunas(COLUNAS_RESULTADOS, resultados), dimensoes),
+            "resultados_areas": Tabela(_montar_colunas(COLUNAS_AREAS, areas), dimensoes)}
+
+
+def tabela_respostas(diretorio_respostas, usuarios, ids_questoes, questoes_por_id):
+    """Tabela das respostas sobre as colunas do registro (np.memmap), com dimensões de aluno e de questão"""
+    colunas = ler_colunas(diretorio_respostas)
+    colunas['aluno'] = colunas.pop('usuario')
+    questoes = [questoes_por_id.get(questao_id, {}) for questao_id in ids_questoes]
+    dimensoes = {
+        "email": ("aluno", _texto([u['email'] for u in usuarios])),
+        "escola": ("aluno", _texto([u.get('escola') or "" for u in usuarios])),
+        "serie": ("aluno", _texto([u.get('serie') or "" for u in usuarios])),
+        "questao_id": ("questao", _texto(ids_questoes)),
+        "area": ("questao", _texto([q.get('area', "") for q in questoes])),
+        "nivel": ("questao", _texto([q.get('nivel', "") for q in questoes]))
+    }
+    return Tabela(colunas, dimensoes)
+
+
+def _assinatura(*caminhos):
+    """(tamanho, mtime em ns) de cada arquivo, para saber se o cache ainda corresponde aos dados"""
+    return [[os.stat(c).st_size, os.stat(c).st_mtime_ns] if os.path.exists(c) else None for c in caminhos]
+
+
+def _carregar_cache(diretorio_cache, assinatura):
+    """Tabelas de desempenho do cache como np.memmap (None se não há cache ou os dados mudaram)"""
+    caminho = os.path.join(diretorio_cache, ARQUIVO_CACHE)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r') as f:
+        indice = json.load(f)
+    if indice.get('versao') != VERSAO_CACHE or indice.get('assinatura') != assinatura:
+        return None
+
+    def abrir(nome):
+        return np.load(os.path.join(diretorio_cache, f"{nome}.npy"), mmap_mode='r')
+
+    dimensoes = {nome: ("aluno", abrir(f"dimensao.{nome}")) for nome in indice['dimensoes']}
+    return {tabela: Tabela({nome: abrir(f"{tabela}.{nome}") for nome in colunas}, dimensoes)
+            for tabela, colunas in indice['tabelas'].items()}
+
+
+def _salvar_cache(diretorio_cache, assinatura, tabelas):
+    """Grava as colunas em .npy e, por último, o índice com a assinatura dos dados (temporário + rename)"""
+    os.makedirs(diretorio_cache, exist_ok=True)
+    dimensoes = next(iter(tabelas.values())).dimensoes
+    for nome, (_, valores) in dimensoes.items():
+        np.save(os.path.join(diretorio_cache, f"dimensao.{nome}.npy"), valores)
+    for tabela, dados in tabelas.items():
+        for nome, valores in dados.colunas.items():
+            np.save(os.path.join(diretorio_cache, f"{tabela}.{nome}.npy"), valores)
+    caminho = os.path.join(diretorio_cache, ARQUIVO_CACHE)
+    with open(caminho + ".tmp", 'w') as f:
+        json.dump({"versao": VERSAO_CACHE, "assinatura": assinatura, "dimensoes": list(dimensoes),
+                   "tabelas": {tabela: list(dados.colunas) for tabela, dados in tabelas.items()}}, f)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def carregar_tabelas(diretorio_dados, usar_cache=True):
+    """Todas as tabelas a partir do diretório de dados do sistema.
+
+    As tabelas de desempenho são montadas uma vez e guardadas em colunas .npy (DIRETORIO_CACHE); enquanto
+    usuarios.json e desempenho.json não mudam (tamanho e mtime), as consultas seguintes as abrem como
+    np.memmap, e os filtros são aplicados bloco a bloco antes de materializar qualquer linha.
+    """
+    arquivo_usuarios = os.path.join(diretorio_dados, 'usuarios.json')
+    arquivo_desempenho = os.path.join(diretorio_dados, 'desempenho.json')
+    diretorio_cache = os.path.join(diretorio_dados, DIRETORIO_CACHE)
+    assinatura = _assinatura(arquivo_usuarios, arquivo_desempenho)
+    with open(arquivo_usuarios, 'r') as f:
+        usuarios = json.load(f)
+
+    tabelas = _carregar_cache(diretorio_cache, assinatura) if usar_cache else None
+    if tabelas is None:
+        pares = iterar_objeto_json(arquivo_desempenho) if os.path.exists(arquivo_desempenho) else {}
+        tabelas = tabelas_desempenho(usuarios, pares)
+        if usar_cache:
+            try:
+                _salvar_cache(diretorio_cache, assinatura, tabelas)
+            except IOError as e:
+                print(f"Erro ao salvar cache de consultas: {e}")
+
+    indice = os.path.join(diretorio_dados, 'estatisticas_questoes.json')
+    banco = os.path.join(diretorio_dados, 'banco_simulados.json')
+    if os.path.exists(indice) and os.path.exists(banco):
+        with open(indice, 'r') as f:
+            ids_questoes = json.load(f).get('ids', [])
+        with open(banco, 'r') as f:
+            questoes_por_id = {q['id']: q for q in json.load(f).get('questoes', [])}
+        tabelas["respostas"] = tabela_respostas(os.path.join(diretorio_dados, 'registro_respostas'),
+                                                usuarios, ids_questoes, questoes_por_id)
+    return tabelas
+
+
+def _filtro(texto):
+    """Converte "coluna<op>valor" (ou "coluna em a,b,c") num predicado"""
+    encontrado = re.match(r"^\s*(\w+)\s*(==|!=|>=|<=|=|>|<|\sem\s)\s*(.*?)\s*$", texto)
+    if not encontrado:
+        raise argparse.ArgumentTypeError(f"Filtro inválido: {texto}")
+    coluna, operador, valor = encontrado.groups()
+    operador = operador.strip()
+    if operador == "=":
+        operador = "=="
+    return (coluna, operador, valor.split(",") if operador == "em" else valor)
+
+
+def _agregado(texto):
+    """Converte "saida=funcao:coluna" (ou "saida=contar") num agregado"""
+    encontrado = re.match(r"^\s*(\w+)\s*=\s*(\w+)\s*(?::\s*(\w+))?\s*$", texto)
+    if not encontrado:
+        raise argparse.ArgumentTypeError(f"Agregado inválido: {texto}")
+    saida, funcao, coluna = encontrado.groups()
+    return saida, (funcao, coluna)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas analíticas sobre alunos, resultados e respostas")
+    parser.add_argument('tabela', help="alunos, resultados, resultados_areas ou respostas")
+    parser.add_argument('--dados', default=".", help="Diretório de dados do sistema")
+    parser.add_argument('--filtro', type=_filtro, action='append', default=[], help="coluna<op>valor")
+    parser.add_argument('--selecionar', nargs='+', default=None, help="Colunas do resultado (sem agrupar)")
+    parser.add_argument('--agrupar', nargs='+', default=[], help="Colunas de agrupamento")
+    parser.add_argument('--agregar', type=_agregado, action='append', default=[], help="saida=funcao:coluna")
+    parser.add_argument('--ordenar', action='append', default=[], help="coluna ou coluna:desc (pode repetir)")
+    parser.add_argument('--limite', type=int, default=None, help="Máximo de linhas")
+    parser.add_argument('--sem-cache', action='store_true', help="Monta as tabelas sem ler nem gravar o cache")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    try:
+        tabelas = carregar_tabelas(args.dados, usar_cache=not args.sem_cache)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Erro ao carregar dados: {e}")
+        return
+    if args.tabela not in tabelas:
+        print(f"Tabela indisponível: {args.tabela} (disponíveis: {', '.join(sorted(tabelas))})")
+        return
+    carga = time.perf_counter() - inicio
+
+    consulta = Consulta(tabelas[args.tabela])
+    for coluna, operador, valor in args.filtro:
+        consulta.filtrar(coluna, operador, valor)
+    if args.selecionar:
+        consulta.selecionar(*args.selecionar)
+    if args.agrupar:
+        consulta.agrupar(*args.agrupar)
+    if args.agregar:
+        consulta.agregar(**dict(args.agregar))
+    for criterio in args.ordenar:
+        coluna, _, sentido = criterio.partition(":")
+        consulta.ordenar(coluna, decrescente=sentido == "desc")
+    if args.limite is not None:
+        consulta.limitar(args.limite)
+
+    inicio = time.perf_counter()
+    try:
+        linhas = consulta.executar()
+    except ValueError as e:
+        print(f"Erro na consulta: {e}")
+        return
+    duracao = time.perf_counter() - inicio
+
+    for linha in linhas:
+        print(" | ".join(f"{nome}: {valor:.2f}" if isinstance(valor, float) else f"{nome}: {valor}"
+                         for nome, valor in linha.items()))
+    print(f"\n{len(linhas)} linhas (tabelas carregadas em {carga:.2f}s, consulta em {duracao * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
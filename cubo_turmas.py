@@ -0,0 +1,99 @@
+"""Cubo de desempenho por escola × série × área × semana, atualizado a cada resultado.
+
+Cada célula guarda acertos, questões, soma das notas (percentual do aluno na área), quantidade de
+resultados, os alunos distintos e um histograma das notas em faixas de 10 pontos. As células ficam
+agrupadas por turma (escola, série), então o painel de uma turma só lê as células dela, qualquer que
+seja o número de escolas.
+"""
+from datetime import date
+from functools import lru_cache
+
+from classificacao import chaves_periodo
+
+FAIXAS_NOTA = 10  # faixas de 10 pontos percentuais: 0-9, 10-19, ..., 90-100
+
+
+@lru_cache(maxsize=4096)
+def semana_do_dia(dia):
+    """Chave da semana ISO de um dia "AAAA-MM-DD" (os resultados de um mesmo dia reaproveitam o cálculo)"""
+    return chaves_periodo(date.fromisoformat(dia))['semana']
+
+
+def _celula_vazia():
+    return {"acertos": 0, "total": 0, "soma_notas": 0.0, "resultados": 0, "alunos": set(),
+            "histograma": [0] * FAIXAS_NOTA}
+
+
+def _taxa(celula):
+    """Percentual de acertos da célula (None se ela não existir)"""
+    return None if celula is None else celula['acertos'] / celula['total'] * 100
+
+
+def _somar(destino, celula):
+    destino['acertos'] += celula['acertos']
+    destino['total'] += celula['total']
+    destino['soma_notas'] += celula['soma_notas']
+    destino['resultados'] += celula['resultados']
+    destino['alunos'] |= celula['alunos']
+    for i, quantidade in enumerate(celula['histograma']):
+        destino['histograma'][i] += quantidade
+
+
+class CuboDesempenho:
+    """Células (área, semana) -> agregados, agrupadas por turma (escola, série)"""
+
+    def __init__(self):
+        self.turmas = {}  # (escola, série) -> {(área, semana): célula}
+
+    def registrar(self, email, escola, serie, resultado):
+        """Soma ao cubo um resultado (simulado ou diagnóstico) de um aluno da turma"""
+        semana = semana_do_dia(resultado['data'][:10])
+        celulas = self.turmas.setdefault((escola, serie), {})
+        for area, dados in resultado.get('desempenho_areas', {}).items():
+            if dados['total'] <= 0:
+                continue
+            nota = dados['acertos'] / dados['total'] * 100
+            celula = celulas.get((area, semana))
+            if celula is None:
+                celula = celulas[(area, semana)] = _celula_vazia()
+            celula['acertos'] += dados['acertos']
+            celula['total'] += dados['total']
+            celula['soma_notas'] += nota
+            celula['resultados'] += 1
+            celula['alunos'].add(email)
+            celula['histograma'][min(FAIXAS_NOTA - 1, int(nota // 10))] += 1
+
+    def turmas_da_escola(self, escola):
+        """Séries com resultados na escola"""
+        return sorted(serie for e, serie in self.turmas if e == escola)
+
+    def consultar(self, escola, serie, semanas=None):
+        """Agregados da turma por área (somando as semanas informadas, ou todas) e por (área, semana)"""
+        por_area, por_semana = {}, {}
+        for (area, semana), celula in self.turmas.get((escola, serie), {}).items():
+            if semanas is not None and semana not in semanas:
+                continue
+            _somar(por_area.setdefault(area, _celula_vazia()), celula)
+            por_semana[(area, semana)] = celula
+        return por_area, por_semana
+
+    def painel(self, escola, serie, num_semanas=6):
+        """Dados do painel da turma: áreas da mais fraca à mais forte, distribuição das notas e tendência semanal"""
+        por_area, por_semana = self.consultar(escola, serie)
+        semanas = sorted({semana for _, semana in por_semana})[-num_semanas:]
+        areas = []
+        for area, celula in por_area.items():
+            areas.append({
+                "area": area,
+                "taxa_acertos": _taxa(celula),
+                "nota_media": celula['soma_notas'] / celula['resultados'],
+                "alunos": len(celula['alunos']),
+                "resultados": celula['resultados'],
+                "histograma": celula['histograma'],
+                "tendencia": [(semana, _taxa(por_semana.get((area, semana)))) for semana in semanas]
+            })
+        areas.sort(key=lambda a: a['taxa_acertos'])
+        alunos = set()
+        for celula in por_area.values():
+            alunos |= celula['alunos']
+        return {"escola": escola, "serie": serie, "alunos": len(alunos), "semanas": semanas, "areas": areas}
@@ -1,17 +1,58 @@
 import os
 import json
 import random
+import time
+import threading
 from datetime import datetime, timedelta
 from collections import defaultdict
 
+from estatisticas_questoes import EstatisticasQuestoes
+from registro_respostas import RegistroRespostas
+from quantis import TemposResposta
+from entrada_temporizada import ler_com_prazo, reescrever_linha, linhas_ocupadas
+from motor_simulado import MotorSimulado
+from eventos_simulado import EventosSimulado
+from montagem_formas import montar_formas
+from amostragem import pesos_areas, sortear_questoes
+from agregados import obter_agregados, atualizar_agregados, desempenho_subareas
+from serie_temporal import obter_serie, atualizar_serie, pontos_grafico
+from classificacao import RankingOrdenado, PercentisDesempenho, PlacaresTurma, chaves_periodo
+from livro_pontos import LivroPontos
+from atividade import AtividadeDiaria
+from recompensas import EstoqueRecompensas, ESTOQUE_ILIMITADO
+from relatorios import (relatorio_professor, relatorio_pais, secao_frequencia, linhas_console,
+                        linhas_pontos_fortes_fracos, linhas_sugestoes, RENDERIZADORES)
+from cache_derivados import CacheDerivados
+from cubo_turmas import CuboDesempenho, FAIXAS_NOTA
+from relatorios_lote import gerar_relatorios_turma, frequencia_aluno
+from regras_conquistas import MotorConquistas
+from barramento import (Barramento, SimuladoConcluido, DiagnosticoConcluido, SemanaConcluida,
+                        LoginRealizado)
+
+RITMO_ENEM_SEG = 180 # Tempo médio por questão no ENEM (3 minutos)
+PONTOS_GRAFICO_EVOLUCAO = 20 # Linhas do gráfico de evolução, qualquer que seja o histórico
+
 class SistemaEstudoENEM:
-    def __init__(self):
-        """Inicializa o sistema de estudos para o ENEM"""
-        self.ARQUIVO_USUARIOS = 'usuarios.json'
-        self.ARQUIVO_PLANOS = 'planos_estudo.json'
-        self.ARQUIVO_SIMULADOS = 'banco_simulados.json'
-        self.ARQUIVO_DESEMPENHO = 'desempenho.json'
-        self.ARQUIVO_CONQUISTAS = 'conquistas.json'
+    def __init__(self, diretorio_dados='.'):
+        """Inicializa o sistema de estudos para o ENEM com os dados guardados em `diretorio_dados`"""
+        self.ARQUIVO_USUARIOS = os.path.join(diretorio_dados, 'usuarios.json')
+        self.ARQUIVO_PLANOS = os.path.join(diretorio_dados, 'planos_estudo.json')
+        self.ARQUIVO_SIMULADOS = os.path.join(diretorio_dados, 'banco_simulados.json')
+        self.ARQUIVO_DESEMPENHO = os.path.join(diretorio_dados, 'desempenho.json')
+        self.ARQUIVO_CONQUISTAS = os.path.join(diretorio_dados, 'conquistas.json')
+        self.ARQUIVO_ESTATISTICAS_INDICE = os.path.join(diretorio_dados, 'estatisticas_questoes.json')
+        self.ARQUIVO_ESTATISTICAS_DADOS = os.path.join(diretorio_dados, 'estatisticas_questoes.bin')
+        self.DIRETORIO_RESPOSTAS = os.path.join(diretorio_dados, 'registro_respostas')
+        self.ARQUIVO_TEMPOS_RESPOSTA = os.path.join(diretorio_dados, 'tempos_resposta.json')
+        self.DIRETORIO_EVENTOS = os.path.join(diretorio_dados, 'eventos')
+        self.ARQUIVO_LIVRO_PONTOS = os.path.join(diretorio_dados, 'pontos.jsonl')
+        self.ARQUIVO_CHECKPOINT_PONTOS = os.path.join(diretorio_dados, 'pontos_checkpoint.json')
+        self.ARQUIVO_ATIVIDADE_INDICE = os.path.join(diretorio_dados, 'atividade.json')
+        self.ARQUIVO_ATIVIDADE_DADOS = os.path.join(diretorio_dados, 'atividade.bin')
+        self.ARQUIVO_RECOMPENSAS = os.path.join(diretorio_dados, 'recompensas.json')
+        self.ARQUIVO_ESTOQUE_RECOMPENSAS = os.path.join(diretorio_dados, 'recompensas_estoque.bin')
+        self.ARQUIVO_INDICE_ESTOQUE_RECOMPENSAS = os.path.join(diretorio_dados, 'recompensas_estoque.json')
+        self.DIRETORIO_RESGATES_RECOMPENSAS = os.path.join(diretorio_dados, 'recompensas_resgates')
 
         self.usuarios = []
         self.planos = {}
@@ -19,10 +60,52 @@ class SistemaEstudoENEM:
         self.desempenho = {}
         self.conquistas = {}
         self.usuario_atual = None
+        self._indice_questoes = None # Cache id -> questão, refeito quando o banco muda
+        self._indice_areas = None # Cache área -> questões, refeito quando o banco muda
+        self.cache_derivados = CacheDerivados() # Relatórios e análises por aluno, invalidados quando os dados mudam
+        self.trava_pontos = threading.Lock() # Saldo em memória, ranking e placares (resgates simultâneos)
+        self.novidades = {} # email -> conquistas e níveis desbloqueados ainda não mostrados ao aluno
 
         self.carregar_dados()
         self.inicializar_simulados()
         self.inicializar_conquistas()
+        self.regras_conquistas = MotorConquistas(self.conquistas)
+
+        self.estatisticas_questoes = EstatisticasQuestoes(self.ARQUIVO_ESTATISTICAS_INDICE,
+                                                          self.ARQUIVO_ESTATISTICAS_DADOS)
+        self.registro_respostas = RegistroRespostas(self.DIRETORIO_RESPOSTAS)
+        self.tempos_resposta = TemposResposta(self.ARQUIVO_TEMPOS_RESPOSTA)
+        self.atividade = AtividadeDiaria(self.ARQUIVO_ATIVIDADE_INDICE, self.ARQUIVO_ATIVIDADE_DADOS)
+        self.migrar_atividade()
+        migrar_resgates = not os.path.isdir(self.DIRETORIO_RESGATES_RECOMPENSAS)
+        self.recompensas = EstoqueRecompensas(self.ARQUIVO_RECOMPENSAS, self.ARQUIVO_ESTOQUE_RECOMPENSAS,
+                                              self.ARQUIVO_INDICE_ESTOQUE_RECOMPENSAS,
+                                              self.DIRETORIO_RESGATES_RECOMPENSAS)
+        self.ordinais_usuarios = {u['email']: i for i, u in enumerate(self.usuarios)}
+        if migrar_resgates:
+            self.migrar_resgates()
+        self.livro_pontos = LivroPontos(self.ARQUIVO_LIVRO_PONTOS, self.ARQUIVO_CHECKPOINT_PONTOS)
+        self.sincronizar_livro_pontos()
+        self.ranking = RankingOrdenado({u['email']: self.pontos_usuario(u['email']) for u in self.usuarios})
+        self.placares_turma = PlacaresTurma(datetime.now())
+        for usuario in self.usuarios:
+            gamificacao = self.desempenho.get(usuario['email'], {}).get('gamificacao', {})
+            self.placares_turma.carregar(usuario['email'], usuario.get('escola'), usuario.get('serie'),
+                                         gamificacao.get('pontos', 0), gamificacao.get('pontos_periodos', {}))
+        self.percentis = PercentisDesempenho()
+        self.cubo = CuboDesempenho()
+        for usuario in self.usuarios:
+            desempenho_aluno = self.desempenho.get(usuario['email'], {})
+            resultados = desempenho_aluno.get('simulados', [])
+            if 'diagnostico_inicial' in desempenho_aluno:
+                resultados = [desempenho_aluno['diagnostico_inicial']] + resultados
+            for resultado in resultados:
+                self.registrar_percentis(usuario['email'], resultado)
+                self.registrar_cubo(usuario['email'], resultado)
+        self.motor = MotorSimulado(self)
+        self.barramento = Barramento(self.motor.salvar)
+        self.inscrever_consumidores()
+        self.eventos = EventosSimulado(self.DIRETORIO_EVENTOS, self.estatisticas_questoes)
 
     def carregar_dados(self):
         """Carrega todos os dados dos arquivos JSON"""
@@ -53,15 +136,113 @@ class SistemaEstudoENEM:
             self.usuarios = []; self.planos = {}; self.desempenho = {}; self.conquistas = {} # Linha 46
             self.simulados = {"questoes": [], "proximo_id": 1} # Linha 47 (Adicionado para consistência)
 
-    def salvar_dados(self):
-        """Salva todos os dados nos arquivos JSON (linhas condensadas)"""
+    def serializar_dados(self):
+        """Conteúdo dos arquivos JSON principais como (arquivo, texto), para gravar depois sem os dados mudarem"""
+        return [(arquivo, json.dumps(dados, indent=4)) for arquivo, dados in (
+            (self.ARQUIVO_USUARIOS, self.usuarios), (self.ARQUIVO_PLANOS, self.planos),
+            (self.ARQUIVO_SIMULADOS, self.simulados), (self.ARQUIVO_DESEMPENHO, self.desempenho),
+            (self.ARQUIVO_CONQUISTAS, self.conquistas))]
+
+    def salvar_dados(self, conteudos=None):
+        """Salva todos os dados nos arquivos JSON (ou os `conteudos` já serializados por serializar_dados)"""
         try:
-            with open(self.ARQUIVO_USUARIOS, 'w') as f: json.dump(self.usuarios, f, indent=4) # Linha 50
-            with open(self.ARQUIVO_PLANOS, 'w') as f: json.dump(self.planos, f, indent=4) # Linha 51
-            with open(self.ARQUIVO_SIMULADOS, 'w') as f: json.dump(self.simulados, f, indent=4) # Linha 52 (NOVO)
-            with open(self.ARQUIVO_DESEMPENHO, 'w') as f: json.dump(self.desempenho, f, indent=4) # Linha 53
-            with open(self.ARQUIVO_CONQUISTAS, 'w') as f: json.dump(self.conquistas, f, indent=4) # Linha 54
-        except IOError as e: print(f"Erro ao salvar dados: {e}") # Linha 55
+            for arquivo, texto in conteudos or self.serializar_dados():
+                with open(arquivo, 'w') as f: f.write(texto)
+        except IOError as e: print(f"Erro ao salvar dados: {e}")
+
+    def separar_lotes_completos(self):
+        """Fotos dos lotes de estatísticas e de respostas que completaram, como (função de gravação, foto),
+        para gravar fora da trava do motor"""
+        lotes = []
+        if self.estatisticas_questoes.lote_completo():
+            lotes.append((self.estatisticas_questoes.salvar, self.estatisticas_questoes.serializar()))
+        if self.registro_respostas.bloco_completo():
+            lotes.append((self.registro_respostas.gravar, self.registro_respostas.separar_bloco()))
+        return lotes
+
+    def gravar_lotes(self, lotes):
+        """Grava os lotes separados por separar_lotes_completos"""
+        for gravar, lote in lotes:
+            gravar(lote)
+
+    def gravar_registros_pendentes(self):
+        """Grava as estatísticas, o registro de respostas e os tempos ainda pendentes do último lote"""
+        self.estatisticas_questoes.salvar()
+        self.registro_respostas.gravar()
+        self.tempos_resposta.salvar()
+        self.eventos.fechar()
+        self.livro_pontos.salvar()
+        self.atividade.salvar()
+
+    def encerrar(self):
+        """Grava os registros pendentes e fecha os arquivos que ficam abertos (saída do sistema)"""
+        self.gravar_registros_pendentes()
+        self.recompensas.fechar()
+
+    def migrar_atividade(self):
+        """Cria os bitmaps de atividade dos alunos que ainda usavam ultimo_acesso/dias_consecutivos"""
+        for usuario in self.usuarios:
+            email = usuario['email']
+            if self.atividade.possui(email):
+                continue
+            self.atividade.iniciar(email, datetime.strptime(usuario['data_cadastro'], "%Y-%m-%d %H:%M:%S").date())
+            desempenho_aluno = self.desempenho.get(email, {})
+            if 'ultimo_acesso' in desempenho_aluno:
+                ultimo = datetime.strptime(desempenho_aluno['ultimo_acesso'], "%Y-%m-%d %H:%M:%S").date()
+                for atraso in range(desempenho_aluno.get('dias_consecutivos', 1)):
+                    self.atividade.registrar(email, ultimo - timedelta(days=atraso))
+
+    def migrar_resgates(self):
+        """Cria os contadores de resgates por aluno a partir das recompensas já registradas no desempenho"""
+        ids_por_nome = {item['nome']: item['id'] for item in self.recompensas.catalogo}
+        for email, ordinal in self.ordinais_usuarios.items():
+            contagem = {}
+            for resgate in self.desempenho.get(email, {}).get('gamificacao', {}).get('recompensas', []):
+                item_id = resgate.get('id') or ids_por_nome.get(resgate['nome'])
+                if item_id in self.recompensas.posicoes:
+                    contagem[item_id] = contagem.get(item_id, 0) + 1
+            for item_id, quantidade in contagem.items():
+                self.recompensas.definir_resgates_aluno(item_id, ordinal, quantidade)
+
+    def sincronizar_livro_pontos(self):
+        """Deixa os pontos gravados em desempenho.json iguais ao livro de pontos, que é a fonte da verdade.
+
+        Alunos que já tinham pontos antes do livro recebem um lançamento de saldo inicial, datado fora de
+        qualquer semana ou mês para não contar nos rankings por período.
+        """
+        agora = datetime.now()
+        for email, desempenho_aluno in self.desempenho.items():
+            gamificacao = desempenho_aluno.get('gamificacao')
+            if gamificacao is None:
+                continue
+            if not self.livro_pontos.possui_lancamentos(email) and gamificacao.get('pontos', 0):
+                self.livro_pontos.creditar(email, gamificacao['pontos'], "saldo inicial", momento=0)
+            gamificacao['pontos'] = self.livro_pontos.saldo(email)
+            gamificacao['pontos_periodos'] = self.pontos_periodos(email, agora)
+
+    def pontos_periodos(self, email, agora):
+        """Pontos ganhos pelo usuário na semana e no mês de `agora`, pelas chaves de chaves_periodo"""
+        hoje = agora.date()
+        periodos = chaves_periodo(agora)
+        return {
+            periodos['semana']: self.livro_pontos.pontos_periodo(email, hoje - timedelta(days=hoje.weekday()), hoje),
+            periodos['mes']: self.livro_pontos.pontos_periodo(email, hoje.replace(day=1), hoje)
+        }
+
+    def questoes_por_id(self):
+        """Índice id -> questão do banco (refeito apenas quando o banco é alterado)"""
+        if self._indice_questoes is None:
+            self._indice_questoes = {q['id']: q for q in self.simulados.get('questoes', [])}
+        return self._indice_questoes
+
+    def questoes_por_area(self):
+        """Índice área -> questões do banco (refeito apenas quando o banco é alterado)"""
+        if self._indice_areas is None:
+            self._indice_areas = defaultdict(list)
+            for q in self.simulados.get('questoes', []):
+                self._indice_areas[q['area']].append(q)
+            self._indice_areas = dict(self._indice_areas)
+        return self._indice_areas
 
     def inicializar_simulados(self):
         """Inicializa o banco de simulados se não existir. (Otimizado)"""
@@ -81,8 +262,8 @@ class SistemaEstudoENEM:
                     {"nome": "Estudante Dedicado", "descricao": "Completou 1 semana de estudos", "pontos": 30, "tipo": "plano"},
                     {"nome": "Simulador", "descricao": "Realizou o primeiro simulado", "pontos": 40, "tipo": "simulado"},
                     {"nome": "Persistente", "descricao": "Manteve 7 dias consecutivos de estudo", "pontos": 50, "tipo": "frequencia"},
-                    {"nome": "Mestre em Matemática", "descricao": "Acertou 80% em um simulado de Matemática.", "pontos": 60, "tipo": "area", "area": "Matemática"},
-                    {"nome": "Redator Nota 1000", "descricao": "Acertou 90% em um simulado de Redação.", "pontos": 70, "tipo": "area", "area": "Redação"}
+                    {"nome": "Mestre em Matemática", "descricao": "Acertou 80% em um simulado de Matemática.", "pontos": 60, "tipo": "area", "area": "Matemática", "minimo": 80},
+                    {"nome": "Redator Nota 1000", "descricao": "Acertou 90% em um simulado de Redação.", "pontos": 70, "tipo": "area", "area": "Redação", "minimo": 90}
                 ],
                 "niveis": [
                     {"nivel": 1, "pontos_necessarios": 0},
@@ -141,6 +322,7 @@ class SistemaEstudoENEM:
             elif opcao == "3":
                 self.menu_administrador() # Chama o menu de administrador (renomeado de mostrar_sobre)
             elif opcao == "4":
+                self.encerrar()
                 print("\nObrigado por usar nosso sistema! Boa sorte no ENEM!")
                 break
             else:
@@ -153,18 +335,31 @@ class SistemaEstudoENEM:
         if senha == "Cesar@2025": # Linha 242
             while True: # Linha 243
                 self.mostrar_titulo("MENU DO ADMINISTRADOR") # Linha 244
+                cache = self.cache_derivados.estatisticas()
+                consultas = cache['acertos'] + cache['faltas']
+                print(f"Cache de relatórios: {cache['acertos']} acertos, {cache['faltas']} faltas"
+                      f" ({cache['acertos'] / consultas * 100 if consultas else 0:.0f}% de acertos),"
+                      f" {cache['entradas']} entradas, {cache['bytes'] / 1024:.0f} KiB\n")
                 print("1. Adicionar Nova Questão") # Linha 245
                 print("2. Editar Questão") # Nova opção para editar (linha 246)
                 print("3. Excluir Questão") # Nova opção para excluir (linha 247)
                 print("4. Visualizar Banco de Questões") # Linha 248 (Antiga 2)
-                print("5. Voltar") # Linha 249 (Antiga 3)
+                print("5. Estatísticas das Questões")
+                print("6. Eventos de Simulado")
+                print("7. Relatórios da Turma")
+                print("8. Painel da Turma")
+                print("9. Voltar") # Linha 249 (Antiga 3)
                 escolha = input("\nEscolha uma opção: ").strip() # Linha 250
 
                 if escolha == '1': self.adicionar_questao() # Linha 251 (Condensada)
                 elif escolha == '2': self.editar_questao() # Linha 252 (Condensada)
                 elif escolha == '3': self.excluir_questao() # Linha 253 (Condensada)
                 elif escolha == '4': self.visualizar_banco_questoes() # Linha 254 (Condensada)
-                elif escolha == '5': break # Linha 255 (Condensada)
+                elif escolha == '5': self.visualizar_estatisticas_questoes()
+                elif escolha == '6': self.menu_eventos_simulado()
+                elif escolha == '7': self.exportar_relatorios_turma()
+                elif escolha == '8': self.mostrar_painel_turma()
+                elif escolha == '9': break # Linha 255 (Condensada)
                 else: print("\nOpção inválida. Tente novamente."); input("Pressione Enter para continuar...") # Linha 256 (Condensada)
                 # Linha 257 (Removida)
                 # Linha 258 (Removida)
@@ -233,6 +428,10 @@ class SistemaEstudoENEM:
         }
 
         self.usuarios.append(novo_usuario)
+        self.ordinais_usuarios[email] = len(self.usuarios) - 1
+        self.ranking.atualizar(email, 0)
+        self.placares_turma.carregar(email, escola, serie, 0, {})
+        self.atividade.iniciar(email, datetime.now().date())
         self.salvar_dados()
 
         # Onboarding
@@ -296,13 +495,13 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             input("Pressione Enter para continuar...")
             return
 
-        # Seleciona 10 questões aleatórias (ou o máximo disponível)
-        questoes_teste = random.sample(questoes, min(10, len(questoes))) # Linha 363
-        acertos = 0
-        desempenho_areas = {}
+        sessao = self.motor.iniciar_diagnostico(usuario['email'])
 
-        for i, questao in enumerate(questoes_teste, 1):
-            self.mostrar_titulo(f"QUESTÃO {i}/{len(questoes_teste)}") # Ajustado total de questões
+        while True:
+            questao = self.motor.proxima_questao(sessao)
+            if questao is None:
+                break
+            self.mostrar_titulo(f"QUESTÃO {questao['numero']}/{questao['total']}") # Ajustado total de questões
 
             print(f"\n{questao['enunciado']}") # Mudado de 'pergunta' para 'enunciado'
             for idx, opcao in enumerate(questao['alternativas']): # Mudado de 'opcoes' para 'alternativas'
@@ -313,63 +512,24 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
                 print("Opção inválida. Digite 1, 2, 3, 4 ou 5.")
                 resposta = input("Sua resposta (1-5): ").strip()
 
-            # Converte a resposta do usuário para A, B, C, D, E para comparação
-            resposta_convertida = chr(65 + int(resposta) - 1)
-
-            if resposta_convertida == questao['resposta_correta']: # Mudado para 'resposta_correta'
+            correcao = self.motor.responder(sessao, resposta)
+            if correcao['correta']:
                 print("\n✅ Correto!")
-                acertos += 1
-                # Atualiza desempenho por área
-                if questao['area'] not in desempenho_areas:
-                    desempenho_areas[questao['area']] = {'acertos': 0, 'total': 0}
-                desempenho_areas[questao['area']]['acertos'] += 1
             else:
-                print(f"\n❌ Incorreto! A resposta correta era: {questao['resposta_correta']}")
-
-            # Atualiza total por área
-            if questao['area'] not in desempenho_areas:
-                desempenho_areas[questao['area']] = {'acertos': 0, 'total': 0}
-            desempenho_areas[questao['area']]['total'] += 1
+                print(f"\n❌ Incorreto! A resposta correta era: {correcao['resposta_correta']}")
 
             input("\nPressione Enter para próxima questão...")
 
         # Salva o resultado do teste diagnóstico
+        resultado, novidades = self.motor.finalizar(sessao)
         email = usuario['email']
-        if email not in self.desempenho:
-            self.desempenho[email] = {}
-
-        percentual = (acertos / len(questoes_teste)) * 100 # Ajustado para o número real de questões no teste
-
-        if percentual >= 70:
-            nivel = "Avançado"
-        elif percentual >= 50:
-            nivel = "Intermediário"
-        else:
-            nivel = "Básico"
-
-        self.desempenho[email]['diagnostico_inicial'] = {
-            "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "pontuacao": acertos,
-            "total_questoes": len(questoes_teste), # Ajustado
-            "percentual": percentual,
-            "nivel": nivel,
-            "desempenho_areas": desempenho_areas
-        }
-
-        # Atualiza gamificação
-        if 'gamificacao' not in self.desempenho[email]:
-            self.desempenho[email]['gamificacao'] = {'pontos': 0, 'conquistas': []}
-
-        # Conquista por completar teste diagnóstico
-        self.adicionar_conquista(email, "diagnostico")
-
-        self.salvar_dados()
 
         # Mostra resultado
         self.mostrar_resultado_diagnostico(email)
+        self.mostrar_novidades(novidades)
 
         # Cria plano de estudo inicial
-        self.gerar_plano_estudo(usuario, nivel, desempenho_areas)
+        self.gerar_plano_estudo(usuario, resultado['nivel'], resultado['desempenho_areas'])
 
         input("\nPressione Enter para ver seu plano de estudos...")
 
@@ -398,8 +558,17 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
 
     def gerar_plano_estudo(self, usuario, nivel, desempenho_areas):
         """Gera um plano de estudo personalizado com base no desempenho"""
-        email = usuario['email']
+        plano = self.montar_plano_estudo(nivel, desempenho_areas)
 
+        self.planos[usuario['email']] = plano
+        self.cache_derivados.invalidar(usuario['email'])
+        self.salvar_dados()
+
+        print("\n✅ Seu plano de estudo personalizado foi gerado com sucesso!")
+        return plano
+
+    def montar_plano_estudo(self, nivel, desempenho_areas):
+        """Monta o plano de estudo (sem gravar nem exibir) a partir do nível e do desempenho por área"""
         # Define intensidade baseada no nível
         if nivel == "Avançado":
             horas_semana = 10
@@ -449,11 +618,6 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             "ultima_atualizacao": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "desempenho_inicial": desempenho_areas
         }
-
-        self.planos[email] = plano
-        self.salvar_dados()
-
-        print("\n✅ Seu plano de estudo personalizado foi gerado com sucesso!")
         return plano
 
     def gerar_objetivos_estudo(self, area, nivel):
@@ -492,48 +656,128 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
         ]
         return recursos
 
-    def adicionar_conquista(self, email, tipo_conquista, area=None):
-        """Adiciona uma conquista ao usuário se ele ainda não a possui"""
-        conquista = None
-
-        # Busca a conquista pelo tipo e área (se aplicável)
-        for c in self.conquistas['conquistas']:
-            if c['tipo'] == tipo_conquista:
-                if tipo_conquista == "area":
-                    if c['area'] == area:
-                        conquista = c
-                        break
-                else:
-                    conquista = c
-                    break
-
-        if conquista and conquista['nome'] not in [c['nome'] for c in self.desempenho[email]['gamificacao']['conquistas']]:
-            self.desempenho[email]['gamificacao']['pontos'] += conquista['pontos']
-            self.desempenho[email]['gamificacao']['conquistas'].append({
+    def inscrever_consumidores(self):
+        """Liga os consumidores aos eventos do barramento (a ordem de inscrição é a ordem de execução)"""
+        for tipo_evento in (SimuladoConcluido, DiagnosticoConcluido, SemanaConcluida, LoginRealizado):
+            # Todo evento muda dados do aluno: as telas já montadas para ele deixam de valer
+            self.barramento.inscrever(tipo_evento, lambda evento: self.cache_derivados.invalidar(evento.email))
+        self.barramento.inscrever(SimuladoConcluido, self.registrar_respostas_questoes)
+        for tipo_evento in (SimuladoConcluido, DiagnosticoConcluido):
+            self.barramento.inscrever(tipo_evento, self.atualizar_desempenho_aluno)
+            self.barramento.inscrever(tipo_evento, lambda evento: self.registrar_percentis(evento.email, evento.resultado))
+            self.barramento.inscrever(tipo_evento, lambda evento: self.registrar_cubo(evento.email, evento.resultado))
+        self.barramento.inscrever(SimuladoConcluido, self.conquistas_simulado)
+        self.barramento.inscrever(DiagnosticoConcluido, lambda evento: self.adicionar_conquista(evento.email, "diagnostico"))
+        self.barramento.inscrever(SemanaConcluida, lambda evento: self.adicionar_conquista(
+            evento.email, "plano", valor=sum(1 for s in evento.plano['metas_semanais'] if s.get('concluida', False))))
+        self.barramento.inscrever(LoginRealizado, lambda evento: self.atividade.registrar(evento.email, evento.momento.date()))
+        self.barramento.inscrever(LoginRealizado, lambda evento: self.adicionar_conquista(
+            evento.email, "frequencia", valor=self.atividade.sequencia_atual(evento.email, evento.momento.date())))
+
+    def registrar_respostas_questoes(self, evento):
+        """Atualiza as estatísticas de cada questão respondida e acrescenta as respostas ao registro"""
+        ordinal_usuario = self.ordinais_usuarios[evento.email]
+        escore = evento.resultado['percentual'] / 100
+        for questao in evento.questoes:
+            if questao['id'] in evento.respostas:
+                alternativa = int(evento.respostas[questao['id']]) - 1
+                correta = chr(65 + alternativa) == questao['resposta_correta']
+                tempo_ms = evento.tempos[questao['id']]['resposta_ms']
+                self.estatisticas_questoes.registrar_resposta(questao['id'], alternativa, correta, tempo_ms / 1000, escore)
+                self.registro_respostas.registrar(
+                    ordinal_usuario, self.estatisticas_questoes.ordinal(questao['id']), alternativa,
+                    correta, tempo_ms, evento.momentos[questao['id']] * 1000)
+                self.tempos_resposta.registrar(questao['area'], questao['id'], tempo_ms)
+
+    def atualizar_desempenho_aluno(self, evento):
+        """Soma o resultado aos agregados por área/subárea e à série temporal do aluno"""
+        desempenho_aluno = self.desempenho[evento.email]
+        atualizar_agregados(desempenho_aluno, evento.resultado, desempenho_subareas(evento.questoes, evento.respostas))
+        atualizar_serie(desempenho_aluno, evento.resultado)
+
+    def conquistas_simulado(self, evento):
+        """Eventos de conquista de um simulado: quantidade de simulados e percentual em cada área"""
+        self.adicionar_conquista(evento.email, "simulado", valor=len(self.desempenho[evento.email]['simulados']))
+        for area, dados in evento.resultado['desempenho_areas'].items():
+            if dados['total'] > 0:
+                self.adicionar_conquista(evento.email, "area", area, valor=dados['acertos'] / dados['total'] * 100)
+
+    def registrar_percentis(self, email, resultado):
+        """Atualiza os percentis (geral, por área e da turma) com o resultado mais recente do aluno"""
+        usuario = self.usuarios[self.ordinais_usuarios[email]]
+        self.percentis.registrar(email, usuario.get('escola'), usuario.get('serie'), resultado)
+
+    def registrar_cubo(self, email, resultado):
+        """Soma o resultado do aluno ao cubo escola × série × área × semana"""
+        usuario = self.usuarios[self.ordinais_usuarios[email]]
+        self.cubo.registrar(email, usuario.get('escola'), usuario.get('serie'), resultado)
+
+    def pontos_usuario(self, email):
+        """Pontos atuais do usuário (0 se ainda não tiver gamificação)"""
+        return self.desempenho.get(email, {}).get('gamificacao', {}).get('pontos', 0)
+
+    def alterar_pontos(self, email, variacao, motivo):
+        """Lança `variacao` no livro de pontos do usuário e atualiza o saldo e os rankings.
+
+        Gastos (variação negativa) só são lançados se o saldo do livro permitir; devolve False quando não há saldo.
+        """
+        if variacao < 0:
+            if not self.livro_pontos.debitar(email, -variacao, motivo):
+                return False
+        else:
+            self.livro_pontos.creditar(email, variacao, motivo)
+        self.aplicar_saldo(email, variacao)
+        return True
+
+    def aplicar_saldo(self, email, variacao):
+        """Leva o saldo do livro para o desempenho, o ranking e os placares da turma, numa única trava.
+
+        Sem a trava, duas mudanças simultâneas do mesmo aluno liam o mesmo placar antigo e as duas
+        tentavam tirá-lo do ranking. `variacao` é a mudança já lançada (só ganhos contam nos períodos).
+        """
+        usuario = self.usuarios[self.ordinais_usuarios[email]]
+        with self.trava_pontos:
+            gamificacao = self.desempenho[email]['gamificacao']
+            gamificacao['pontos'] = self.livro_pontos.saldo(email)
+            self.cache_derivados.invalidar(email)
+            self.ranking.atualizar(email, gamificacao['pontos'])
+            self.placares_turma.registrar(email, usuario.get('escola'), usuario.get('serie'), gamificacao['pontos'],
+                                          gamificacao.setdefault('pontos_periodos', {}), variacao, datetime.now())
+
+    def adicionar_conquista(self, email, tipo_conquista, area=None, valor=None):
+        """Informa um evento de conquista e desbloqueia as conquistas do catálogo que ele satisfaz.
+
+        `valor` é comparado com o mínimo de cada regra (quantidade de simulados, percentual na área,
+        dias seguidos...); sem valor, a conquista do tipo é desbloqueada direto.
+        """
+        conquistas_usuario = self.desempenho[email]['gamificacao']['conquistas']
+        for conquista in self.regras_conquistas.avaliar(email, conquistas_usuario, tipo_conquista, area, valor):
+            self.alterar_pontos(email, conquista['pontos'], f"conquista: {conquista['nome']}")
+            conquistas_usuario.append({
                 "nome": conquista['nome'],
                 "descricao": conquista['descricao'],
                 "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             })
 
-            print(f"\n🏆 Conquista desbloqueada: {conquista['nome']} (+{conquista['pontos']} pontos)")
+            self.novidades.setdefault(email, []).append(
+                f"🏆 Conquista desbloqueada: {conquista['nome']} (+{conquista['pontos']} pontos)")
             self.verificar_nivel(email)
 
     def verificar_nivel(self, email):
         """Verifica se o usuário subiu de nível"""
         pontos = self.desempenho[email]['gamificacao']['pontos']
-        nivel_atual = next((u['nivel'] for u in self.usuarios if u['email'] == email), 1)
-
-        for nivel in sorted(self.conquistas['niveis'], key=lambda x: x['nivel'], reverse=True):
-            if pontos >= nivel['pontos_necessarios'] and nivel['nivel'] > nivel_atual:
-                # Atualiza nível do usuário
-                for usuario in self.usuarios:
-                    if usuario['email'] == email:
-                        usuario['nivel'] = nivel['nivel']
-                        break
-
-                print(f"\n🎉 Parabéns! Você subiu para o nível {nivel['nivel']}!")
-                self.salvar_dados()
-                break
+        usuario = self.usuarios[self.ordinais_usuarios[email]]
+        nivel = self.regras_conquistas.nivel_para(pontos)
+
+        if nivel > usuario['nivel']:
+            # Atualiza nível do usuário
+            usuario['nivel'] = nivel
+            self.novidades.setdefault(email, []).append(f"🎉 Parabéns! Você subiu para o nível {nivel}!")
+
+    def mostrar_novidades(self, novidades):
+        """Mostra as conquistas e os níveis desbloqueados"""
+        for novidade in novidades:
+            print(f"\n{novidade}")
 
     def verificar_conquistas(self):
         """Verifica se o usuário atingiu alguma conquista"""
@@ -542,23 +786,13 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
 
         email = self.usuario_atual['email']
 
-        # Verifica conquistas de frequência
-        if 'ultimo_acesso' in self.desempenho.get(email, {}):
-            ultimo_acesso = datetime.strptime(self.desempenho[email]['ultimo_acesso'], "%Y-%m-%d %H:%M:%S")
-            if (datetime.now() - ultimo_acesso).days == 1:
-                # Usuário acessou no dia seguinte
-                if 'dias_consecutivos' not in self.desempenho[email]:
-                    self.desempenho[email]['dias_consecutivos'] = 1
-                else:
-                    self.desempenho[email]['dias_consecutivos'] += 1
-
-                if self.desempenho[email]['dias_consecutivos'] >= 7:
-                    self.adicionar_conquista(email, "frequencia")
-            else:
-                self.desempenho[email]['dias_consecutivos'] = 1
-
-        self.desempenho[email]['ultimo_acesso'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.salvar_dados()
+        # O dia de estudo vai para o bitmap de atividade (gravado com os registros pendentes); os dados
+        # completos só são gravados se o login desbloquear alguma conquista
+        conquistas_antes = len(self.desempenho[email]['gamificacao']['conquistas'])
+        self.barramento.publicar(LoginRealizado(email, datetime.now()), gravar=False)
+        self.mostrar_novidades(self.novidades.pop(email, []))
+        if len(self.desempenho[email]['gamificacao']['conquistas']) > conquistas_antes:
+            self.salvar_dados()
 
     def fazer_login(self):
         """Realiza o processo de login"""
@@ -618,6 +852,7 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             elif opcao == "6":
                 self.revisao_final_enem()
             elif opcao == "7":
+                self.gravar_registros_pendentes()
                 self.usuario_atual = None
                 print("\nVocê saiu da sua conta.")
                 break
@@ -744,10 +979,8 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
                 semana['concluida'] = True
                 plano['progresso'] = (sum(1 for s in plano['metas_semanais'] if s.get('concluida', False)) / plano['duracao_semanas']) * 100
                 plano['ultima_atualizacao'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                self.salvar_dados()
-
-                # Verifica conquista de semana concluída (linha otimizada)
-                self.adicionar_conquista(email, "plano") # Linha 865
+                self.barramento.publicar(SemanaConcluida(email, plano, semana))
+                self.mostrar_novidades(self.novidades.pop(email, []))
 
                 print("\n✅ Semana marcada como concluída com sucesso!")
             else:
@@ -776,6 +1009,31 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             print("-" * 30) # Linha 893
         input("\nPressione Enter para voltar...") # Linha 894
 
+    def visualizar_estatisticas_questoes(self):
+        """Exibe dificuldade, discriminação e popularidade das alternativas de cada questão"""
+        self.mostrar_titulo("ESTATÍSTICAS DAS QUESTÕES")
+        questoes_disponiveis = self.simulados.get('questoes', [])
+        if not questoes_disponiveis:
+            print("Nenhuma questão cadastrada no banco.")
+            input("\nPressione Enter para continuar...")
+            return
+
+        for questao in questoes_disponiveis:
+            resumo = self.estatisticas_questoes.resumo(questao['id'])
+            print(f"\nID: {questao['id']} | Área: {questao['area']} | Nível: {questao['nivel']}")
+            if not resumo['tentativas']:
+                print("  Ainda não respondida.")
+                continue
+
+            discriminacao = resumo['discriminacao']
+            print(f"  Respostas: {resumo['tentativas']} | Dificuldade (p): {resumo['dificuldade']:.2f} | "
+                  f"Discriminação: {f'{discriminacao:+.2f}' if discriminacao is not None else '-'}")
+            print(f"  Tempo médio: {resumo['tempo_medio']:.1f}s (desvio {resumo['tempo_desvio']:.1f}s)")
+            alternativas = "  ".join(f"{chr(65+i)}: {p*100:.0f}%" for i, p in enumerate(resumo['alternativas']))
+            print(f"  Escolhas: {alternativas} (correta: {questao['resposta_correta']})")
+
+        input("\nPressione Enter para voltar...")
+
     def atualizar_plano_estudo(self):
         """Permite atualizar o plano de estudos"""
         email = self.usuario_atual['email']
@@ -831,6 +1089,8 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
                         "enunciado": enunciado, "alternativas": alternativas, # Linha 949
                         "resposta_correta": resposta_correta} # Linha 950
         self.simulados['questoes'].append(nova_questao) # Linha 951
+        self._indice_questoes = None
+        self._indice_areas = None
         self.salvar_dados() # Linha 952
         print("\nQuestão adicionada com sucesso!") # Linha 953
         input("Pressione Enter para continuar...") # Linha 954
@@ -874,6 +1134,7 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
 
         plano['horas_semanais'] = nova_carga
         plano['ultima_atualizacao'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.cache_derivados.invalidar(email)
         self.salvar_dados()
 
         print("\n✅ Carga horária atualizada com sucesso!")
@@ -914,7 +1175,9 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             print("2. Visualizar Banco de Questões") # Agora mostra todas as questões
             print("3. Simulados por Área")
             print("4. Simulado Completo (ENEM)")
-            print("5. Voltar")
+            print("5. Simulado Personalizado (Foco nas Dificuldades)")
+            print("6. Simulado do Dia (Evento da Escola)")
+            print("7. Voltar")
 
             opcao = input("\nEscolha uma opção: ").strip()
 
@@ -927,6 +1190,10 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             elif opcao == "4":
                 self.realizar_simulado_completo()
             elif opcao == "5":
+                self.realizar_simulado_personalizado()
+            elif opcao == "6":
+                self.realizar_simulado_evento()
+            elif opcao == "7":
                 break
             else:
                 print("\nOpção inválida. Tente novamente.")
@@ -1022,9 +1289,12 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             input("Pressione Enter para voltar...")
             return
 
-        # Seleciona um número de questões para o simulado completo
+        # Monta a prova com cotas por área e nível e curva de informação próxima da de uma prova ENEM.
+        # A semente sai do `random` global e a busca é limitada por iterações (não pelo relógio), então a
+        # mesma sessão reproduzida monta a mesma prova
         num_to_sample = min(simulado['questoes'], len(all_available_questions)) # Linha 695
-        simulado['questoes_lista'] = random.sample(all_available_questions, num_to_sample) # Linha 696
+        simulado['questoes_lista'] = montar_formas(all_available_questions, 1, num_to_sample,
+                                                   semente=random.getrandbits(64))[0]
 
         if not simulado['questoes_lista']: # Linha 698
             print("Não há questões suficientes para gerar o simulado.") # Linha 699
@@ -1043,99 +1313,198 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
         if confirmacao == 's':
             self.executar_simulado("ENEM Completo", simulado)
 
-    def executar_simulado(self, area, simulado):
-        """Executa um simulado e salva os resultados com cronômetro."""
+    def realizar_simulado_personalizado(self):
+        """Realiza um simulado com mais questões das áreas em que o aluno tem errado mais recentemente"""
+        self.mostrar_titulo("SIMULADO PERSONALIZADO")
+
+        questoes_area = self.questoes_por_area()
+        if not questoes_area:
+            print("Não há questões cadastradas para gerar o simulado.")
+            input("\nPressione Enter para voltar...")
+            return
+
+        desempenho_aluno = self.desempenho.get(self.usuario_atual['email'], {})
+        pesos = pesos_areas(desempenho_aluno, list(questoes_area))
+        total_pesos = sum(pesos.values())
+        print("Distribuição esperada das questões (mais peso onde você tem errado):\n")
+        for area, peso in sorted(pesos.items(), key=lambda x: x[1], reverse=True):
+            print(f"- {area}: {peso / total_pesos * 100:.0f}%")
+
+        total_banco = sum(len(q) for q in questoes_area.values())
+        num_questoes = self.obter_numero(f"\nQuantas questões você deseja? (Máx: {min(45, total_banco)}): ", 1, min(45, total_banco))
+        duracao_min = self.obter_numero(f"Duração do simulado em minutos (Mín: 1, Máx: {num_questoes*5}): ", 1, num_questoes*5)
+
+        simulado = {
+            "titulo": "Simulado Personalizado",
+            "questoes": num_questoes,
+            "duracao": duracao_min,
+            "dificuldade": "Variada",
+            "questoes_lista": sortear_questoes(questoes_area, pesos, num_questoes)
+        }
+
+        confirmacao = input("\nIniciar simulado agora? (S/N): ").strip().lower()
+        if confirmacao == 's':
+            self.executar_simulado("Personalizado", simulado)
+
+    def realizar_simulado_evento(self):
+        """Realiza a forma pré-gerada de um evento de simulado atribuída ao aluno"""
+        self.mostrar_titulo("SIMULADO DO DIA")
+
+        codigo = input("Código do evento: ").strip().upper()
+        if not codigo or not self.eventos.existe(codigo):
+            print("\nEvento não encontrado.")
+            input("Pressione Enter para voltar...")
+            return
+
+        email = self.usuario_atual['email']
+        if self.eventos.participou(codigo, email):
+            print("\nVocê já fez o simulado deste evento.")
+            input("Pressione Enter para voltar...")
+            return
+        numero_forma, questoes = self.eventos.forma_do_aluno(codigo, email, self.questoes_por_id())
+        evento = self.eventos.carregar_evento(codigo, self.questoes_por_id())
+        if not questoes:
+            print("\nAs questões deste evento não estão mais disponíveis.")
+            input("Pressione Enter para voltar...")
+            return
+
+        simulado = {
+            "titulo": evento['titulo'],
+            "questoes": len(questoes),
+            "duracao": evento['duracao'],
+            "dificuldade": "Variada",
+            "questoes_lista": questoes
+        }
+
+        print(f"\n{evento['titulo']} (forma {numero_forma + 1})")
+        print(f"- {len(questoes)} questões")
+        print(f"- Duração: {evento['duracao']} minutos")
+
+        confirmacao = input("\nIniciar simulado agora? (S/N): ").strip().lower()
+        if confirmacao == 's':
+            # A inscrição vem antes da primeira questão: quem abandona a prova no meio não pode refazê-la
+            if not self.eventos.inscrever(codigo, email):
+                print("\nVocê já fez o simulado deste evento.")
+                input("Pressione Enter para voltar...")
+                return
+            self.executar_simulado(f"Evento {codigo}", simulado, evento=(codigo, numero_forma))
+
+    def executar_simulado(self, area, simulado, evento=None):
+        """Executa um simulado e salva os resultados com cronômetro.
+
+        Em um evento (`evento` = (código, forma)) o resultado vai para o gravador em lote do evento e só
+        entra no histórico do aluno quando o administrador consolidar o evento.
+        """
         email = self.usuario_atual['email']
-        questoes = simulado['questoes_lista']
-        total_questoes_simulado = len(questoes)
-        acertos = 0
-        desempenho_areas = defaultdict(lambda: {'acertos': 0, 'total': 0})
-        respostas_usuario = {} # Inicializa o dicionário de respostas
 
         self.mostrar_titulo(f"SIMULADO: {simulado['titulo']}")
         print(f"Área: {area} | Duração: {simulado['duracao']} minutos\n")
 
         input("Pressione Enter para começar...")
 
-        inicio = datetime.now()
+        sessao = self.motor.iniciar_simulado(email, area, simulado)
+        tempo_esgotado = False
 
-        for i, questao in enumerate(questoes, 1):
-            tempo_decorrido_seg = (datetime.now() - inicio).total_seconds()
-            tempo_restante_seg = simulado['duracao'] * 60 - tempo_decorrido_seg
-
-            if tempo_restante_seg <= 0:
-                self.mostrar_titulo("TEMPO ESGOTADO!")
-                print("\nSeu tempo para o simulado acabou.")
-                break # Sai do loop do simulado
+        while not tempo_esgotado:
+            questao = self.motor.proxima_questao(sessao)
+            if questao is None:
+                tempo_esgotado = self.motor.tempo_esgotado(sessao)
+                break
+            numero, total, prazo_ns = questao['numero'], questao['total'], questao['prazo_ns']
 
-            min_restantes = int(tempo_restante_seg // 60)
-            seg_restantes = int(tempo_restante_seg % 60)
+            self.mostrar_titulo(self.titulo_questao(numero, total, questao['tempo_restante_seg']))
+            corpo = "\n".join([self.mensagem_ritmo(questao['decorrido_ns'], numero - 1), "", questao['enunciado']] +
+                              [f"{idx+1}. {opcao}" for idx, opcao in enumerate(questao['alternativas'])])
+            print(corpo)
 
-            self.mostrar_titulo(f"Questão {i}/{total_questoes_simulado} | Tempo Restante: {min_restantes:02d}:{seg_restantes:02d}")
+            # Redesenha apenas a linha do título a cada segundo. `distancia` é quantas linhas o título está
+            # acima do cursor (moldura + corpo da questão + o que for impresso depois)
+            distancia = [3 + linhas_ocupadas(corpo)]
 
-            print(f"\n{questao['enunciado']}")
-            for idx, opcao in enumerate(questao['alternativas']):
-                print(f"{idx+1}. {opcao}")
+            def atualizar_cronometro(restante_seg, numero=numero, total=total, distancia=distancia):
+                reescrever_linha(distancia[0], self.titulo_questao(numero, total, restante_seg).center(50))
 
             while True:
-                resposta = input("\nSua resposta (1-5): ").strip().upper()
+                distancia[0] += 1  # a linha em branco antes do pedido de resposta
+                resposta = ler_com_prazo("\nSua resposta (1-5): ", prazo_ns, atualizar_cronometro)
+                distancia[0] += 1  # o Enter do aluno
+                if resposta is None:
+                    tempo_esgotado = True
+                    break
                 if resposta in ['1', '2', '3', '4', '5']:
-                    respostas_usuario[questao['id']] = resposta
-                    desempenho_areas[questao['area']]['total'] += 1
-                    resposta_convertida = chr(65 + int(resposta) - 1)
-                    if resposta_convertida == questao['resposta_correta']:
-                        acertos += 1
-                        desempenho_areas[questao['area']]['acertos'] += 1
+                    correcao = self.motor.responder(sessao, resposta)
+                    if correcao is None:
+                        tempo_esgotado = True
+                    elif correcao['correta']:
                         print("✅ Correto!")
                     else:
-                        print(f"❌ Incorreto! A resposta correta era: {questao['resposta_correta']}")
-                    input("Pressione Enter para a próxima questão...")
+                        print(f"❌ Incorreto! A resposta correta era: {correcao['resposta_correta']}")
+                    distancia[0] += 1
+                    if not tempo_esgotado and ler_com_prazo("Pressione Enter para a próxima questão...",
+                                                            prazo_ns, atualizar_cronometro) is None:
+                        tempo_esgotado = True
                     break
                 else:
                     print("Resposta inválida. Por favor, digite 1, 2, 3, 4 ou 5.")
-
-        tempo_gasto = (datetime.now() - inicio).total_seconds() / 60
-        total_questoes_respondidas = len(respostas_usuario) # Ajusta total de questões para as respondidas
-        percentual = (acertos / total_questoes_respondidas) * 100 if total_questoes_respondidas > 0 else 0
-
-        # Salva o resultado
-        resultado = {
-            "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "area": area,
-            "titulo": simulado['titulo'],
-            "pontuacao": acertos,
-            "total_questoes": total_questoes_respondidas, # Usa o número de respondidas
-            "percentual": percentual,
-            "tempo_gasto": tempo_gasto,
-            "desempenho_areas": dict(desempenho_areas)
-        }
-
-        if 'simulados' not in self.desempenho[email]:
-            self.desempenho[email]['simulados'] = []
-        self.desempenho[email]['simulados'].append(resultado)
-
-        # Adiciona conquista de primeiro simulado
-        if len(self.desempenho[email]['simulados']) == 1:
-            self.adicionar_conquista(email, "simulado")
-
-        # Verifica conquistas por área
-        for area, dados in desempenho_areas.items():
-            if dados['total'] > 0 and (dados['acertos'] / dados['total']) >= 0.8:
-                self.adicionar_conquista(email, "area", area)
-
-        self.salvar_dados()
+                    distancia[0] += 1
+
+        if tempo_esgotado:
+            # Entrega automática: as questões respondidas até aqui são corrigidas normalmente
+            self.mostrar_titulo("TEMPO ESGOTADO!")
+            print("\nSeu tempo para o simulado acabou. Suas respostas foram entregues automaticamente.")
+            input("Pressione Enter para ver o resultado...")
+
+        if evento:
+            codigo, numero_forma = evento
+            concluido = self.motor.finalizar_sem_registrar(sessao)
+            resultado = concluido.resultado
+            self.eventos.registrar_resultado(codigo, concluido, numero_forma)
+            novidades = []
+        else:
+            resultado, novidades = self.motor.finalizar(sessao)
 
         # Mostra resultado
         self.mostrar_resultado_simulado(resultado)
+        self.mostrar_novidades(novidades)
 
         input("\nPressione Enter para voltar...")
 
+    def titulo_questao(self, numero, total, restante_seg):
+        """Título da tela de uma questão com o tempo restante"""
+        restante_seg = max(0, restante_seg)
+        return f"Questão {numero}/{total} | Tempo Restante: {int(restante_seg // 60):02d}:{int(restante_seg % 60):02d}"
+
+    def mensagem_ritmo(self, decorrido_ns, questoes_respondidas):
+        """Compara o tempo decorrido com o ritmo do ENEM para o número de questões respondidas"""
+        diferenca_min = (decorrido_ns / 1e9 - questoes_respondidas * RITMO_ENEM_SEG) / 60
+        if diferenca_min >= 1:
+            return f"⏳ Você está {diferenca_min:.0f} min atrás do ritmo do ENEM"
+        if diferenca_min <= -1:
+            return f"🚀 Você está {-diferenca_min:.0f} min à frente do ritmo do ENEM"
+        return "✅ Você está no ritmo do ENEM"
+
     def mostrar_resultado_simulado(self, resultado):
         """Mostra o resultado de um simulado"""
         self.mostrar_titulo("RESULTADO DO SIMULADO")
 
         print(f"\n📊 Pontuação: {resultado['pontuacao']}/{resultado['total_questoes']} ({resultado['percentual']:.1f}%)")
         print(f"⏱️ Tempo gasto: {resultado['tempo_gasto']:.1f} minutos")
+        print(self.mensagem_ritmo(resultado['tempo_gasto'] * 60e9, resultado['total_questoes']))
+
+        # Tempo de resposta por área comparado com os demais alunos
+        tempos_por_area = defaultdict(list)
+        for tempos in resultado.get('tempos_questoes', {}).values():
+            tempos_por_area[tempos['area']].append(tempos['resposta_ms'])
+        if tempos_por_area:
+            print("\n⏱️ Tempo por questão:")
+            for area, tempos in tempos_por_area.items():
+                tempos.sort()
+                linha = f"  {area}: sua mediana {tempos[len(tempos) // 2] / 1000:.0f}s"
+                percentis = self.tempos_resposta.percentis(f"area:{area}")
+                if percentis:
+                    p50, p90, p99 = (p / 1000 for p in percentis)
+                    linha += f" | geral p50 {p50:.0f}s, p90 {p90:.0f}s, p99 {p99:.0f}s"
+                print(linha)
 
         print("\n🔍 Desempenho por área:")
         for area, dados in resultado['desempenho_areas'].items():
@@ -1150,8 +1519,12 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
 
         # Compara com desempenho anterior
         email = self.usuario_atual['email']
-        if 'simulados' in self.desempenho[email] and len(self.desempenho[email]['simulados']) > 1:
-            anterior = self.desempenho[email]['simulados'][-2]
+        # Resultados de evento só entram no histórico na consolidação: o anterior é então o último
+        anteriores = self.desempenho.get(email, {}).get('simulados', [])
+        if anteriores and anteriores[-1] is resultado:
+            anteriores = anteriores[:-1]
+        if anteriores:
+            anterior = anteriores[-1]
             diferenca = resultado['percentual'] - anterior['percentual']
 
             print("\n📈 Comparação com o simulado anterior:")
@@ -1251,29 +1624,25 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             input("Pressione Enter para voltar...")
             return
 
-        # Simula um gráfico simples no console
+        # Simula um gráfico simples no console, com a série já agrupada por dia/semana e reduzida
         diag = self.desempenho[email]['diagnostico_inicial']
-        simulados = self.desempenho[email]['simulados']
+        pontos = pontos_grafico(obter_serie(self.desempenho[email]), PONTOS_GRAFICO_EVOLUCAO)
 
-        print("\n📈 Progresso ao longo do tempo:\n")
-
-        # Linha do tempo
-        datas = [diag['data']] + [s['data'] for s in simulados]
-        percentuais = [diag['percentual']] + [s['percentual'] for s in simulados]
+        print(f"\n📈 Progresso ao longo do tempo (diagnóstico: {diag['percentual']:.1f}%):\n")
 
+        percentuais = [perc for _, perc in pontos]
         max_perc = max(percentuais)
         min_perc = min(percentuais)
         escala = 50  # Número de caracteres para a escala
 
         print("Percentual (%)")
-        for i, (data, perc) in enumerate(zip(datas, percentuais)):
+        for data, perc in pontos:
             # Normaliza para a escala
             pos = int((perc - min_perc) / (max_perc - min_perc) * escala) if max_perc > min_perc else escala
-            print(f"{data[:10]}: {' ' * pos}◉ {perc:.1f}%")
+            print(f"{data.strftime('%Y-%m-%d')}: {' ' * pos}◉ {perc:.1f}%")
 
         print("\nLegenda:")
-        print("◉ Teste diagnóstico")
-        print("◉ Simulados realizados")
+        print("◉ Média do dia (ou da semana, para históricos longos) entre diagnóstico e simulados")
 
         input("\nPressione Enter para voltar...")
 
@@ -1288,35 +1657,11 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             input("Pressione Enter para voltar...")
             return
 
-        desempenho = self.desempenho[email]['diagnostico_inicial']['desempenho_areas']
-
-        # Se houver simulados, atualiza o desempenho com os dados mais recentes
-        if 'simulados' in self.desempenho[email] and self.desempenho[email]['simulados']:
-            for simulado in self.desempenho[email]['simulados']:
-                if 'desempenho_areas' in simulado:
-                    for area, dados in simulado['desempenho_areas'].items():
-                        if area not in desempenho:
-                            desempenho[area] = {'acertos': 0, 'total': 0}
-                        desempenho[area]['acertos'] += dados['acertos']
-                        desempenho[area]['total'] += dados['total']
-
-        # Ordena áreas por desempenho
-        areas_ordenadas = sorted(desempenho.items(),
-                                key=lambda x: (x[1]['acertos']/x[1]['total']) if x[1]['total'] > 0 else 0) # Evita divisão por zero
-
-        print("\nSeus pontos fortes:")
-        for area, dados in areas_ordenadas[-3:]:  # Top 3 melhores desempenhos
-            if dados['total'] > 0: # Evita divisão por zero
-                percentual = (dados['acertos'] / dados['total']) * 100
-                if percentual >= 70:
-                    print(f"\n⭐ {area}: {percentual:.1f}% de acertos")
-
-        print("\n\nÁreas que precisam de mais atenção:")
-        for area, dados in areas_ordenadas[:3]:  # Top 3 piores desempenhos
-            if dados['total'] > 0: # Evita divisão por zero
-                percentual = (dados['acertos'] / dados['total']) * 100
-                if percentual < 50:
-                    print(f"\n⚠️ {area}: {percentual:.1f}% de acertos")
+        # Diagnóstico + todos os simulados, já somados a cada resultado gravado
+        linhas = self.cache_derivados.obter(email, "pontos_fortes_fracos", lambda: linhas_pontos_fortes_fracos(
+            obter_agregados(self.desempenho[email])))
+        for linha in linhas:
+            print(linha)
 
         input("\nPressione Enter para voltar...")
 
@@ -1329,45 +1674,34 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             input("Pressione Enter para voltar...")
             return
 
-        # Coleta dados de todos os alunos
-        dados_alunos = []
-        for usuario in self.usuarios:
-            email = usuario['email']
-            if email in self.desempenho and 'diagnostico_inicial' in self.desempenho[email]:
-                dados = {
-                    'nome': usuario['nome'],
-                    'nivel': self.desempenho[email]['diagnostico_inicial']['nivel'],
-                    'percentual': self.desempenho[email]['diagnostico_inicial']['percentual']
-                }
-
-                if 'simulados' in self.desempenho[email] and self.desempenho[email]['simulados']:
-                    dados['ultimo_simulado'] = self.desempenho[email]['simulados'][-1]['percentual']
-
-                dados_alunos.append(dados)
-
-        if len(dados_alunos) < 2:
+        # Último resultado de cada aluno (simulado ou, sem simulados, o diagnóstico), já ordenado
+        geral = self.percentis.ranking(("geral",))
+        if len(geral) < 2:
             print("\nNão há dados suficientes para comparação.")
             input("Pressione Enter para voltar...")
             return
 
-        # Ordena por desempenho no último simulado (se disponível)
-        if 'ultimo_simulado' in dados_alunos[0]:
-            dados_alunos.sort(key=lambda x: x['ultimo_simulado'], reverse=True)
-            print("\n🏆 Ranking de desempenho (último simulado):\n")
-            for i, aluno in enumerate(dados_alunos[:10], 1):  # Top 10
-                print(f"{i}. {aluno['nome']}: {aluno['ultimo_simulado']:.1f}%")
-        else:
-            # Se não houver simulados, ordena pelo diagnóstico inicial
-            dados_alunos.sort(key=lambda x: x['percentual'], reverse=True)
-            print("\n🏆 Ranking de desempenho (teste diagnóstico):\n")
-            for i, aluno in enumerate(dados_alunos[:10], 1):  # Top 10
-                print(f"{i}. {aluno['nome']}: {aluno['percentual']:.1f}%")
-
-        # Mostra posição do usuário atual
-        for pos, aluno in enumerate(dados_alunos, 1):
-            if aluno['nome'] == self.usuario_atual['nome']:
-                print(f"\nSua posição: {pos}º")
-                break
+        print("\n🏆 Ranking de desempenho (último resultado):\n")
+        for i, (email, percentual) in enumerate(geral.topo(10), 1):  # Top 10
+            print(f"{i}. {self.usuarios[self.ordinais_usuarios[email]]['nome']}: {percentual:.1f}%")
+
+        # Mostra posição do usuário atual (pelo e-mail, que é único)
+        email = self.usuario_atual['email']
+        posicao = geral.posicao(email)
+        if posicao is None:
+            input("\nPressione Enter para voltar...")
+            return
+        print(f"\nSua posição: {posicao}º de {len(geral)} (top {self.percentis.percentil_superior(('geral',), email):.0f}%)")
+
+        escola, serie = self.usuario_atual.get('escola'), self.usuario_atual.get('serie')
+        turma = ("turma", escola, serie)
+        if len(self.percentis.ranking(turma)) > 1:
+            print(f"\n🏫 Na sua turma ({escola} - {serie}) você está no top "
+                  f"{self.percentis.percentil_superior(turma, email):.0f}%")
+            for area in sorted(self.questoes_por_area()):
+                topo = self.percentis.percentil_superior(turma + (area,), email)
+                if topo is not None and len(self.percentis.ranking(turma + (area,))) > 1:
+                    print(f"- {area}: top {topo:.0f}%")
 
         input("\nPressione Enter para voltar...")
 
@@ -1382,51 +1716,12 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             input("Pressione Enter para voltar...")
             return
 
-        desempenho = self.desempenho[email]['diagnostico_inicial']['desempenho_areas']
-
-        # Se houver simulados, atualiza o desempenho com os dados mais recentes
-        if 'simulados' in self.desempenho[email] and self.desempenho[email]['simulados']:
-            for simulado in self.desempenho[email]['simulados']:
-                if 'desempenho_areas' in simulado:
-                    for area, dados in simulado['desempenho_areas'].items():
-                        if area not in desempenho:
-                            desempenho[area] = {'acertos': 0, 'total': 0}
-                        desempenho[area]['acertos'] += dados['acertos']
-                        desempenho[area]['total'] += dados['total']
-
-        # Identifica áreas com desempenho abaixo de 50%
-        areas_fracas = [area for area, dados in desempenho.items()
-                        if dados['total'] > 0 and (dados['acertos'] / dados['total']) < 0.5]
-
-        if not areas_fracas:
-            print("\nSeu desempenho está bom em todas as áreas! Continue assim!")
-            print("Sugestão: Tente desafios mais difíceis para melhorar ainda mais.")
-            input("\nPressione Enter para voltar...")
-            return
+        # Diagnóstico + todos os simulados, já somados a cada resultado gravado
+        linhas = self.cache_derivados.obter(email, "sugestoes", lambda: linhas_sugestoes(
+            obter_agregados(self.desempenho[email])))
+        for linha in linhas:
+            print(linha)
 
-        print("\nCom base no seu desempenho, sugerimos focar nas seguintes áreas:")
-        for area in areas_fracas[:3]:  # Limita a 3 áreas para não sobrecarregar
-            print(f"\n📚 {area}:")
-
-            # Sugestões específicas por área
-            if "Matemática" in area:
-                print("- Pratique exercícios básicos diariamente")
-                print("- Assista videoaulas explicativas sobre os conceitos fundamentais")
-                print("- Resolva questões de provas anteriores do ENEM")
-            elif "Linguagens" in area or "Redação" in area:
-                print("- Leia textos variados diariamente (notícias, artigos, literatura)")
-                print("- Pratique a escrita regularmente")
-                print("- Estude a estrutura da redação dissertativa-argumentativa")
-            elif "Ciências" in area:
-                print("- Crie mapas mentais para organizar os conceitos")
-                print("- Relacione os conceitos com situações do cotidiano")
-                print("- Faça resumos com suas próprias palavras")
-            elif "Humanas" in area:
-                print("- Assista documentários sobre os temas estudados")
-                print("- Relacione os eventos históricos com o contexto atual")
-                print("- Crie linhas do tempo para visualizar a sequência de eventos")
-
-        print("\n💡 Dica geral: Dedique pelo menos 1 hora por dia para revisar essas áreas!")
         input("\nPressione Enter para voltar...")
 
     def menu_gamificacao(self):
@@ -1438,20 +1733,24 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             pontos = self.desempenho.get(email, {}).get('gamificacao', {}).get('pontos', 0)
             nivel = next((u['nivel'] for u in self.usuarios if u['email'] == email), 1)
 
+            semana, mes = self.pontos_periodos(email, datetime.now()).values()
             print(f"🏅 Seus pontos: {pontos}")
+            print(f"📅 Ganhos nesta semana: {semana} | neste mês: {mes}")
+            print(f"🔥 Sequência de estudo: {self.atividade.sequencia_atual(email)} dias"
+                  f" (recorde: {self.atividade.maior_sequencia(email)})")
             print(f"🌟 Seu nível: {nivel}")
 
             # Progresso para próximo nível
-            niveis = sorted(self.conquistas['niveis'], key=lambda x: x['nivel'])
-            if nivel < len(niveis):
-                pontos_prox_nivel = niveis[nivel]['pontos_necessarios']
+            pontos_prox_nivel = self.regras_conquistas.pontos_proximo_nivel(pontos)
+            if pontos_prox_nivel:
                 print(f"\n⬜{'⬛' * int((pontos/pontos_prox_nivel)*10)}{'⬜' * (10 - int((pontos/pontos_prox_nivel)*10))}")
                 print(f"Faltam {max(0, pontos_prox_nivel - pontos)} pontos para o próximo nível")
 
             print("\n1. Minhas Conquistas")
             print("2. Ranking")
-            print("3. Recompensas")
-            print("4. Voltar")
+            print("3. Ranking da Turma")
+            print("4. Recompensas")
+            print("5. Voltar")
 
             opcao = input("\nEscolha uma opção: ").strip()
 
@@ -1460,8 +1759,10 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
             elif opcao == "2":
                 self.mostrar_ranking()
             elif opcao == "3":
-                self.mostrar_recompensas()
+                self.mostrar_ranking_turma()
             elif opcao == "4":
+                self.mostrar_recompensas()
+            elif opcao == "5":
                 break
             else:
                 print("\nOpção inválida. Tente novamente.")
@@ -1483,8 +1784,9 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
 
         # Mostra conquistas não desbloqueadas
         print("\n\nConquistas disponíveis:")
+        desbloqueadas = self.regras_conquistas.conjunto_usuario(email, conquistas_usuario)
         for conquista in self.conquistas['conquistas']:
-            if conquista['nome'] not in [c['nome'] for c in conquistas_usuario]:
+            if conquista['nome'] not in desbloqueadas:
                 print(f"\n🔒 {conquista['nome']}")
                 print(f"   {conquista['descricao']}")
 
@@ -1494,80 +1796,129 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
         """Mostra o ranking de usuários"""
         self.mostrar_titulo("RANKING DE USUÁRIOS")
 
-        # Cria lista de usuários com pontos
-        ranking = []
-        for usuario in self.usuarios:
-            email = usuario['email']
-            pontos = self.desempenho.get(email, {}).get('gamificacao', {}).get('pontos', 0)
-            ranking.append({
-                "nome": usuario['nome'],
-                "pontos": pontos,
-                "nivel": usuario['nivel']
-            })
+        # O ranking já está ordenado por pontos (decrescente) e é atualizado a cada mudança de pontos
+        print("\n🏆 TOP 10:\n")
+        for i, (email, pontos) in enumerate(self.ranking.topo(10), 1):
+            usuario = self.usuarios[self.ordinais_usuarios[email]]
+            print(f"{i}. {usuario['nome']} - {pontos} pontos (Nível {usuario['nivel']})")
 
-        # Ordena por pontos (decrescente)
-        ranking.sort(key=lambda x: x['pontos'], reverse=True)
+        # Mostra posição do usuário atual (pelo e-mail, que é único)
+        posicao = self.ranking.posicao(self.usuario_atual['email'])
+        if posicao is not None:
+            print(f"\nSua posição: {posicao}º de {len(self.ranking)}")
 
-        print("\n🏆 TOP 10:\n")
-        for i, usuario in enumerate(ranking[:10], 1):
-            print(f"{i}. {usuario['nome']} - {usuario['pontos']} pontos (Nível {usuario['nivel']})")
-
-        # Mostra posição do usuário atual
-        email_atual = self.usuario_atual['email']
-        for pos, usuario in enumerate(ranking, 1):
-            if usuario['nome'] == self.usuario_atual['nome']:
-                print(f"\nSua posição: {pos}º")
-                break
+        input("\nPressione Enter para voltar...")
+
+    def mostrar_ranking_turma(self):
+        """Mostra o ranking de pontos da turma do aluno (geral, da semana ou do mês)"""
+        self.mostrar_titulo("RANKING DA TURMA")
+
+        escola, serie = self.usuario_atual.get('escola'), self.usuario_atual.get('serie')
+        print(f"🏫 {escola} - {serie}\n")
+        print("1. Geral")
+        print("2. Esta semana")
+        print("3. Este mês")
+
+        tipos = {"1": ("total", "GERAL"), "2": ("semana", "DA SEMANA"), "3": ("mes", "DO MÊS")}
+        opcao = input("\nEscolha o período: ").strip()
+        if opcao not in tipos:
+            print("\nOpção inválida.")
+            input("Pressione Enter para continuar...")
+            return
+
+        tipo, nome_periodo = tipos[opcao]
+        ranking = self.placares_turma.ranking(escola, serie, tipo, datetime.now())
+        if not len(ranking):
+            print("\nNinguém da turma ganhou pontos neste período ainda.")
+            input("\nPressione Enter para voltar...")
+            return
+
+        print(f"\n🏆 TOP 10 {nome_periodo}:\n")
+        for i, (email, pontos) in enumerate(ranking.topo(10), 1):
+            print(f"{i}. {self.usuarios[self.ordinais_usuarios[email]]['nome']} - {pontos} pontos")
+
+        posicao = ranking.posicao(self.usuario_atual['email'])
+        if posicao is not None:
+            print(f"\nSua posição: {posicao}º de {len(ranking)}")
+        else:
+            print("\nVocê ainda não ganhou pontos neste período.")
 
         input("\nPressione Enter para voltar...")
 
     def mostrar_recompensas(self):
-        """Mostra as recompensas disponíveis"""
+        """Mostra as recompensas do catálogo com o estoque atual"""
         self.mostrar_titulo("RECOMPENSAS")
 
         email = self.usuario_atual['email']
         pontos = self.desempenho.get(email, {}).get('gamificacao', {}).get('pontos', 0)
 
+        print(f"🏅 Seus pontos: {pontos}")
         print("\n🎁 Recompensas disponíveis:\n")
-        print("1. Simulado Premium - 100 pontos")
-        print("2. Material Exclusivo - 200 pontos")
-        print("3. Aula com Tutor - 500 pontos")
-        print("4. Certificado de Excelência - 1000 pontos")
+        catalogo = self.recompensas.catalogo
+        for i, recompensa in enumerate(catalogo, 1):
+            estoque = self.recompensas.disponivel(recompensa['id'])
+            situacao = "" if estoque == ESTOQUE_ILIMITADO else (
+                " (esgotada)" if estoque <= 0 else f" ({estoque} restantes)")
+            limite = recompensa.get('limite_por_aluno')
+            print(f"{i}. {recompensa['nome']} - {recompensa['custo']} pontos{situacao}"
+                  + (f" - até {limite} por aluno" if limite else ""))
 
         opcao = input("\nEscolha uma recompensa para resgatar (ou 0 para voltar): ").strip()
 
-        if opcao == "1":
-            self.resgatar_recompensa(email, 100, "Simulado Premium")
-        elif opcao == "2":
-            self.resgatar_recompensa(email, 200, "Material Exclusivo")
-        elif opcao == "3":
-            self.resgatar_recompensa(email, 500, "Aula com Tutor")
-        elif opcao == "4":
-            self.resgatar_recompensa(email, 1000, "Certificado de Excelência")
-        elif opcao == "0":
+        if opcao == "0":
             return
+        if opcao.isdigit() and 1 <= int(opcao) <= len(catalogo):
+            self.resgatar_recompensa(email, catalogo[int(opcao) - 1])
         else:
             print("\nOpção inválida.")
             input("Pressione Enter para continuar...")
 
-    def resgatar_recompensa(self, email, custo, recompensa):
-        """Resgata uma recompensa se o usuário tiver pontos suficientes"""
-        pontos = self.desempenho[email]['gamificacao']['pontos']
-
-        if pontos >= custo:
-            self.desempenho[email]['gamificacao']['pontos'] -= custo
-            print(f"\n✅ Recompensa resgatada: {recompensa}!")
-
-            # Adiciona aos itens resgatados
-            if 'recompensas' not in self.desempenho[email]['gamificacao']:
-                self.desempenho[email]['gamificacao']['recompensas'] = []
-
-            self.desempenho[email]['gamificacao']['recompensas'].append({
-                "nome": recompensa,
-                "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            })
-
+    def efetuar_resgate(self, email, recompensa):
+        """Resgata a recompensa do catálogo: reserva um resgate no limite do aluno, reserva o estoque e
+        debita os pontos, desfazendo as reservas se um passo falhar. Se algo falhar depois do débito, os
+        pontos voltam por um lançamento de estorno no livro e as reservas são devolvidas.
+
+        Devolve "ok", "limite", "esgotada" ou "pontos" (pontos insuficientes).
+        """
+        item_id, ordinal = recompensa['id'], self.ordinais_usuarios[email]
+        # Reservas por compare-and-swap: dois resgates simultâneos não passam juntos do limite nem do estoque
+        if not self.recompensas.reservar_resgate_aluno(item_id, ordinal, recompensa.get('limite_por_aluno')):
+            return "limite"
+        if not self.recompensas.reservar(item_id):
+            self.recompensas.devolver_resgate_aluno(item_id, ordinal)
+            return "esgotada"
+        # O débito confere o saldo no livro travado, então dois resgates simultâneos não gastam os mesmos pontos
+        motivo = f"recompensa: {recompensa['nome']}"
+        if not self.livro_pontos.debitar(email, recompensa['custo'], motivo):
+            self.recompensas.devolver(item_id)
+            self.recompensas.devolver_resgate_aluno(item_id, ordinal)
+            return "pontos"
+        try:
+            self.aplicar_saldo(email, -recompensa['custo'])
+            with self.trava_pontos:
+                self.desempenho[email]['gamificacao'].setdefault('recompensas', []).append({
+                    "id": item_id,
+                    "nome": recompensa['nome'],
+                    "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                })
+        except Exception:
+            self.livro_pontos.creditar(email, recompensa['custo'], f"estorno: {motivo}")
+            self.recompensas.devolver(item_id)
+            self.recompensas.devolver_resgate_aluno(item_id, ordinal)
+            self.aplicar_saldo(email, 0)
+            raise
+        return "ok"
+
+    def resgatar_recompensa(self, email, recompensa):
+        """Resgata uma recompensa se houver estoque, o aluno não tiver atingido o limite e tiver pontos"""
+        situacao = self.efetuar_resgate(email, recompensa)
+        if situacao == "ok":
+            print(f"\n✅ Recompensa resgatada: {recompensa['nome']}!")
             self.salvar_dados()
+        elif situacao == "limite":
+            print(f"\n⚠️ Você já resgatou {recompensa['nome']} o máximo de vezes permitido.")
+        elif situacao == "esgotada":
+            print(f"\n⚠️ {recompensa['nome']} está esgotada.")
         else:
             print("\n⚠️ Pontos insuficientes para resgatar esta recompensa.")
 
@@ -1597,130 +1948,69 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
     def gerar_relatorio_pais(self):
         """Gera um relatório simplificado para pais"""
         email = self.usuario_atual['email']
-        usuario = next(u for u in self.usuarios if u['email'] == email)
-        plano = self.planos.get(email, {})
-        desempenho = self.desempenho.get(email, {})
+        usuario = self.usuarios[self.ordinais_usuarios[email]]
 
         self.mostrar_titulo("RELATÓRIO PARA PAIS")
 
-        print(f"\n📝 Relatório de {usuario['nome']}")
-        print(f"📅 Data: {datetime.now().strftime('%d/%m/%Y')}")
-
-        print("\n📊 DESEMPENHO GERAL:")
-        if 'diagnostico_inicial' in desempenho and 'simulados' in desempenho:
-            # Progresso desde o diagnóstico
-            perc_inicial = desempenho['diagnostico_inicial']['percentual']
-            ultimo_simulado = desempenho['simulados'][-1]['percentual'] if desempenho['simulados'] else 0
-            print(f"Evolução: {perc_inicial:.1f}% → {ultimo_simulado:.1f}%")
-
-            if ultimo_simulado > perc_inicial + 5:
-                print("Tendência: Melhora significativa 📈")
-            elif ultimo_simulado > perc_inicial:
-                print("Tendência: Pequena melhora ↗️")
-            elif ultimo_simulado == perc_inicial:
-                print("Tendência: Estabilidade ↔️")
-            else:
-                print("Tendência: Queda de desempenho 📉")
-        else:
-            print("Dados de desempenho ainda não disponíveis.")
-
-        print("\n📚 PLANO DE ESTUDO:")
-        if plano:
-            semanas_concluidas = sum(1 for meta in plano['metas_semanais'] if meta.get('concluida', False))
-            print(f"Progresso: {semanas_concluidas}/{plano['duracao_semanas']} semanas concluídas")
-            print(f"Horas semanais recomendadas: {plano['horas_semanais']}h")
-        else:
-            print("Plano de estudo ainda não gerado.")
-
-        print("\n🏅 CONQUISTAS:")
-        if 'gamificacao' in desempenho and 'conquistas' in desempenho['gamificacao']:
-            print(f"Total: {len(desempenho['gamificacao']['conquistas'])} conquistas")
-            print(f"Última conquista: {desempenho['gamificacao']['conquistas'][-1]['nome']}"
-                  if desempenho['gamificacao']['conquistas'] else "Nenhuma conquista ainda")
-        else:
-            print("Nenhuma conquista registrada.")
-
-        print("\n📌 RECOMENDAÇÕES:")
-        if plano and 'diagnostico_inicial' in desempenho:
-            areas_fracas = [area for area, dados in desempenho['diagnostico_inicial']['desempenho_areas'].items()
-                           if dados['total'] > 0 and (dados['acertos']/dados['total']) < 0.5] # Evita divisão por zero
-            if areas_fracas:
-                print("Áreas que precisam de mais atenção:")
-                for area in areas_fracas[:3]:
-                    print(f"- {area}")
-            else:
-                print("Continue mantendo o bom desempenho em todas as áreas!")
+        hoje = datetime.now()
+        relatorio = self.cache_derivados.obter(email, ("pais", hoje.date()), lambda: relatorio_pais(
+            usuario, self.planos.get(email, {}), self.desempenho.get(email, {}), hoje))
+        for linha in linhas_console(relatorio):
+            print(linha)
 
         input("\nPressione Enter para voltar...")
 
     def gerar_relatorio_professores(self):
         """Gera um relatório detalhado para professores"""
         email = self.usuario_atual['email']
-        usuario = next(u for u in self.usuarios if u['email'] == email)
-        desempenho = self.desempenho.get(email, {})
+        usuario = self.usuarios[self.ordinais_usuarios[email]]
 
         self.mostrar_titulo("RELATÓRIO PARA PROFESSORES")
 
-        print(f"\n👨‍🎓 Aluno: {usuario['nome']}")
-        print(f"🏫 Escola: {usuario['escola']}")
-        print(f"📅 Série: {usuario['serie']}")
-        print(f"📅 Data: {datetime.now().strftime('%d/%m/%Y')}")
-
-        print("\n📊 DESEMPENHO DETALHADO:")
-        if 'diagnostico_inicial' in desempenho:
-            print("\n🔍 Teste Diagnóstico Inicial:")
-            diag = desempenho['diagnostico_inicial']
-            print(f"Pontuação: {diag['pontuacao']}/{diag['total_questoes']}")
-            print(f"Percentual: {diag['percentual']:.1f}%")
-            print(f"Nível: {diag['nivel']}")
-
-            print("\nÁreas de conhecimento:")
-            for area, dados in diag['desempenho_areas'].items():
-                if dados['total'] > 0: # Evita divisão por zero
-                    perc = (dados['acertos'] / dados['total']) * 100
-                    print(f"\n{area}:")
-                    print(f"Acertos: {dados['acertos']}/{dados['total']} ({perc:.1f}%)")
-                    if perc >= 70:
-                        print("Status: Ponto forte")
-                    elif perc >= 50:
-                        print("Status: Médio desempenho")
-                    else:
-                        print("Status: Ponto fraco")
-                else:
-                    print(f"\n{area}: Nenhuma questão respondida.")
-
-        if 'simulados' in desempenho and desempenho['simulados']:
-            print("\n📝 Histórico de Simulados:")
-            for i, simulado in enumerate(desempenho['simulados'], 1):
-                print(f"\nSimulado {i}:")
-                print(f"Data: {simulado['data']}")
-                print(f"Área: {simulado['area']}")
-                print(f"Pontuação: {simulado['pontuacao']}/{simulado['total_questoes']}")
-                print(f"Percentual: {simulado['percentual']:.1f}%")
-
-        print("\n📌 ANÁLISE PEDAGÓGICA:")
-        if 'diagnostico_inicial' in desempenho and 'simulados' in desempenho:
-            # Sugere estratégias de ensino baseadas no desempenho
-            areas_fracas = [area for area, dados in desempenho['diagnostico_inicial']['desempenho_areas'].items()
-                          if dados['total'] > 0 and (dados['acertos']/dados['total']) < 0.5] # Evita divisão por zero
-
-            if areas_fracas:
-                print("\nÁreas que necessitam de reforço:")
-                for area in areas_fracas:
-                    print(f"- {area}")
-
-                print("\nSugestões de abordagem:")
-                print("- Priorizar exercícios práticos nas áreas de dificuldade")
-                print("- Utilizar materiais visuais e exemplos concretos")
-                print("- Dividir conceitos complexos em partes menores")
-            else:
-                print("\nO aluno demonstra bom desempenho em todas as áreas.")
-                print("Sugestões:")
-                print("- Propor desafios mais complexos")
-                print("- Estimular o aprofundamento em tópicos de interesse")
+        agora = datetime.now()
+        relatorio = self.cache_derivados.obter(email, ("professores", agora.date()), lambda: relatorio_professor(
+            usuario, self.desempenho.get(email, {}), agora))
+
+        # A frequência da turma muda com o acesso dos colegas, então essa seção é sempre calculada
+        frequencia = frequencia_aluno(self.atividade, email, agora.date())
+        turma = [u['email'] for u in self.usuarios
+                 if u.get('escola') == usuario.get('escola') and u.get('serie') == usuario.get('serie')]
+        frequencia['turma_ativos'] = self.atividade.contar_ativos(5, 7, agora.date(), emails=turma)
+        frequencia['turma_total'] = len(turma)
+        secoes = relatorio['secoes']
+        for linha in linhas_console(dict(relatorio, secoes=secoes[:1] + [secao_frequencia(frequencia)] + secoes[1:])):
+            print(linha)
 
         input("\nPressione Enter para voltar...")
 
+    def exportar_relatorios_turma(self):
+        """Gera os relatórios para professores de todos os alunos de uma turma, em arquivos"""
+        self.mostrar_titulo("RELATÓRIOS DA TURMA")
+
+        escola = input("Escola: ").strip()
+        serie = input("Série (ex.: 3º EM): ").strip()
+        formato = input(f"Formato ({'/'.join(sorted(RENDERIZADORES))}) [md]: ").strip().lower() or "md"
+        if formato not in RENDERIZADORES:
+            print("\nFormato inválido.")
+            input("Pressione Enter para continuar...")
+            return
+
+        diretorio_saida = os.path.join("relatorios", f"{escola} - {serie}".replace(os.sep, "_"))
+        try:
+            quantidade, caminho_resumo = gerar_relatorios_turma(self.usuarios, self.desempenho, escola, serie,
+                                                                diretorio_saida, formato, self.atividade)
+        except OSError as e:
+            print(f"Erro ao gerar relatórios: {e}")
+            input("Pressione Enter para continuar...")
+            return
+
+        if quantidade:
+            print(f"\n✅ {quantidade} relatórios gravados em {diretorio_saida}")
+            print(f"Resumo da turma: {caminho_resumo}")
+        else:
+            print(f"\nNenhum aluno encontrado em {escola} - {serie}.")
+        input("Pressione Enter para continuar...")
+
     def revisao_final_enem(self):
         """Prepara revisão final para o ENEM"""
         email = self.usuario_atual['email']
@@ -1741,18 +2031,9 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
         print("\nEste módulo prepara uma revisão intensiva para o ENEM com base no seu desempenho.")
         print("Vamos criar um plano de revisão personalizado para os últimos 30 dias antes da prova.")
 
-        # Pega as áreas com menor desempenho
-        desempenho = self.desempenho[email]['diagnostico_inicial']['desempenho_areas']
-
-        # Se houver simulados, atualiza o desempenho com os dados mais recentes
-        if 'simulados' in self.desempenho[email] and self.desempenho[email]['simulados']:
-            for simulado in self.desempenho[email]['simulados']:
-                if 'desempenho_areas' in simulado:
-                    for area, dados in simulado['desempenho_areas'].items():
-                        if area not in desempenho:
-                            desempenho[area] = {'acertos': 0, 'total': 0}
-                        desempenho[area]['acertos'] += dados['acertos']
-                        desempenho[area]['total'] += dados['total']
+        # Pega as áreas com menor desempenho (diagnóstico + todos os simulados, já somados a cada resultado)
+        agregados = obter_agregados(self.desempenho[email])
+        desempenho = agregados['areas']
 
         # Ordena áreas por desempenho (da menor para maior)
         areas_ordenadas = sorted(desempenho.items(),
@@ -1786,6 +2067,135 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
 
         input("\nPressione Enter para voltar...")
 
+    def mostrar_painel_turma(self):
+        """Painel do professor: áreas mais fracas, distribuição das notas e tendência semanal da turma"""
+        self.mostrar_titulo("PAINEL DA TURMA")
+
+        escola = input("Escola: ").strip()
+        series = self.cubo.turmas_da_escola(escola)
+        if not series:
+            print("\nNenhum resultado registrado para esta escola.")
+            input("Pressione Enter para continuar...")
+            return
+        print("Séries com resultados: " + ", ".join(str(s) for s in series))
+        serie = input("Série: ").strip()
+
+        inicio = time.perf_counter()
+        painel = self.cubo.painel(escola, serie)
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        if not painel['areas']:
+            print("\nNenhum resultado registrado para esta turma.")
+            input("Pressione Enter para continuar...")
+            return
+
+        print(f"\n🏫 {escola} - {serie}: {painel['alunos']} alunos com resultados (consulta em {duracao_ms:.1f} ms)")
+
+        print("\n📉 ÁREAS, DA MAIS FRACA À MAIS FORTE:")
+        for area in painel['areas']:
+            print(f"- {area['area']}: {area['taxa_acertos']:.1f}% de acertos | nota média {area['nota_media']:.1f}"
+                  f" | {area['alunos']} alunos, {area['resultados']} resultados")
+
+        print("\n📊 DISTRIBUIÇÃO DAS NOTAS (resultados por faixa):")
+        for area in painel['areas']:
+            maior = max(area['histograma']) or 1
+            print(f"\n{area['area']}:")
+            for i, quantidade in enumerate(area['histograma']):
+                faixa = f"{i * 10}-{i * 10 + 9 if i < FAIXAS_NOTA - 1 else 100}%"
+                print(f"{faixa:>8} {'█' * round(quantidade / maior * 20)} {quantidade}")
+
+        print(f"\n📈 TENDÊNCIA SEMANAL (% de acertos, últimas {len(painel['semanas'])} semanas):")
+        print(" " * 24 + " ".join(f"{semana[-3:]:>5}" for semana in painel['semanas']))
+        for area in painel['areas']:
+            valores = " ".join("    -" if taxa is None else f"{taxa:5.0f}" for _, taxa in area['tendencia'])
+            print(f"{area['area'][:23]:<24}{valores}")
+
+        input("\nPressione Enter para voltar...")
+
+    def menu_eventos_simulado(self):
+        """Menu do administrador para criar eventos de simulado e consolidar seus resultados"""
+        while True:
+            self.mostrar_titulo("EVENTOS DE SIMULADO")
+            print("1. Criar Evento (pré-gerar formas)")
+            print("2. Consolidar Resultados de um Evento")
+            print("3. Voltar")
+            escolha = input("\nEscolha uma opção: ").strip()
+
+            if escolha == '1': self.criar_evento_simulado()
+            elif escolha == '2': self.consolidar_evento_simulado()
+            elif escolha == '3': break
+            else: print("\nOpção inválida. Tente novamente."); input("Pressione Enter para continuar...")
+
+    def criar_evento_simulado(self):
+        """Pré-gera as formas de um evento de simulado"""
+        self.mostrar_titulo("CRIAR EVENTO DE SIMULADO")
+        questoes = self.simulados.get('questoes', [])
+        if not questoes:
+            print("Não há questões cadastradas para gerar o evento.")
+            input("\nPressione Enter para continuar...")
+            return
+
+        codigo = input("Código do evento (ex: 3EM-NOV): ").strip().upper()
+        if not codigo or not all(c.isalnum() or c in '-_' for c in codigo):
+            print("Código inválido. Use letras, números, '-' ou '_'.")
+            input("\nPressione Enter para continuar...")
+            return
+        if self.eventos.existe(codigo):
+            print("Já existe um evento com este código.")
+            input("\nPressione Enter para continuar...")
+            return
+
+        titulo = input("Título do evento: ").strip() or f"Simulado do Dia {codigo}"
+        num_formas = self.obter_numero(f"Número de formas (1-{min(100, len(questoes))}): ", 1, min(100, len(questoes)))
+        maximo = len(questoes) // num_formas  # As formas não repetem questões entre si
+        tamanho = self.obter_numero(f"Questões por forma (Máx: {maximo}): ", 1, maximo)
+        duracao = self.obter_numero(f"Duração em minutos (Mín: 1, Máx: {tamanho*5}): ", 1, tamanho*5)
+
+        try:
+            evento = self.eventos.criar_evento(codigo, titulo, questoes, num_formas, tamanho, duracao)
+        except ValueError as e:
+            print(f"\nErro ao montar as formas: {e}")
+            input("Pressione Enter para continuar...")
+            return
+        print(f"\n✅ Evento {codigo} criado com {evento['num_formas']} formas de {evento['tamanho']} questões.")
+        input("Pressione Enter para continuar...")
+
+    def consolidar_evento_simulado(self):
+        """Incorpora ao desempenho dos alunos os resultados gravados em lote de um evento.
+
+        Cada resultado passa pelo barramento como um simulado comum (estatísticas, agregados, percentis,
+        cubo, cache e conquistas); a posição consolidada do arquivo evita incorporar duas vezes, e só o
+        primeiro resultado de cada aluno no evento é incorporado.
+        """
+        self.mostrar_titulo("CONSOLIDAR RESULTADOS")
+        codigo = input("Código do evento: ").strip().upper()
+        if not self.eventos.existe(codigo):
+            print("Evento não encontrado.")
+            input("\nPressione Enter para continuar...")
+            return
+
+        self.eventos.fechar() # Garante que os lotes pendentes estejam no arquivo
+        formas = self.eventos.carregar_evento(codigo, self.questoes_por_id())['formas']
+        posicao = self.eventos.posicao_consolidada(codigo)
+        novos = 0
+        for registro, posicao in self.eventos.ler_resultados(codigo, posicao):
+            # Registros sem respostas são do formato antigo, que já entrava no histórico ao terminar a prova
+            if 'respostas' not in registro or registro['email'] not in self.ordinais_usuarios:
+                continue
+            # Segunda tentativa gravada antes de as tentativas serem recusadas: fica de fora
+            simulados = self.desempenho.get(registro['email'], {}).get('simulados', [])
+            if any(simulado.get('evento') == codigo for simulado in simulados):
+                continue
+            self.motor.registrar_simulado(SimuladoConcluido(
+                registro['email'], registro['resultado'], formas[registro['forma']], registro['respostas'],
+                registro['resultado'].get('tempos_questoes', {}), registro['momentos']), gravar=False)
+            novos += 1
+        self.salvar_dados()
+        self.gravar_registros_pendentes()
+        self.eventos.marcar_consolidado(codigo, posicao)
+
+        print(f"\n✅ {novos} resultados incorporados ao desempenho dos alunos.")
+        input("Pressione Enter para continuar...")
+
     def excluir_questao(self): # Nova função para excluir questões (Linhas 1121-1140)
         """Exclui uma questão do banco de simulados pelo ID."""
         self.mostrar_titulo("EXCLUIR QUESTÃO") # Linha 1123
@@ -1802,6 +2212,8 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
                 confirmacao = input(f"Tem certeza que deseja excluir a questão '{q['enunciado']}'? (S/N): ").strip().lower() # Linha 1136
                 if confirmacao == 's': # Linha 1137
                     del self.simulados['questoes'][i] # Linha 1138
+                    self._indice_questoes = None
+                    self._indice_areas = None
                     self.salvar_dados() # Linha 1139
                     print("Questão excluída com sucesso!") # Linha 1140
                 else: print("Exclusão cancelada.") # Linha 1141
@@ -1829,7 +2241,7 @@ Vamos começar com um teste diagnóstico para conhecer seu nível atual!
 
             # Edita área
             nova_area = input(f"Nova Área (atual: {questao_encontrada['area']}): ").strip().title() # Linha 1166
-            if nova_area: questao_encontrada['area'] = nova_area # Linha 1167
+            if nova_area: questao_encontrada['area'] = nova_area; self._indice_areas = None # Linha 1167
 
             # Edita nível
             novo_nivel = input(f"Novo Nível (atual: {questao_encontrada['nivel']}): ").strip().title() # Linha 1169
@@ -0,0 +1,144 @@
+"""Leitura do teclado com prazo, usada nos simulados cronometrados.
+
+Em terminais POSIX a espera é feita com `selectors` sobre o stdin: o processo dorme até chegar uma
+linha, até o próximo tique do cronômetro ou até o prazo, sem espera ativa. A linha é lida direto do
+descritor (os.read), porque o buffer do sys.stdin poderia guardar dados que o select não vê. No Windows
+as teclas são lidas do console com msvcrt, consultado a cada INTERVALO_CONSOLE segundos. Nos dois casos
+nada continua lendo o teclado depois do prazo: o que foi digitado sem Enter é descartado e não vai
+parar no próximo input(). Fora de um terminal (entrada redirecionada, reprodução de sessões) a leitura
+usa `input()` normalmente e o prazo só é verificado depois da resposta.
+"""
+import os
+import sys
+import time
+import shutil
+import selectors
+
+try:
+    import msvcrt
+except ImportError:  # POSIX: leitura pelo seletor
+    msvcrt = None
+
+try:
+    import termios
+except ImportError:  # Windows
+    termios = None
+
+INTERVALO_CONSOLE = 0.05  # segundos entre consultas ao teclado no Windows
+
+_sobra = bytearray()  # Bytes lidos do stdin depois da última linha entregue (ex.: texto colado)
+
+
+def _linha_completa():
+    """Tira de `_sobra` a primeira linha terminada em Enter; None se ainda não há nenhuma"""
+    fim = _sobra.find(b'\n')
+    if fim < 0:
+        return None
+    linha = bytes(_sobra[:fim + 1])
+    del _sobra[:fim + 1]
+    return linha.decode(sys.stdin.encoding or 'utf-8', errors='replace')
+
+
+def _esperar_linha_seletor(seletor, restante_seg):
+    """Espera até `restante_seg` pelo stdin ficar legível; None se nenhuma linha terminou"""
+    linha = _linha_completa()
+    if linha is None and seletor.select(timeout=restante_seg):
+        dados = os.read(sys.stdin.fileno(), 4096)
+        if not dados:  # fim da entrada: entrega o que sobrou, mesmo sem Enter
+            linha = _sobra.decode(sys.stdin.encoding or 'utf-8', errors='replace')
+            _sobra.clear()
+            return linha
+        _sobra.extend(dados)
+        linha = _linha_completa()
+    return linha
+
+
+def _esperar_linha_console(restante_seg, digitado):
+    """Lê as teclas do console (Windows) até o Enter ou até `restante_seg`; None se a linha não terminou.
+
+    `digitado` guarda os caracteres da linha entre uma chamada e outra (os tiques do cronômetro).
+    """
+    fim = time.monotonic() + restante_seg
+    while True:
+        while msvcrt.kbhit():
+            tecla = msvcrt.getwch()
+            if tecla in ('\x00', '\xe0'):  # tecla especial (setas, F1...): ignora o código que vem depois
+                msvcrt.getwch()
+            elif tecla in ('\r', '\n'):
+                print()
+                linha = ''.join(digitado)
+                digitado.clear()
+                return linha
+            elif tecla == '\b':
+                if digitado:
+                    digitado.pop()
+                    print('\b \b', end='', flush=True)
+            else:
+                digitado.append(tecla)
+                print(tecla, end='', flush=True)
+        if time.monotonic() >= fim:
+            return None
+        time.sleep(INTERVALO_CONSOLE)
+
+
+def _descartar_digitado():
+    """Descarta o que o aluno digitou sem Enter, para não virar a resposta da próxima pergunta"""
+    _sobra.clear()
+    if termios:
+        try:
+            termios.tcflush(sys.stdin.fileno(), termios.TCIFLUSH)
+        except termios.error:
+            pass
+
+
+def ler_com_prazo(mensagem, prazo_ns, atualizar=None, intervalo_seg=1.0):
+    """Lê uma linha até o prazo (em ns do relógio monotônico).
+
+    Retorna a linha sem espaços nas pontas, ou None se o tempo acabou. `atualizar(restante_seg)`
+    é chamado a cada `intervalo_seg` enquanto o aluno não responde (ex.: para redesenhar o cronômetro).
+    """
+    if not sys.stdin.isatty():
+        resposta = input(mensagem)
+        return resposta.strip() if time.monotonic_ns() < prazo_ns else None
+
+    print(mensagem, end='', flush=True)
+    seletor = None
+    digitado = []
+    if msvcrt is None:
+        seletor = selectors.DefaultSelector()
+        seletor.register(sys.stdin, selectors.EVENT_READ)
+    try:
+        while True:
+            restante_seg = (prazo_ns - time.monotonic_ns()) / 1e9
+            if restante_seg <= 0:
+                _descartar_digitado()
+                print()
+                return None
+
+            espera = min(intervalo_seg, restante_seg)
+            if seletor:
+                linha = _esperar_linha_seletor(seletor, espera)
+            else:
+                linha = _esperar_linha_console(espera, digitado)
+
+            if linha is not None:
+                return linha.strip()
+            if atualizar:
+                atualizar(max(0.0, (prazo_ns - time.monotonic_ns()) / 1e9))
+    finally:
+        if seletor:
+            seletor.close()
+
+
+def linhas_ocupadas(texto, colunas=None):
+    """Linhas de tela que `texto` ocupa, contando as quebras automáticas do terminal"""
+    colunas = colunas or shutil.get_terminal_size().columns
+    return sum(max(1, -(-len(linha) // colunas)) for linha in texto.split('\n'))
+
+
+def reescrever_linha(linhas_acima, texto):
+    """Reescreve a linha que está `linhas_acima` linhas acima do cursor, sem mover o cursor de onde o
+    aluno está digitando (nada é feito se essa linha já saiu da tela)"""
+    if sys.stdout.isatty() and 0 < linhas_acima < shutil.get_terminal_size().lines:
+        sys.stdout.write(f"\0337\033[{linhas_acima}A\r\033[2K{texto}\0338")
+        sys.stdout.flush()
@@ -0,0 +1,163 @@
+import os
+import json
+import math
+import threading
+from array import array
+
+NUM_ALTERNATIVAS = 5  # A-E
+
+
+class EstatisticasQuestoes:
+    """Estatísticas acumuladas por questão, guardadas em arrays compactos indexados pelo ordinal da questão"""
+
+    def __init__(self, arquivo_indice, arquivo_dados, tamanho_lote=50):
+        self.ARQUIVO_INDICE = arquivo_indice
+        self.ARQUIVO_DADOS = arquivo_dados
+        self.tamanho_lote = tamanho_lote
+        self.pendentes = 0
+        self.trava_gravacao = threading.Lock()  # Uma gravação dos arquivos por vez
+        self.versao = 0          # fotos tiradas pelo serializar()
+        self.versao_gravada = 0  # última foto já gravada
+
+        self.ids = []            # ordinal -> id da questão
+        self.ordinais = {}       # id da questão -> ordinal
+        self.tentativas = array('q')
+        self.acertos = array('q')
+        self.escolhas = array('q')            # NUM_ALTERNATIVAS contadores por questão
+        self.tempo_soma = array('d')
+        self.tempo_soma_quad = array('d')
+        self.escore_soma_acerto = array('d')  # soma do percentual do simulado de quem acertou
+        self.escore_soma_erro = array('d')    # soma do percentual do simulado de quem errou
+
+        self.carregar()
+
+    def _colunas(self):
+        """Arrays na ordem em que são gravados no arquivo"""
+        return [self.tentativas, self.acertos, self.escolhas, self.tempo_soma,
+                self.tempo_soma_quad, self.escore_soma_acerto, self.escore_soma_erro]
+
+    def carregar(self):
+        """Carrega o índice de ordinais e os arrays do disco"""
+        if not os.path.exists(self.ARQUIVO_INDICE) or not os.path.exists(self.ARQUIVO_DADOS):
+            return
+        try:
+            with open(self.ARQUIVO_INDICE, 'r') as f:
+                self.ids = json.load(f).get('ids', [])
+            self.ordinais = {questao_id: i for i, questao_id in enumerate(self.ids)}
+            n = len(self.ids)
+            with open(self.ARQUIVO_DADOS, 'rb') as f:
+                for coluna in self._colunas():
+                    tamanho = n * NUM_ALTERNATIVAS if coluna is self.escolhas else n
+                    coluna.fromfile(f, tamanho)
+        except (json.JSONDecodeError, IOError, EOFError) as e:
+            print(f"Erro ao carregar estatísticas das questões: {e}")
+            self.ids, self.ordinais = [], {}
+            for coluna in self._colunas():
+                del coluna[:]
+
+    def lote_completo(self):
+        """Indica se já há `tamanho_lote` respostas registradas desde a última foto"""
+        return self.pendentes >= self.tamanho_lote
+
+    def serializar(self):
+        """Foto do índice e dos arrays, para gravar depois com `salvar(foto)`.
+
+        Quem chama garante que nenhuma resposta é registrada durante a foto (ex.: a trava do motor).
+        """
+        self.versao += 1
+        self.pendentes = 0
+        return self.versao, json.dumps({'ids': self.ids}), b"".join(coluna.tobytes() for coluna in self._colunas())
+
+    def salvar(self, foto=None):
+        """Grava no disco a foto informada (padrão: o estado atual); uma foto mais antiga que a última
+        gravada é descartada"""
+        versao, indice, dados = foto or self.serializar()
+        with self.trava_gravacao:
+            if versao <= self.versao_gravada:
+                return
+            try:
+                with open(self.ARQUIVO_INDICE, 'w') as f:
+                    f.write(indice)
+                with open(self.ARQUIVO_DADOS, 'wb') as f:
+                    f.write(dados)
+                self.versao_gravada = versao
+            except IOError as e:
+                print(f"Erro ao salvar estatísticas das questões: {e}")
+
+    def ordinal(self, questao_id):
+        """Retorna o ordinal da questão, reservando uma nova posição nos arrays se necessário"""
+        ordinal = self.ordinais.get(questao_id)
+        if ordinal is None:
+            ordinal = len(self.ids)
+            self.ids.append(questao_id)
+            self.ordinais[questao_id] = ordinal
+            for coluna in self._colunas():
+                coluna.extend([0] * (NUM_ALTERNATIVAS if coluna is self.escolhas else 1))
+        return ordinal
+
+    def registrar_resposta(self, questao_id, alternativa, correta, tempo_seg, escore):
+        """Registra uma resposta em O(1), só em memória; `lote_completo()` indica quando gravar.
+
+        `alternativa` é o índice escolhido (0 = A) e `escore` o percentual (0-1) do aluno no simulado.
+        """
+        i = self.ordinal(questao_id)
+        self.tentativas[i] += 1
+        if correta:
+            self.acertos[i] += 1
+            self.escore_soma_acerto[i] += escore
+        else:
+            self.escore_soma_erro[i] += escore
+        if 0 <= alternativa < NUM_ALTERNATIVAS:
+            self.escolhas[i * NUM_ALTERNATIVAS + alternativa] += 1
+        self.tempo_soma[i] += tempo_seg
+        self.tempo_soma_quad[i] += tempo_seg * tempo_seg
+
+        self.pendentes += 1
+
+    def dificuldade(self, questao_id):
+        """Índice de dificuldade clássico (proporção de acertos), ou None sem respostas"""
+        i = self.ordinais.get(questao_id)
+        if i is None or self.tentativas[i] == 0:
+            return None
+        return self.acertos[i] / self.tentativas[i]
+
+    def discriminacao(self, questao_id):
+        """Diferença entre o escore médio de quem acertou e de quem errou (aproximação da discriminação)"""
+        i = self.ordinais.get(questao_id)
+        if i is None:
+            return None
+        erros = self.tentativas[i] - self.acertos[i]
+        if self.acertos[i] == 0 or erros == 0:
+            return None
+        return self.escore_soma_acerto[i] / self.acertos[i] - self.escore_soma_erro[i] / erros
+
+    def popularidade_alternativas(self, questao_id):
+        """Proporção de escolha de cada alternativa (A-E)"""
+        i = self.ordinais.get(questao_id)
+        if i is None or self.tentativas[i] == 0:
+            return [0.0] * NUM_ALTERNATIVAS
+        inicio = i * NUM_ALTERNATIVAS
+        return [n / self.tentativas[i] for n in self.escolhas[inicio:inicio + NUM_ALTERNATIVAS]]
+
+    def tempo_resposta(self, questao_id):
+        """Tempo médio e desvio padrão de resposta em segundos, ou (None, None) sem respostas"""
+        i = self.ordinais.get(questao_id)
+        if i is None or self.tentativas[i] == 0:
+            return None, None
+        n = self.tentativas[i]
+        media = self.tempo_soma[i] / n
+        variancia = max(0.0, self.tempo_soma_quad[i] / n - media * media)
+        return media, math.sqrt(variancia)
+
+    def resumo(self, questao_id):
+        """Resumo de todas as estatísticas de uma questão"""
+        i = self.ordinais.get(questao_id)
+        media, desvio = self.tempo_resposta(questao_id)
+        return {
+            "tentativas": self.tentativas[i] if i is not None else 0,
+            "dificuldade": self.dificuldade(questao_id),
+            "discriminacao": self.discriminacao(questao_id),
+            "alternativas": self.popularidade_alternativas(questao_id),
+            "tempo_medio": media,
+            "tempo_desvio": desvio,
+        }
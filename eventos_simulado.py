@@ -0,0 +1,228 @@
+"""Eventos de "simulado do dia": provas pré-geradas para uma turma inteira fazer ao mesmo tempo.
+
+O administrador gera N formas da prova antes do evento. Cada forma é guardada como um array compacto
+de ordinais de questões. Cada aluno recebe uma forma pelo hash de (código do evento, e-mail), sem
+nenhum sorteio no início da prova. Os resultados vão para uma fila gravada em lotes por uma thread,
+em vez de regravar todos os dados a cada aluno que termina, e só entram no histórico dos alunos na
+consolidação; `consolidado.json` guarda até que byte de `resultados.jsonl` já foi consolidado. Cada
+aluno faz o evento uma única vez: quem começa a prova é anotado em `participantes.txt` antes de ver a
+primeira questão, e uma segunda tentativa é recusada.
+"""
+import os
+import json
+import queue
+import hashlib
+import threading
+from array import array
+from datetime import datetime
+
+from montagem_formas import montar_formas
+
+_FIM = object()  # Sinal de encerramento da thread gravadora
+
+
+class GravadorLote:
+    """Acrescenta registros a um arquivo JSON Lines em lotes, a partir de uma thread própria"""
+
+    def __init__(self, arquivo, tamanho_lote=100, intervalo_seg=1.0):
+        self.arquivo = arquivo
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_seg = intervalo_seg
+        self.fila = queue.Queue()
+        self.lotes_gravados = 0
+        self.thread = threading.Thread(target=self._executar, daemon=True)
+        self.thread.start()
+
+    def adicionar(self, registro):
+        """Enfileira um registro; retorna imediatamente"""
+        self.fila.put(registro)
+
+    def _executar(self):
+        encerrar = False
+        while not encerrar:
+            item = self.fila.get()
+            if item is _FIM:
+                break
+            lote = [item]
+            # Junta o que chegar até completar o lote ou passar o intervalo
+            while len(lote) < self.tamanho_lote:
+                try:
+                    item = self.fila.get(timeout=self.intervalo_seg)
+                except queue.Empty:
+                    break
+                if item is _FIM:
+                    encerrar = True
+                    break
+                lote.append(item)
+            self._gravar(lote)
+
+    def _gravar(self, lote):
+        try:
+            with open(self.arquivo, 'a') as f:
+                f.write("".join(json.dumps(registro, ensure_ascii=False) + "\n" for registro in lote))
+            self.lotes_gravados += 1
+        except IOError as e:
+            print(f"Erro ao gravar resultados do evento: {e}")
+
+    def fechar(self):
+        """Grava o que ainda estiver na fila e encerra a thread"""
+        self.fila.put(_FIM)
+        self.thread.join()
+
+
+class EventosSimulado:
+    """Criação de eventos, atribuição de formas aos alunos e gravação em lote dos resultados"""
+
+    def __init__(self, diretorio, estatisticas_questoes):
+        self.diretorio = diretorio
+        self.estatisticas_questoes = estatisticas_questoes  # fornece o ordinal de cada questão
+        self.eventos = {}     # código -> evento carregado (metadados + formas)
+        self.gravadores = {}  # código -> GravadorLote
+        self.participantes = {}  # código -> e-mails que já começaram a prova
+        self.trava = threading.Lock()
+
+    def _pasta(self, codigo):
+        return os.path.join(self.diretorio, codigo)
+
+    def existe(self, codigo):
+        """Indica se o evento já foi criado"""
+        return os.path.exists(os.path.join(self._pasta(codigo), 'evento.json'))
+
+    def gerar_formas(self, questoes, num_formas, tamanho, semente=None):
+        """Monta `num_formas` formas paralelas de `tamanho` questões cada, sem questões em comum"""
+        return montar_formas(questoes, num_formas, tamanho, semente=semente)
+
+    def criar_evento(self, codigo, titulo, questoes, num_formas, tamanho, duracao):
+        """Gera e grava as formas do evento; retorna os metadados do evento"""
+        formas = self.gerar_formas(questoes, num_formas, tamanho)
+        tamanho = len(formas[0])
+        ordinais = array('I')
+        for forma in formas:
+            ordinais.extend(self.estatisticas_questoes.ordinal(q['id']) for q in forma)
+        # Os ordinais novos precisam estar no disco para a prova poder ser lida depois
+        self.estatisticas_questoes.salvar()
+
+        evento = {
+            "codigo": codigo,
+            "titulo": titulo,
+            "num_formas": num_formas,
+            "tamanho": tamanho,
+            "duracao": duracao,
+            "criado_em": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        os.makedirs(self._pasta(codigo), exist_ok=True)
+        with open(os.path.join(self._pasta(codigo), 'formas.bin'), 'wb') as f:
+            ordinais.tofile(f)
+        with open(os.path.join(self._pasta(codigo), 'evento.json'), 'w') as f:
+            json.dump(evento, f, indent=4, ensure_ascii=False)
+        with self.trava:
+            self.eventos.pop(codigo, None)
+        return evento
+
+    def carregar_evento(self, codigo, questoes_por_id):
+        """Carrega (uma única vez) o evento com as formas já convertidas em listas de questões"""
+        evento = self.eventos.get(codigo)
+        if evento is not None:
+            return evento
+        with self.trava:
+            if codigo in self.eventos:
+                return self.eventos[codigo]
+            with open(os.path.join(self._pasta(codigo), 'evento.json'), 'r') as f:
+                evento = json.load(f)
+            ordinais = array('I')
+            with open(os.path.join(self._pasta(codigo), 'formas.bin'), 'rb') as f:
+                ordinais.frombytes(f.read())
+
+            ids = self.estatisticas_questoes.ids
+            tamanho = evento['tamanho']
+            evento['formas'] = []
+            for inicio in range(0, len(ordinais), tamanho):
+                forma = [questoes_por_id.get(ids[o]) for o in ordinais[inicio:inicio + tamanho]]
+                evento['formas'].append([q for q in forma if q is not None])  # ignora questões excluídas
+            self.eventos[codigo] = evento
+            return evento
+
+    def forma_do_aluno(self, codigo, email, questoes_por_id):
+        """Retorna (número da forma, questões) atribuídas ao aluno pelo hash do código e do e-mail"""
+        evento = self.carregar_evento(codigo, questoes_por_id)
+        resumo = hashlib.sha256(f"{codigo}:{email}".encode('utf-8')).digest()
+        numero = int.from_bytes(resumo[:8], 'big') % evento['num_formas']
+        return numero, evento['formas'][numero]
+
+    def _participantes(self, codigo):
+        """E-mails que já começaram o evento (chamar com a trava); eventos anteriores a participantes.txt
+        contam quem tem resultado gravado"""
+        participantes = self.participantes.get(codigo)
+        if participantes is None:
+            participantes = {registro['email'] for registro, _ in self.ler_resultados(codigo)}
+            caminho = os.path.join(self._pasta(codigo), 'participantes.txt')
+            if os.path.exists(caminho):
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    participantes.update(linha.strip() for linha in f if linha.strip())
+            self.participantes[codigo] = participantes
+        return participantes
+
+    def participou(self, codigo, email):
+        """Indica se o aluno já começou (ou terminou) a prova do evento"""
+        with self.trava:
+            return email in self._participantes(codigo)
+
+    def inscrever(self, codigo, email):
+        """Anota que o aluno começou a prova; False se ele já tinha começado (segunda tentativa)"""
+        with self.trava:
+            participantes = self._participantes(codigo)
+            if email in participantes:
+                return False
+            with open(os.path.join(self._pasta(codigo), 'participantes.txt'), 'a', encoding='utf-8') as f:
+                f.write(email + "\n")
+            participantes.add(email)
+            return True
+
+    def registrar_resultado(self, codigo, concluido, forma):
+        """Enfileira para gravação em lote o resultado do aluno (evento SimuladoConcluido ainda não publicado)"""
+        gravador = self.gravadores.get(codigo)
+        if gravador is None:
+            with self.trava:
+                gravador = self.gravadores.get(codigo)
+                if gravador is None:
+                    gravador = GravadorLote(os.path.join(self._pasta(codigo), 'resultados.jsonl'))
+                    self.gravadores[codigo] = gravador
+        concluido.resultado['evento'] = codigo  # a consolidação reconhece por ele quem já tem resultado do evento
+        gravador.adicionar({"email": concluido.email, "forma": forma, "resultado": concluido.resultado,
+                            "respostas": concluido.respostas, "momentos": concluido.momentos})
+
+    def ler_resultados(self, codigo, posicao=0):
+        """Percorre (registro, byte seguinte) dos resultados gravados do evento a partir do byte `posicao`"""
+        caminho = os.path.join(self._pasta(codigo), 'resultados.jsonl')
+        if not os.path.exists(caminho):
+            return
+        with open(caminho, 'rb') as f:
+            f.seek(posicao)
+            for linha in f:
+                if not linha.endswith(b"\n"):  # linha ainda sendo escrita
+                    break
+                posicao += len(linha)
+                if linha.strip():
+                    yield json.loads(linha), posicao
+
+    def posicao_consolidada(self, codigo):
+        """Byte de resultados.jsonl até onde os resultados do evento já foram consolidados"""
+        caminho = os.path.join(self._pasta(codigo), 'consolidado.json')
+        if not os.path.exists(caminho):
+            return 0
+        with open(caminho, 'r') as f:
+            return json.load(f).get('posicao', 0)
+
+    def marcar_consolidado(self, codigo, posicao):
+        """Grava até onde os resultados do evento foram consolidados"""
+        caminho = os.path.join(self._pasta(codigo), 'consolidado.json')
+        with open(caminho + ".tmp", 'w') as f:
+            json.dump({'posicao': posicao}, f)
+        os.replace(caminho + ".tmp", caminho)
+
+    def fechar(self):
+        """Grava os resultados pendentes de todos os eventos"""
+        with self.trava:
+            gravadores, self.gravadores = list(self.gravadores.values()), {}
+        for gravador in gravadores:
+            gravador.fechar()
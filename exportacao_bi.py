@@ -0,0 +1,374 @@
+"""Exportação colunar (Parquet ou Arrow IPC) para ferramentas de BI externas.
+
+Gera quatro tabelas, cada uma num diretório próprio da saída (um arquivo por exportação, que as
+ferramentas de BI leem como um único conjunto de dados):
+    alunos            cadastro e gamificação de cada aluno
+    resultados        um registro por diagnóstico/simulado
+    resultados_areas  um registro por área de cada diagnóstico/simulado
+    questoes          estatísticas acumuladas por questão
+
+O desempenho.json é lido aluno a aluno, sem carregar o arquivo inteiro, e as linhas são gravadas em
+grupos de LINHAS_GRUPO linhas: a memória usada não depende do número de resultados. A marca d'água
+(`marca_exportacao.json` e os contadores por aluno em `marca-<parte>.bin`) guarda até onde, na ordem de
+gravação, os dados já foram exportados; a exportação seguinte leva só os resultados gravados depois, os
+alunos com resultados, cadastro ou pontos novos e as questões com respostas novas. Requer pyarrow
+(pip install pyarrow).
+
+As tabelas alunos e questoes guardam o estado do momento: um aluno ou questão alterado ganha uma linha
+nova a cada exportação, com a coluna `exportado_em`. Na ferramenta de BI, use só a linha mais recente de
+cada email (alunos) ou questao_id (questoes). Resultados e resultados_areas nunca se repetem.
+
+Uso: python exportacao_bi.py [--dados .] [--saida exportacao_bi] [--formato parquet|arrow] [--completa]
+"""
+import os
+import re
+import json
+import time
+import argparse
+from array import array
+from datetime import datetime
+
+from estatisticas_questoes import EstatisticasQuestoes
+from registro_respostas import ler_colunas, contar_linhas
+
+LINHAS_GRUPO = 65536        # linhas por grupo (row group do Parquet, lote do Arrow)
+BLOCO_LEITURA = 1 << 20     # caracteres lidos por vez do desempenho.json
+ARQUIVO_MARCA = "marca_exportacao.json"
+EXTENSOES = {"parquet": "parquet", "arrow": "arrow"}
+
+# Colunas de cada tabela: (nome, tipo) com tipo em texto, inteiro, real ou data
+ESQUEMAS = {
+    "alunos": [("email", "texto"), ("nome", "texto"), ("escola", "texto"), ("serie", "texto"),
+               ("idade", "inteiro"), ("nivel", "inteiro"), ("data_cadastro", "data"), ("pontos", "inteiro"),
+               ("conquistas", "inteiro"), ("simulados", "inteiro"), ("diagnostico_percentual", "real"),
+               ("ultimo_percentual", "real"), ("exportado_em", "data")],
+    "resultados": [("email", "texto"), ("tipo", "texto"), ("indice", "inteiro"), ("data", "data"),
+                   ("area", "texto"), ("nivel", "texto"), ("pontuacao", "inteiro"),
+                   ("total_questoes", "inteiro"), ("percentual", "real")],
+    "resultados_areas": [("email", "texto"), ("tipo", "texto"), ("indice", "inteiro"), ("data", "data"),
+                         ("area", "texto"), ("acertos", "inteiro"), ("total", "inteiro"), ("percentual", "real")],
+    "questoes": [("questao_id", "texto"), ("area", "texto"), ("nivel", "texto"), ("tentativas", "inteiro"),
+                 ("acertos", "inteiro"), ("dificuldade", "real"), ("discriminacao", "real"),
+                 ("tempo_medio", "real"), ("tempo_desvio", "real"), ("exportado_em", "data")]
+}
+
+_ESPACOS = re.compile(r'[\s,:]*')
+
+
+def iterar_objeto_json(caminho, tamanho_bloco=BLOCO_LEITURA):
+    """Pares (chave, valor) de um arquivo com um objeto JSON, lidos em blocos (sem carregar o arquivo inteiro)"""
+    decodificador = json.JSONDecoder()
+    with open(caminho, 'r', encoding='utf-8') as f:
+        texto, pos, fim_arquivo = f.read(tamanho_bloco), 0, False
+        while texto.isspace():  # espaços antes do objeto ocupando blocos inteiros
+            bloco = f.read(tamanho_bloco)
+            if not bloco:
+                break
+            texto = bloco
+
+        def proximo_valor():
+            nonlocal texto, pos, fim_arquivo
+            while True:
+                pos = _ESPACOS.match(texto, pos).end()
+                if pos < len(texto) and texto[pos] == '}':
+                    return None, True
+                try:
+                    valor, fim = decodificador.raw_decode(texto, pos)
+                    if fim < len(texto) or fim_arquivo:  # um número no fim do bloco pode estar incompleto
+                        pos = fim
+                        return valor, False
+                except json.JSONDecodeError:
+                    if fim_arquivo:
+                        raise
+                bloco = f.read(tamanho_bloco)
+                fim_arquivo = not bloco
+                texto, pos = texto[pos:] + bloco, 0
+
+        pos = _ESPACOS.match(texto).end()
+        if texto[pos:pos + 1] != '{':
+            raise json.JSONDecodeError("Esperado um objeto JSON", texto, pos)
+        pos += 1
+        while True:
+            chave, terminou = proximo_valor()
+            if terminou:
+                return
+            valor, terminou = proximo_valor()
+            if terminou:
+                raise json.JSONDecodeError("Objeto JSON incompleto", texto, pos)
+            yield chave, valor
+
+
+def _data(texto):
+    """Data "AAAA-MM-DD HH:MM:SS" como datetime (None se ausente)"""
+    return datetime.fromisoformat(texto) if texto else None
+
+
+class EscritorColunar:
+    """Acumula linhas de uma tabela e grava um grupo de linhas a cada `linhas_grupo`; o arquivo só é
+    criado quando há alguma linha"""
+
+    def __init__(self, caminho, esquema, formato="parquet", linhas_grupo=LINHAS_GRUPO):
+        import pyarrow as pa
+
+        tipos = {"texto": pa.string(), "inteiro": pa.int64(), "real": pa.float64(), "data": pa.timestamp('s')}
+        self.pa = pa
+        self.caminho = caminho
+        self.esquema = pa.schema([(nome, tipos[tipo]) for nome, tipo in esquema])
+        self.formato = formato
+        self.linhas_grupo = linhas_grupo
+        self.colunas = [[] for _ in esquema]
+        self.escritor = None
+        self.linhas = 0
+
+    def acrescentar(self, *valores):
+        """Acrescenta uma linha (valores na ordem do esquema)"""
+        for coluna, valor in zip(self.colunas, valores):
+            coluna.append(valor)
+        if len(self.colunas[0]) >= self.linhas_grupo:
+            self._descarregar()
+
+    def _descarregar(self):
+        if not self.colunas[0]:
+            return
+        lote = self.pa.record_batch([self.pa.array(valores, type=campo.type)
+                                     for valores, campo in zip(self.colunas, self.esquema)], schema=self.esquema)
+        if self.escritor is None:
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+            if self.formato == "parquet":
+                import pyarrow.parquet as pq
+                self.escritor = pq.ParquetWriter(self.caminho, self.esquema)
+            else:
+                self.escritor = self.pa.ipc.new_file(self.caminho, self.esquema)
+        if self.formato == "parquet":
+            self.escritor.write_batch(lote, row_group_size=self.linhas_grupo)
+        else:
+            self.escritor.write_batch(lote)
+        self.linhas += len(self.colunas[0])
+        self.colunas = [[] for _ in self.colunas]
+
+    def fechar(self):
+        """Grava o último grupo e fecha o arquivo"""
+        self._descarregar()
+        if self.escritor is not None:
+            self.escritor.close()
+
+
+def carregar_marca(diretorio_saida):
+    """Marca d'água da última exportação e os contadores por aluno (vazia na primeira vez).
+
+    A marca registra posições de gravação, não datas: quantos usuários, bytes do livro de pontos e linhas
+    do registro de respostas já tinham sido lidos, e, por aluno (ordinal), quantos simulados e qual
+    diagnóstico (momento, em segundos) já foram exportados.
+    """
+    caminho = os.path.join(diretorio_saida, ARQUIVO_MARCA)
+    simulados, diagnosticos = array('I'), array('q')
+    if not os.path.exists(caminho):
+        return {"parte": 0}, simulados, diagnosticos
+    with open(caminho, 'r') as f:
+        marca = json.load(f)
+    if "contadores" in marca:
+        with open(os.path.join(diretorio_saida, marca["contadores"]), 'rb') as f:
+            simulados.fromfile(f, marca["usuarios"])
+            diagnosticos.fromfile(f, marca["usuarios"])
+    return marca, simulados, diagnosticos
+
+
+def salvar_marca(diretorio_saida, marca, simulados, diagnosticos):
+    """Grava os contadores num arquivo da parte e depois troca a marca de uma vez (temporário + rename).
+
+    A marca só passa a apontar para os contadores novos depois que tudo foi gravado; uma exportação
+    interrompida é refeita inteira na próxima vez.
+    """
+    os.makedirs(diretorio_saida, exist_ok=True)
+    marca["contadores"] = f"marca-{marca['parte']:05d}.bin"
+    with open(os.path.join(diretorio_saida, marca["contadores"]), 'wb') as f:
+        simulados.tofile(f)
+        diagnosticos.tofile(f)
+    caminho = os.path.join(diretorio_saida, ARQUIVO_MARCA)
+    with open(caminho + ".tmp", 'w') as f:
+        json.dump(marca, f)
+    os.replace(caminho + ".tmp", caminho)
+    for nome in os.listdir(diretorio_saida):
+        if nome.startswith("marca-") and nome != marca["contadores"]:
+            os.remove(os.path.join(diretorio_saida, nome))
+
+
+def emails_com_pontos(arquivo_livro, posicao):
+    """Alunos com lançamentos no livro de pontos depois do byte `posicao`; devolve (emails, nova posição)"""
+    emails = set()
+    if not os.path.exists(arquivo_livro):
+        return emails, posicao
+    with open(arquivo_livro, 'rb') as f:
+        f.seek(posicao)
+        for linha in f:
+            if not linha.endswith(b"\n"):  # linha ainda sendo escrita: fica para a próxima exportação
+                break
+            emails.add(json.loads(linha)['email'])
+            posicao += len(linha)
+    return emails, posicao
+
+
+def questoes_respondidas(diretorio_respostas, inicio, fim, linhas_bloco=1_000_000):
+    """Ordinais das questões respondidas nas linhas [inicio, fim) do registro colunar de respostas"""
+    import numpy as np
+
+    questoes = ler_colunas(diretorio_respostas, ['questao'])['questao']
+    ordinais = set()
+    for posicao in range(inicio, fim, linhas_bloco):
+        ordinais.update(np.unique(questoes[posicao:min(posicao + linhas_bloco, fim)]).tolist())
+    return ordinais
+
+
+def _momento(resultado):
+    """Momento (segundos desde a época) da data de um resultado, usado para reconhecer o diagnóstico exportado"""
+    return int(datetime.fromisoformat(resultado['data']).timestamp())
+
+
+def exportar(diretorio_dados, diretorio_saida, formato="parquet", completa=False, linhas_grupo=LINHAS_GRUPO):
+    """Exporta as quatro tabelas; incremental a partir da marca d'água, a menos que `completa`.
+
+    O incremental segue a ordem de gravação, não as datas: a lista de simulados de cada aluno só cresce,
+    então são exportados os simulados além dos já contados para ele (mesmo que a data seja antiga, como
+    os de um evento consolidado depois), o diagnóstico se mudou, os usuários, lançamentos de pontos e
+    respostas gravados depois das posições guardadas. Devolve o número de linhas gravadas por tabela.
+    """
+    marca, exportados, diagnosticos = carregar_marca(diretorio_saida)
+    if "usuarios" not in marca:  # primeira exportação (ou marca antiga, por datas): recomeça do zero
+        completa = True
+    if completa:
+        exportados, diagnosticos = array('I'), array('q')
+    parte = marca["parte"] + 1
+    agora = datetime.now().replace(microsecond=0)
+
+    # Uma exportação interrompida deixa arquivos desta parte sem marca: são descartados e refeitos
+    prefixo_parte = f"parte-{parte:05d}."
+    for tabela in ESQUEMAS:
+        diretorio_tabela = os.path.join(diretorio_saida, tabela)
+        for nome in os.listdir(diretorio_tabela) if os.path.isdir(diretorio_tabela) else []:
+            if nome.startswith(prefixo_parte):
+                os.remove(os.path.join(diretorio_tabela, nome))
+
+    escritores = {tabela: EscritorColunar(os.path.join(diretorio_saida, tabela, f"parte-{parte:05d}.{EXTENSOES[formato]}"),
+                                          esquema, formato, linhas_grupo)
+                  for tabela, esquema in ESQUEMAS.items()}
+
+    with open(os.path.join(diretorio_dados, 'usuarios.json'), 'r') as f:
+        usuarios = json.load(f)
+    ordinais = {u['email']: i for i, u in enumerate(usuarios)}
+    exportados.extend([0] * (len(usuarios) - len(exportados)))
+    diagnosticos.extend([0] * (len(usuarios) - len(diagnosticos)))
+    alterados, posicao_livro = emails_com_pontos(os.path.join(diretorio_dados, 'pontos.jsonl'),
+                                                 0 if completa else marca["posicao_livro"])
+    alterados |= {u['email'] for u in usuarios[0 if completa else marca["usuarios"]:]}  # cadastros novos
+    escritos = bytearray(len(usuarios))  # alunos com linha gravada nesta exportação
+
+    def escrever_aluno(usuario, desempenho_aluno):
+        gamificacao = desempenho_aluno.get('gamificacao', {})
+        simulados = desempenho_aluno.get('simulados', [])
+        diagnostico = desempenho_aluno.get('diagnostico_inicial')
+        ultimo = simulados[-1] if simulados else diagnostico
+        escritores["alunos"].acrescentar(
+            usuario['email'], usuario.get('nome'), usuario.get('escola'), usuario.get('serie'), usuario.get('idade'),
+            usuario.get('nivel'), _data(usuario.get('data_cadastro')), gamificacao.get('pontos', 0),
+            len(gamificacao.get('conquistas', [])), len(simulados),
+            diagnostico['percentual'] if diagnostico else None, ultimo['percentual'] if ultimo else None, agora)
+
+    def escrever_resultado(email, tipo, indice, resultado):
+        data = _data(resultado['data'])
+        escritores["resultados"].acrescentar(
+            email, tipo, indice, data, resultado.get('area'), resultado.get('nivel'), resultado['pontuacao'],
+            resultado['total_questoes'], resultado['percentual'])
+        for area, dados in resultado.get('desempenho_areas', {}).items():
+            if dados['total'] > 0:
+                escritores["resultados_areas"].acrescentar(
+                    email, tipo, indice, data, area, dados['acertos'], dados['total'],
+                    dados['acertos'] / dados['total'] * 100)
+
+    caminho_desempenho = os.path.join(diretorio_dados, 'desempenho.json')
+    pares = iterar_objeto_json(caminho_desempenho) if os.path.exists(caminho_desempenho) else ()
+    for email, desempenho_aluno in pares:
+        ordinal = ordinais.get(email)
+        if ordinal is None:  # desempenho de um e-mail sem cadastro
+            continue
+        novos = False
+        diagnostico = desempenho_aluno.get('diagnostico_inicial')
+        if diagnostico and _momento(diagnostico) != diagnosticos[ordinal]:
+            escrever_resultado(email, "diagnostico", 0, diagnostico)
+            diagnosticos[ordinal] = _momento(diagnostico)
+            novos = True
+        simulados = desempenho_aluno.get('simulados', [])
+        for indice in range(exportados[ordinal] + 1, len(simulados) + 1):
+            escrever_resultado(email, "simulado", indice, simulados[indice - 1])
+            novos = True
+        exportados[ordinal] = len(simulados)
+        if novos or email in alterados:
+            escrever_aluno(usuarios[ordinal], desempenho_aluno)
+            escritos[ordinal] = 1
+    for ordinal, usuario in enumerate(usuarios):  # alunos sem desempenho registrado
+        if not escritos[ordinal] and usuario['email'] in alterados:
+            escrever_aluno(usuario, {})
+
+    estatisticas = EstatisticasQuestoes(os.path.join(diretorio_dados, 'estatisticas_questoes.json'),
+                                        os.path.join(diretorio_dados, 'estatisticas_questoes.bin'))
+    questoes_por_id = {}
+    caminho_banco = os.path.join(diretorio_dados, 'banco_simulados.json')
+    if os.path.exists(caminho_banco):
+        with open(caminho_banco, 'r') as f:
+            questoes_por_id = {q['id']: q for q in json.load(f).get('questoes', [])}
+    diretorio_respostas = os.path.join(diretorio_dados, 'registro_respostas')
+    linhas_respostas = contar_linhas(diretorio_respostas)
+    ordinais_questoes = range(len(estatisticas.ids))
+    if not completa:
+        ordinais_questoes = sorted(o for o in questoes_respondidas(diretorio_respostas, marca["linhas_respostas"],
+                                                                   linhas_respostas) if o < len(estatisticas.ids))
+    for ordinal in ordinais_questoes:
+        questao_id = estatisticas.ids[ordinal]
+        questao = questoes_por_id.get(questao_id, {})
+        media, desvio = estatisticas.tempo_resposta(questao_id)
+        escritores["questoes"].acrescentar(
+            questao_id, questao.get('area'), questao.get('nivel'), estatisticas.tentativas[ordinal],
+            estatisticas.acertos[ordinal], estatisticas.dificuldade(questao_id),
+            estatisticas.discriminacao(questao_id), media, desvio, agora)
+
+    for escritor in escritores.values():
+        escritor.fechar()
+    if completa:  # a exportação completa substitui as partes anteriores
+        for tabela, escritor in escritores.items():
+            diretorio_tabela = os.path.dirname(escritor.caminho)
+            for nome in os.listdir(diretorio_tabela) if os.path.isdir(diretorio_tabela) else []:
+                if nome.startswith("parte-") and os.path.join(diretorio_tabela, nome) != escritor.caminho:
+                    os.remove(os.path.join(diretorio_tabela, nome))
+    salvar_marca(diretorio_saida, {"parte": parte, "usuarios": len(usuarios), "posicao_livro": posicao_livro,
+                                   "linhas_respostas": linhas_respostas}, exportados, diagnosticos)
+    return {tabela: escritor.linhas for tabela, escritor in escritores.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta alunos, resultados e estatísticas para Parquet/Arrow")
+    parser.add_argument('--dados', default=".", help="Diretório de dados do sistema")
+    parser.add_argument('--saida', default="exportacao_bi", help="Diretório da exportação")
+    parser.add_argument('--formato', choices=sorted(EXTENSOES), default="parquet", help="Formato dos arquivos")
+    parser.add_argument('--completa', action='store_true', help="Ignora a marca d'água e exporta tudo")
+    parser.add_argument('--linhas-grupo', type=int, default=LINHAS_GRUPO, help="Linhas por grupo gravado")
+    args = parser.parse_args()
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("A exportação requer pyarrow (pip install pyarrow).")
+        return
+
+    inicio = time.perf_counter()
+    try:
+        linhas = exportar(args.dados, args.saida, args.formato, args.completa, args.linhas_grupo)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Erro ao exportar dados: {e}")
+        return
+    duracao = time.perf_counter() - inicio
+    for tabela, quantidade in linhas.items():
+        print(f"{tabela}: {quantidade} linhas")
+    print(f"Exportação concluída em {duracao:.2f}s ({args.saida})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Grava uma sessão real do terminal e a reproduz de forma determinística para medir as telas.
+
+Gravar (usa o sistema normalmente e guarda as entradas digitadas e os dados iniciais):
+    python gravar_reproduzir.py gravar sessao.json
+
+Os dados iniciais são uma foto de todos os arquivos e diretórios de dados do sistema (os atributos
+ARQUIVO_* e DIRETORIO_*: JSONs, livro de pontos, contadores binários, registro de respostas, eventos...),
+tirada logo depois de o sistema abrir o diretório, com o conteúdo de cada arquivo em base64.
+
+Reproduzir (diretório de dados novo, `random` com a mesma semente, sem espera do usuário):
+    python gravar_reproduzir.py reproduzir sessao.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import base64
+import random
+import shutil
+import argparse
+import builtins
+import tempfile
+import importlib
+from collections import defaultdict
+
+PREFIXOS_DADOS = ("ARQUIVO_", "DIRETORIO_")  # atributos do sistema com os caminhos dos dados
+
+
+class FimDaGravacao(Exception):
+    """As entradas gravadas acabaram antes de o sistema terminar"""
+
+
+class ContadorSaida:
+    """Substitui o stdout durante a reprodução, descartando o texto e contando os bytes"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.escritas = 0
+
+    def write(self, texto):
+        self.bytes += len(texto.encode('utf-8'))
+        self.escritas += 1
+        return len(texto)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def carregar_modulo():
+    """Importa o módulo do programa principal"""
+    return importlib.import_module("enem_level_up_corrigido_(mvp)")
+
+
+def normalizar_tela(titulo):
+    """Nome da tela sem números variáveis (questão atual, cronômetro, nome do aluno)"""
+    titulo = titulo.split('|')[0].strip()
+    if titulo.startswith("OLÁ,"):
+        return "MENU PRINCIPAL"
+    return re.sub(r'\d+', '#', titulo)
+
+
+def fotografar_dados(sistema, diretorio_dados):
+    """Conteúdo (base64) de cada arquivo de dados do sistema e os diretórios, relativos a `diretorio_dados`"""
+    arquivos, diretorios = {}, []
+
+    def relativo(caminho):
+        return os.path.relpath(caminho, diretorio_dados).replace(os.sep, '/')
+
+    def ler(caminho):
+        with open(caminho, 'rb') as f:
+            arquivos[relativo(caminho)] = base64.b64encode(f.read()).decode('ascii')
+
+    caminhos = sorted(valor for nome, valor in vars(sistema).items()
+                      if nome.startswith(PREFIXOS_DADOS) and isinstance(valor, str))
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            for raiz, _, nomes in os.walk(caminho):
+                diretorios.append(relativo(raiz))
+                for nome in sorted(nomes):
+                    ler(os.path.join(raiz, nome))
+        elif os.path.exists(caminho):
+            ler(caminho)
+    return arquivos, diretorios
+
+
+def restaurar_dados(gravacao, diretorio):
+    """Recria no diretório os dados iniciais da gravação (versão 1: só os JSONs principais, em texto)"""
+    for relativo in gravacao.get("diretorios_iniciais", []):
+        os.makedirs(os.path.join(diretorio, relativo), exist_ok=True)
+    for relativo, conteudo in gravacao["dados_iniciais"].items():
+        caminho = os.path.join(diretorio, relativo)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        if gravacao.get("versao", 1) == 1:
+            with open(caminho, 'w') as f:
+                f.write(conteudo)
+        else:
+            with open(caminho, 'wb') as f:
+                f.write(base64.b64decode(conteudo))
+
+
+def gravar(arquivo, diretorio_dados, semente):
+    """Executa o sistema interativamente gravando cada entrada e o tempo de espera do usuário"""
+    modulo = carregar_modulo()
+    gravacao = {
+        "versao": 2,
+        "semente": semente,
+        "dados_iniciais": {},
+        "diretorios_iniciais": [],
+        "entradas": []
+    }
+
+    input_original = builtins.input
+    ler_com_prazo_original = modulo.ler_com_prazo
+
+    def input_gravado(mensagem=''):
+        inicio = time.perf_counter()
+        resposta = input_original(mensagem)
+        gravacao["entradas"].append({"tipo": "input", "mensagem": mensagem, "resposta": resposta,
+                                     "espera_ms": round((time.perf_counter() - inicio) * 1000)})
+        return resposta
+
+    def ler_com_prazo_gravado(mensagem, prazo_ns, atualizar=None, intervalo_seg=1.0):
+        inicio = time.perf_counter()
+        builtins.input = input_original  # fora de um terminal ler_com_prazo usa input()
+        try:
+            resposta = ler_com_prazo_original(mensagem, prazo_ns, atualizar, intervalo_seg)
+        finally:
+            builtins.input = input_gravado
+        gravacao["entradas"].append({"tipo": "prazo", "mensagem": mensagem, "resposta": resposta,
+                                     "espera_ms": round((time.perf_counter() - inicio) * 1000)})
+        return resposta
+
+    random.seed(semente)
+    sistema = modulo.SistemaEstudoENEM(diretorio_dados)
+    # A foto é tirada com o sistema já aberto: migrações e arquivos criados na abertura já estão nela
+    gravacao["dados_iniciais"], gravacao["diretorios_iniciais"] = fotografar_dados(sistema, diretorio_dados)
+    builtins.input = input_gravado
+    modulo.ler_com_prazo = ler_com_prazo_gravado
+    try:
+        sistema.iniciar()
+    except (KeyboardInterrupt, EOFError):
+        print("\nGravação interrompida.")
+    finally:
+        builtins.input = input_original
+        modulo.ler_com_prazo = ler_com_prazo_original
+        with open(arquivo, 'w') as f:
+            json.dump(gravacao, f, indent=4, ensure_ascii=False)
+        print(f"\n{len(gravacao['entradas'])} entradas gravadas em {arquivo}")
+
+
+def reproduzir(arquivo, diretorio_dados=None):
+    """Reproduz a gravação em um diretório de dados novo e retorna as medições por ação"""
+    with open(arquivo, 'r') as f:
+        gravacao = json.load(f)
+
+    diretorio = diretorio_dados or tempfile.mkdtemp(prefix="reproducao_enem_")
+    os.makedirs(diretorio, exist_ok=True)
+    restaurar_dados(gravacao, diretorio)
+
+    modulo = carregar_modulo()
+    entradas = iter(gravacao["entradas"])
+    medicoes = defaultdict(list)  # (tela, resposta) -> durações em segundos
+    estado = {"tela": "INÍCIO", "ultima_acao": None, "marca": None}
+    saida = ContadorSaida()
+    gravacoes = {"quantidade": 0, "tempo": 0.0}
+
+    def proxima_entrada(mensagem):
+        agora = time.perf_counter()
+        if estado["ultima_acao"] is not None:
+            medicoes[estado["ultima_acao"]].append(agora - estado["marca"])
+        try:
+            entrada = next(entradas)
+        except StopIteration:
+            raise FimDaGravacao()
+        saida.write(mensagem)
+        estado["ultima_acao"] = (estado["tela"], entrada["resposta"] if entrada["resposta"] is not None else "<tempo>")
+        estado["marca"] = time.perf_counter()
+        return entrada["resposta"]
+
+    def ler_com_prazo_reproduzido(mensagem, prazo_ns, atualizar=None, intervalo_seg=1.0):
+        resposta = proxima_entrada(mensagem)
+        return resposta.strip() if resposta is not None else None
+
+    input_original, stdout_original = builtins.input, sys.stdout
+    ler_com_prazo_original = modulo.ler_com_prazo
+
+    random.seed(gravacao["semente"])
+    builtins.input = proxima_entrada
+    modulo.ler_com_prazo = ler_com_prazo_reproduzido
+    sys.stdout = saida
+    inicio = time.perf_counter()
+    completa = True
+    try:
+        sistema = modulo.SistemaEstudoENEM(diretorio)
+        sistema.limpar_tela = lambda: None
+
+        mostrar_titulo_original = sistema.mostrar_titulo
+        def mostrar_titulo(titulo):
+            estado["tela"] = normalizar_tela(titulo)
+            mostrar_titulo_original(titulo)
+        sistema.mostrar_titulo = mostrar_titulo
+
+        salvar_dados_original = sistema.salvar_dados
+        def salvar_dados(conteudos=None):
+            inicio_gravacao = time.perf_counter()
+            salvar_dados_original(conteudos)
+            gravacoes["quantidade"] += 1
+            gravacoes["tempo"] += time.perf_counter() - inicio_gravacao
+        sistema.salvar_dados = salvar_dados
+
+        sistema.iniciar()
+    except FimDaGravacao:
+        completa = False
+    finally:
+        tempo_total = time.perf_counter() - inicio
+        if estado["ultima_acao"] is not None:
+            medicoes[estado["ultima_acao"]].append(time.perf_counter() - estado["marca"])
+        builtins.input, sys.stdout = input_original, stdout_original
+        modulo.ler_com_prazo = ler_com_prazo_original
+
+    tamanho_dados = 0
+    for raiz, _, arquivos in os.walk(diretorio):
+        tamanho_dados += sum(os.path.getsize(os.path.join(raiz, nome)) for nome in arquivos)
+    if not diretorio_dados:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    return {
+        "completa": completa,
+        "entradas": len(gravacao["entradas"]),
+        "espera_usuario_ms": sum(e.get("espera_ms", 0) for e in gravacao["entradas"]),
+        "tempo_total": tempo_total,
+        "medicoes": medicoes,
+        "bytes_saida": saida.bytes,
+        "escritas_saida": saida.escritas,
+        "gravacoes": gravacoes["quantidade"],
+        "tempo_gravacoes": gravacoes["tempo"],
+        "bytes_dados": tamanho_dados
+    }
+
+
+def mostrar_relatorio(relatorio):
+    """Exibe o tempo por ação de menu e o total de E/S da reprodução"""
+    print("=" * 70)
+    print("REPRODUÇÃO DA SESSÃO".center(70))
+    print("=" * 70)
+    if not relatorio["completa"]:
+        print("⚠️ As entradas gravadas acabaram antes do fim da sessão.")
+    print(f"Entradas: {relatorio['entradas']} | Tempo total: {relatorio['tempo_total'] * 1000:.1f} ms "
+          f"(usuário levou {relatorio['espera_usuario_ms'] / 1000:.1f}s na gravação)")
+
+    print(f"\n{'Tela':<36}{'Entrada':<10}{'Vezes':>6}{'Média ms':>10}{'Máx ms':>10}")
+    acoes = sorted(relatorio["medicoes"].items(), key=lambda item: sum(item[1]), reverse=True)
+    for (tela, resposta), duracoes in acoes:
+        print(f"{tela[:35]:<36}{str(resposta)[:9]:<10}{len(duracoes):>6}"
+              f"{sum(duracoes) / len(duracoes) * 1000:>10.2f}{max(duracoes) * 1000:>10.2f}")
+
+    print(f"\nSaída no terminal: {relatorio['bytes_saida'] / 1024:.1f} KiB em {relatorio['escritas_saida']} escritas")
+    print(f"Gravações (salvar_dados): {relatorio['gravacoes']} em {relatorio['tempo_gravacoes'] * 1000:.1f} ms")
+    print(f"Dados no diretório ao final: {relatorio['bytes_dados'] / 1024:.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grava e reproduz sessões interativas do sistema")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    parser_gravar = subparsers.add_parser("gravar", help="Usa o sistema gravando as entradas")
+    parser_gravar.add_argument("arquivo", help="Arquivo da gravação (JSON)")
+    parser_gravar.add_argument("--dados", default=".", help="Diretório de dados usado na gravação")
+    parser_gravar.add_argument("--semente", type=int, default=0, help="Semente do `random`")
+
+    parser_reproduzir = subparsers.add_parser("reproduzir", help="Reproduz uma gravação e mede as telas")
+    parser_reproduzir.add_argument("arquivo", help="Arquivo da gravação (JSON)")
+    parser_reproduzir.add_argument("--dados", default=None,
+                                   help="Diretório de dados para a reprodução (padrão: temporário, apagado ao final)")
+    parser_reproduzir.add_argument("--repeticoes", type=int, default=1, help="Número de reproduções")
+
+    args = parser.parse_args()
+    if args.comando == "gravar":
+        gravar(args.arquivo, args.dados, args.semente)
+    else:
+        for _ in range(args.repeticoes):
+            mostrar_relatorio(reproduzir(args.arquivo, args.dados))
+
+
+if __name__ == "__main__":
+    main()
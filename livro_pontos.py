@@ -0,0 +1,159 @@
+"""Livro de pontos somente de acréscimo: cada ganho ou gasto de pontos vira um lançamento
+(e-mail, variação, motivo, momento) numa linha de `pontos.jsonl`.
+
+O saldo de cada aluno fica em cache (leitura O(1)) e é gravado periodicamente num checkpoint com a
+posição do livro já aplicada; ao iniciar, só os lançamentos depois do checkpoint são relidos. Os pontos
+ganhos por dia ficam em somas acumuladas, então o total de uma semana ou de um mês é a diferença de
+duas buscas binárias. Débitos são feitos com o arquivo travado (flock), depois de aplicar o que outros
+processos tenham lançado, para dois resgates simultâneos não gastarem o mesmo saldo.
+"""
+import os
+import json
+import time
+import threading
+from datetime import date
+
+try:
+    import fcntl
+except ImportError:  # Windows: a trava entre processos não está disponível, só a trava entre threads
+    fcntl = None
+
+CHECKPOINT_A_CADA = 500  # lançamentos
+JANELA_DIAS = 62         # dias de pontos diários mantidos no checkpoint (cobre o mês anterior inteiro)
+
+
+class LivroPontos:
+    """Lançamentos de pontos com saldo em cache, checkpoints e totais por período"""
+
+    def __init__(self, arquivo_livro, arquivo_checkpoint, checkpoint_a_cada=CHECKPOINT_A_CADA):
+        self.ARQUIVO_LIVRO = arquivo_livro
+        self.ARQUIVO_CHECKPOINT = arquivo_checkpoint
+        self.checkpoint_a_cada = checkpoint_a_cada
+        self.trava = threading.Lock()
+        self.saldos = {}
+        self.diarios = {}     # email -> [[dia (ordinal), pontos ganhos acumulados até o dia]]
+        self.posicao = 0      # bytes do livro já aplicados
+        self.desde_checkpoint = 0
+        self.carregar()
+
+    def carregar(self):
+        """Carrega o último checkpoint e aplica os lançamentos gravados depois dele"""
+        if os.path.exists(self.ARQUIVO_CHECKPOINT):
+            try:
+                with open(self.ARQUIVO_CHECKPOINT, 'r') as f:
+                    checkpoint = json.load(f)
+                self.saldos = checkpoint['saldos']
+                self.diarios = checkpoint['diarios']
+                self.posicao = checkpoint['posicao']
+            except (json.JSONDecodeError, IOError, KeyError) as e:
+                print(f"Erro ao carregar checkpoint de pontos: {e}")
+                self.saldos, self.diarios, self.posicao = {}, {}, 0
+        if os.path.exists(self.ARQUIVO_LIVRO):
+            with open(self.ARQUIVO_LIVRO, 'rb') as f:
+                self._alcancar(f)
+
+    def _alcancar(self, f):
+        """Aplica as linhas completas do livro a partir da posição atual"""
+        f.seek(self.posicao)
+        while True:
+            linha = f.readline()
+            if not linha.endswith(b"\n"):  # fim do arquivo ou linha ainda sendo escrita
+                break
+            self._aplicar(json.loads(linha))
+            self.posicao += len(linha)
+            self.desde_checkpoint += 1
+
+    def _aplicar(self, lancamento):
+        email, variacao = lancamento['email'], lancamento['variacao']
+        self.saldos[email] = self.saldos.get(email, 0) + variacao
+        if variacao > 0:
+            dia = date.fromtimestamp(lancamento['momento']).toordinal()
+            dias = self.diarios.setdefault(email, [])
+            acumulado = dias[-1][1] if dias else 0
+            if dias and dias[-1][0] >= dia:
+                dias[-1][1] += variacao  # mesmo dia (ou relógio que voltou): soma no último
+            else:
+                dias.append([dia, acumulado + variacao])
+
+    def _lancar(self, email, variacao, motivo, momento=None, exigir_saldo=False):
+        """Acrescenta um lançamento com o livro travado; com `exigir_saldo`, só lança se houver saldo"""
+        with self.trava:
+            with open(self.ARQUIVO_LIVRO, 'ab+') as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    self._alcancar(f)  # lançamentos de outros processos desde a última leitura
+                    if exigir_saldo and self.saldos.get(email, 0) + variacao < 0:
+                        return False
+                    lancamento = {"email": email, "variacao": variacao, "motivo": motivo,
+                                  "momento": time.time() if momento is None else momento}
+                    linha = (json.dumps(lancamento, ensure_ascii=False) + "\n").encode('utf-8')
+                    f.write(linha)
+                    f.flush()
+                    self._aplicar(lancamento)
+                    self.posicao += len(linha)
+                    self.desde_checkpoint += 1
+                finally:
+                    if fcntl:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            if self.desde_checkpoint >= self.checkpoint_a_cada:
+                self._salvar_checkpoint()
+        return True
+
+    def creditar(self, email, pontos, motivo, momento=None):
+        """Lança um ganho de pontos (no momento atual, se `momento` não for informado)"""
+        self._lancar(email, pontos, motivo, momento)
+
+    def debitar(self, email, pontos, motivo):
+        """Lança um gasto de pontos se o saldo (já com os lançamentos de outros processos) permitir"""
+        return self._lancar(email, -pontos, motivo, exigir_saldo=True)
+
+    def saldo(self, email):
+        """Saldo atual em O(1)"""
+        return self.saldos.get(email, 0)
+
+    def possui_lancamentos(self, email):
+        """Indica se o e-mail já tem algum lançamento no livro"""
+        return email in self.saldos
+
+    def pontos_periodo(self, email, inicio, fim):
+        """Pontos ganhos entre as datas `inicio` e `fim` (inclusive) em O(log n)"""
+        dias = self.diarios.get(email, [])
+
+        def acumulado_ate(dia):
+            i = _bisect_dias(dias, dia)
+            return dias[i - 1][1] if i > 0 else 0
+
+        return acumulado_ate(fim.toordinal()) - acumulado_ate(inicio.toordinal() - 1)
+
+    def _salvar_checkpoint(self):
+        limite = date.today().toordinal() - JANELA_DIAS
+        for email, dias in self.diarios.items():
+            # Mantém um dia anterior à janela como base das somas acumuladas
+            corte = _bisect_dias(dias, limite)
+            if corte > 1:
+                del dias[:corte - 1]
+        try:
+            with open(self.ARQUIVO_CHECKPOINT + ".tmp", 'w') as f:
+                json.dump({"posicao": self.posicao, "saldos": self.saldos, "diarios": self.diarios}, f)
+            os.replace(self.ARQUIVO_CHECKPOINT + ".tmp", self.ARQUIVO_CHECKPOINT)
+            self.desde_checkpoint = 0
+        except IOError as e:
+            print(f"Erro ao salvar checkpoint de pontos: {e}")
+
+    def salvar(self):
+        """Grava um checkpoint do estado atual"""
+        with self.trava:
+            self._salvar_checkpoint()
+
+
+def _bisect_dias(dias, dia):
+    """bisect_right pela primeira coluna de [[dia, acumulado]]"""
+    baixo, alto = 0, len(dias)
+    while baixo < alto:
+        meio = (baixo + alto) // 2
+        if dias[meio][0] <= dia:
+            baixo = meio + 1
+        else:
+            alto = meio
+    return baixo
@@ -0,0 +1,251 @@
+"""Montagem automática de formas paralelas de simulado a partir do banco de questões.
+
+Cada forma respeita as cotas por área e por nível de dificuldade, as formas não compartilham
+questões, e a curva de informação (TRI) de todas as formas fica próxima de uma mesma curva alvo.
+A montagem é gulosa (cada vaga recebe, entre alguns candidatos sorteados, a questão que mais
+aproxima a forma do alvo) e depois uma busca local troca questões do mesmo grupo (área, nível)
+entre formas, ou com questões não usadas, enquanto a diferença entre as curvas diminuir.
+
+Uso: python montagem_formas.py --banco banco_simulados.json --formas 10 --questoes 180
+"""
+import time
+import json
+import random
+import argparse
+from collections import defaultdict
+
+from tri import parametros_questao, informacao_questao
+
+# Pontos de proficiência em que as curvas de informação das formas são comparadas
+PONTOS_THETA = (-2.0, -1.0, 0.0, 1.0, 2.0)
+# Proporção de questões de cada nível em uma forma
+DISTRIBUICAO_NIVEIS = {"Fácil": 0.3, "Médio": 0.4, "Difícil": 0.3}
+# Candidatos sorteados do grupo para preencher cada vaga na fase gulosa
+CANDIDATOS_POR_VAGA = 40
+
+
+def calcular_cotas(total, proporcoes):
+    """Divide `total` vagas segundo as proporções, arredondando pelos maiores restos"""
+    soma = sum(proporcoes.values())
+    if soma <= 0:
+        return {chave: 0 for chave in proporcoes}
+    exatas = {chave: total * p / soma for chave, p in proporcoes.items()}
+    cotas = {chave: int(valor) for chave, valor in exatas.items()}
+    sobra = total - sum(cotas.values())
+    for chave in sorted(exatas, key=lambda k: exatas[k] - cotas[k], reverse=True)[:sobra]:
+        cotas[chave] += 1
+    return cotas
+
+
+def _cotas_grupos(grupos, num_formas, tamanho, cotas_areas, distribuicao_niveis):
+    """Cotas por forma de cada grupo (área, nível), remanejando vagas de grupos sem questões suficientes"""
+    areas = sorted({area for area, _ in grupos})
+    if cotas_areas is None:
+        cotas_areas = calcular_cotas(tamanho, {area: 1 for area in areas})
+
+    cotas = {}
+    for area, cota_area in cotas_areas.items():
+        niveis = {nivel: p for nivel, p in distribuicao_niveis.items()}
+        for (area_grupo, nivel) in grupos:
+            if area_grupo == area:
+                niveis.setdefault(nivel, 0)
+        for nivel, cota in calcular_cotas(cota_area, niveis).items():
+            cotas[(area, nivel)] = cota
+
+    # Vagas que um grupo não consegue preencher em todas as formas passam para outro grupo,
+    # de preferência da mesma área
+    capacidade = {grupo: len(grupos.get(grupo, [])) // num_formas for grupo in cotas}
+    faltando = []
+    for grupo, cota in cotas.items():
+        if cota > capacidade[grupo]:
+            faltando.append((grupo[0], cota - capacidade[grupo]))
+            cotas[grupo] = capacidade[grupo]
+    for area, vagas in faltando:
+        ordem = sorted(cotas, key=lambda g: (g[0] != area, cotas[g] - capacidade[g]))
+        for grupo in ordem:
+            livres = capacidade[grupo] - cotas[grupo]
+            usar = min(livres, vagas)
+            cotas[grupo] += usar
+            vagas -= usar
+            if vagas == 0:
+                break
+        if vagas:
+            raise ValueError(f"O banco não tem questões suficientes para {num_formas} formas de {tamanho} questões.")
+    return {grupo: cota for grupo, cota in cotas.items() if cota > 0}
+
+
+def _distancia(curva, alvo):
+    return sum((x - y) ** 2 for x, y in zip(curva, alvo))
+
+
+def montar_formas(questoes, num_formas, tamanho, cotas_areas=None, distribuicao_niveis=None,
+                  iteracoes=None, tempo_limite_seg=None, semente=None):
+    """Monta `num_formas` formas paralelas de `tamanho` questões, sem questões repetidas entre elas.
+
+    `cotas_areas` ({área: questões por forma}) tem como padrão a divisão igual entre as áreas do banco.
+    A busca local para em `iteracoes` trocas; com a mesma `semente` o resultado é sempre o mesmo.
+    `tempo_limite_seg` corta a busca também pelo relógio (medições), o que deixa o resultado dependente
+    da velocidade da máquina. Retorna a lista de formas (listas de questões).
+    """
+    rng = random.Random(semente)
+    distribuicao_niveis = distribuicao_niveis or DISTRIBUICAO_NIVEIS
+    if tamanho * num_formas > len(questoes):
+        raise ValueError(f"O banco não tem questões suficientes para {num_formas} formas de {tamanho} questões.")
+
+    # Curva de informação de cada questão; questões sem calibração própria compartilham os parâmetros
+    # do nível, então o cálculo é feito uma vez por conjunto de parâmetros
+    curvas_parametros = {}
+    curvas = []
+    grupos = defaultdict(list)  # (área, nível) -> índices das questões
+    for i, questao in enumerate(questoes):
+        parametros = parametros_questao(questao)
+        curva = curvas_parametros.get(parametros)
+        if curva is None:
+            curva = tuple(informacao_questao(theta, *parametros) for theta in PONTOS_THETA)
+            curvas_parametros[parametros] = curva
+        curvas.append(curva)
+        grupos[(questao['area'], questao.get('nivel'))].append(i)
+
+    cotas = _cotas_grupos(grupos, num_formas, tamanho, cotas_areas, distribuicao_niveis)
+
+    # Alvo: curva esperada de uma forma com as cotas, usando a informação média de cada grupo
+    alvo = [0.0] * len(PONTOS_THETA)
+    for grupo, cota in cotas.items():
+        indices = grupos[grupo]
+        for k in range(len(PONTOS_THETA)):
+            alvo[k] += cota * sum(curvas[i][k] for i in indices) / len(indices)
+
+    # Fase gulosa: vaga a vaga, a forma mais distante do alvo escolhe a questão que mais a aproxima
+    # da parte do alvo que ainda falta, entre alguns candidatos sorteados do grupo
+    livres = {grupo: grupos[grupo][:] for grupo in cotas}
+    for indices in livres.values():
+        rng.shuffle(indices)
+    formas = [[] for _ in range(num_formas)]
+    curvas_formas = [[0.0] * len(PONTOS_THETA) for _ in range(num_formas)]
+    vagas = [grupo for grupo, cota in cotas.items() for _ in range(cota)]
+    rng.shuffle(vagas)
+
+    for grupo in vagas:
+        disponiveis = livres[grupo]
+        ordem_formas = sorted(range(num_formas), key=lambda f: _distancia(curvas_formas[f], alvo), reverse=True)
+        for f in ordem_formas:
+            restantes = tamanho - len(formas[f])
+            desejada = [(alvo[k] - curvas_formas[f][k]) / restantes for k in range(len(PONTOS_THETA))]
+            inicio = max(0, len(disponiveis) - CANDIDATOS_POR_VAGA)
+            melhor = min(range(inicio, len(disponiveis)), key=lambda p: _distancia(curvas[disponiveis[p]], desejada))
+            # Retira o escolhido trocando-o pelo último da lista (O(1))
+            disponiveis[melhor], disponiveis[-1] = disponiveis[-1], disponiveis[melhor]
+            escolhida = disponiveis.pop()
+            formas[f].append(escolhida)
+            curva = curvas[escolhida]
+            for k in range(len(PONTOS_THETA)):
+                curvas_formas[f][k] += curva[k]
+
+    # Busca local: trocas dentro do mesmo grupo, aceitas só quando reduzem a soma das distâncias ao alvo
+    posicoes_grupo = defaultdict(list)  # grupo -> [(forma, posição)]
+    for f, forma in enumerate(formas):
+        for p, i in enumerate(forma):
+            posicoes_grupo[(questoes[i]['area'], questoes[i].get('nivel'))].append((f, p))
+    lista_grupos = list(posicoes_grupo)
+    iteracoes = iteracoes if iteracoes is not None else 200 * num_formas * tamanho
+    fim = time.perf_counter() + tempo_limite_seg if tempo_limite_seg is not None else None
+
+    for iteracao in range(iteracoes):
+        if fim is not None and iteracao % 1000 == 0 and time.perf_counter() > fim:
+            break
+        grupo = rng.choice(lista_grupos)
+        f, p = rng.choice(posicoes_grupo[grupo])
+        atual = formas[f][p]
+        trocar_com_livre = num_formas == 1 or (livres[grupo] and rng.random() < 0.5)
+        if trocar_com_livre:
+            if not livres[grupo]:
+                continue
+            q = rng.randrange(len(livres[grupo]))
+            nova = livres[grupo][q]
+            curva_f = [curvas_formas[f][k] - curvas[atual][k] + curvas[nova][k] for k in range(len(PONTOS_THETA))]
+            if _distancia(curva_f, alvo) < _distancia(curvas_formas[f], alvo):
+                formas[f][p], livres[grupo][q] = nova, atual
+                curvas_formas[f] = curva_f
+        else:
+            g, r = rng.choice(posicoes_grupo[grupo])
+            if g == f:
+                continue
+            outra = formas[g][r]
+            curva_f = [curvas_formas[f][k] - curvas[atual][k] + curvas[outra][k] for k in range(len(PONTOS_THETA))]
+            curva_g = [curvas_formas[g][k] - curvas[outra][k] + curvas[atual][k] for k in range(len(PONTOS_THETA))]
+            antes = _distancia(curvas_formas[f], alvo) + _distancia(curvas_formas[g], alvo)
+            if _distancia(curva_f, alvo) + _distancia(curva_g, alvo) < antes:
+                formas[f][p], formas[g][r] = outra, atual
+                curvas_formas[f], curvas_formas[g] = curva_f, curva_g
+
+    resultado = []
+    for forma in formas:
+        rng.shuffle(forma)
+        resultado.append([questoes[i] for i in forma])
+    return resultado
+
+
+def curva_informacao(forma):
+    """Informação total da forma em cada ponto de PONTOS_THETA"""
+    curva = [0.0] * len(PONTOS_THETA)
+    for questao in forma:
+        parametros = parametros_questao(questao)
+        for k, theta in enumerate(PONTOS_THETA):
+            curva[k] += informacao_questao(theta, *parametros)
+    return curva
+
+
+def banco_sintetico(num_questoes, semente=None):
+    """Banco de questões com parâmetros TRI variados, para medir a montagem"""
+    rng = random.Random(semente)
+    areas = ["Linguagens", "Matemática", "Ciências Da Natureza", "Ciências Humanas"]
+    questoes = []
+    for i in range(1, num_questoes + 1):
+        nivel = rng.choice(list(DISTRIBUICAO_NIVEIS))
+        b = {"Fácil": -1.0, "Médio": 0.0, "Difícil": 1.0}[nivel] + rng.gauss(0, 0.5)
+        questoes.append({
+            "id": f"Q{i}",
+            "area": areas[i % len(areas)],
+            "nivel": nivel,
+            "tri": {"a": round(rng.uniform(0.5, 2.5), 3), "b": round(b, 3), "c": round(rng.uniform(0.1, 0.25), 3)}
+        })
+    return questoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Montagem de formas paralelas de simulado")
+    parser.add_argument('--banco', default=None, help="Arquivo do banco de simulados (padrão: banco sintético)")
+    parser.add_argument('--questoes-banco', type=int, default=50000, help="Tamanho do banco sintético")
+    parser.add_argument('--formas', type=int, default=10, help="Número de formas")
+    parser.add_argument('--questoes', type=int, default=180, help="Questões por forma")
+    parser.add_argument('--tempo-limite', type=float, default=2.0, help="Tempo máximo da busca local (s)")
+    parser.add_argument('--semente', type=int, default=None, help="Semente do gerador aleatório")
+    args = parser.parse_args()
+
+    if args.banco:
+        with open(args.banco, 'r') as f:
+            questoes = json.load(f).get('questoes', [])
+    else:
+        questoes = banco_sintetico(args.questoes_banco, args.semente)
+
+    inicio = time.perf_counter()
+    formas = montar_formas(questoes, args.formas, args.questoes, tempo_limite_seg=args.tempo_limite,
+                           semente=args.semente)
+    duracao = time.perf_counter() - inicio
+
+    print("=" * 60)
+    print("MONTAGEM DE FORMAS PARALELAS".center(60))
+    print("=" * 60)
+    print(f"{len(formas)} formas de {args.questoes} questões a partir de {len(questoes)} em {duracao:.2f}s")
+    print(f"\n{'Forma':<8}" + "".join(f"{'θ=' + format(t, '+.0f'):>10}" for t in PONTOS_THETA))
+    curvas = [curva_informacao(forma) for forma in formas]
+    for n, curva in enumerate(curvas, 1):
+        print(f"{n:<8}" + "".join(f"{x:>10.2f}" for x in curva))
+    amplitude = max(max(c[k] for c in curvas) - min(c[k] for c in curvas) for k in range(len(PONTOS_THETA)))
+    print(f"\nMaior diferença entre formas em um ponto θ: {amplitude:.3f}")
+    usadas = [q['id'] for forma in formas for q in forma]
+    print(f"Questões repetidas entre formas: {len(usadas) - len(set(usadas))}")
+
+
+if __name__ == "__main__":
+    main()
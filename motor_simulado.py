@@ -0,0 +1,308 @@
+"""Motor sem interface (sem input/print) das sessões de simulado e do teste diagnóstico.
+
+As telas do SistemaEstudoENEM usam este motor para a lógica de correção e gravação, e o mesmo motor
+pode ser chamado diretamente por scripts, testes de carga e outras interfaces:
+
+    sessao = motor.iniciar_simulado(email, area, simulado)
+    while (questao := motor.proxima_questao(sessao)) is not None:
+        motor.responder(sessao, 3)
+    resultado, novidades = motor.finalizar(sessao)
+
+O motor não mostra nada: as conquistas e os níveis desbloqueados voltam em `novidades` (mensagens) para a
+interface decidir como exibi-los.
+"""
+import time
+import random
+import itertools
+import threading
+from datetime import datetime
+from collections import defaultdict
+
+from barramento import SimuladoConcluido, DiagnosticoConcluido
+
+NUM_QUESTOES_DIAGNOSTICO = 10
+
+
+class SessaoSimulado:
+    """Estado de uma sessão em andamento"""
+
+    def __init__(self, tipo, email, area, titulo, questoes, duracao_min=None):
+        self.tipo = tipo  # "simulado" ou "diagnostico"
+        self.email = email
+        self.area = area
+        self.titulo = titulo
+        self.questoes = questoes
+        self.indice = 0
+        self.acertos = 0
+        self.desempenho_areas = defaultdict(lambda: {'acertos': 0, 'total': 0})
+        self.respostas = {}   # id da questão -> resposta ('1'-'5')
+        self.tempos = {}      # id da questão -> tempos (ms) de exibição, resposta e revisão
+        self.momentos = {}    # id da questão -> momento (epoch) da resposta
+        self.inicio_ns = time.monotonic_ns()
+        self.prazo_ns = self.inicio_ns + duracao_min * 60 * 1_000_000_000 if duracao_min else None
+        self.exibida_ns = None
+        self.respondida_ns = None
+        self.tempo_esgotado = False
+        self.finalizada = False
+
+    def restante_seg(self):
+        """Segundos restantes até o prazo (None se a sessão não tem prazo)"""
+        if self.prazo_ns is None:
+            return None
+        return (self.prazo_ns - time.monotonic_ns()) / 1e9
+
+    def fechar_revisao(self):
+        """Registra o tempo de revisão da última questão respondida"""
+        if self.respondida_ns is not None:
+            questao_id = self.questoes[self.indice - 1]['id']
+            self.tempos[questao_id]['revisao_ms'] = (time.monotonic_ns() - self.respondida_ns) // 1_000_000
+            self.respondida_ns = None
+
+
+class MotorSimulado:
+    """API sem interface para sessões de simulado e diagnóstico sobre um SistemaEstudoENEM"""
+
+    def __init__(self, sistema):
+        self.sistema = sistema
+        self.sessoes = {}
+        self.trava_sessoes = threading.Lock()  # Protege só o dicionário de sessões
+        self.trava = threading.Lock()  # Protege os dados compartilhados do sistema (só mudanças em memória)
+        self.trava_gravacao = threading.Lock()  # Uma gravação dos arquivos por vez, fora da trava dos dados
+        self.versao_dados = 0    # mudanças em memória pedidas para gravar
+        self.versao_gravada = 0  # última versão já gravada nos arquivos
+        self._ids = itertools.count(1)
+        self.tempo_persistencia_ns = 0
+        self.gravacoes = 0
+
+    def _nova_sessao(self, sessao):
+        sessao_id = next(self._ids)
+        with self.trava_sessoes:
+            self.sessoes[sessao_id] = sessao
+        return sessao_id
+
+    def iniciar_simulado(self, email, area, simulado):
+        """Inicia um simulado a partir do dicionário montado pelas telas e retorna o id da sessão"""
+        if not simulado['questoes_lista']:
+            raise ValueError("O simulado não tem questões.")
+        return self._nova_sessao(SessaoSimulado("simulado", email, area, simulado['titulo'],
+                                                simulado['questoes_lista'], simulado['duracao']))
+
+    def iniciar_diagnostico(self, email, num_questoes=NUM_QUESTOES_DIAGNOSTICO):
+        """Inicia o teste diagnóstico com questões aleatórias do banco e retorna o id da sessão"""
+        questoes = self.sistema.simulados.get('questoes', [])
+        if not questoes:
+            raise ValueError("Não há questões disponíveis para o teste diagnóstico.")
+        questoes_teste = random.sample(questoes, min(num_questoes, len(questoes)))
+        return self._nova_sessao(SessaoSimulado("diagnostico", email, None, "Teste Diagnóstico", questoes_teste))
+
+    def tempo_esgotado(self, sessao_id):
+        """Indica se a sessão terminou por fim do tempo"""
+        return self.sessoes[sessao_id].tempo_esgotado
+
+    def proxima_questao(self, sessao_id):
+        """Retorna a próxima questão (sem o gabarito), ou None se acabaram as questões ou o tempo"""
+        sessao = self.sessoes[sessao_id]
+        sessao.fechar_revisao()
+        if sessao.indice >= len(sessao.questoes):
+            return None
+
+        restante = sessao.restante_seg()
+        if restante is not None and restante <= 0:
+            sessao.tempo_esgotado = True
+            return None
+
+        questao = sessao.questoes[sessao.indice]
+        sessao.exibida_ns = time.monotonic_ns()
+        return {
+            "numero": sessao.indice + 1,
+            "total": len(sessao.questoes),
+            "id": questao['id'],
+            "area": questao['area'],
+            "enunciado": questao['enunciado'],
+            "alternativas": questao['alternativas'],
+            "tempo_restante_seg": restante,
+            "decorrido_ns": sessao.exibida_ns - sessao.inicio_ns,
+            "prazo_ns": sessao.prazo_ns
+        }
+
+    def responder(self, sessao_id, resposta):
+        """Responde a questão exibida com uma alternativa de 1 a 5 e retorna a correção"""
+        sessao = self.sessoes[sessao_id]
+        resposta = str(resposta).strip()
+        if resposta not in ['1', '2', '3', '4', '5']:
+            raise ValueError("Resposta inválida. Use 1, 2, 3, 4 ou 5.")
+        if sessao.exibida_ns is None:
+            raise ValueError("Nenhuma questão exibida para responder.")
+
+        agora_ns = time.monotonic_ns()
+        if sessao.prazo_ns is not None and agora_ns >= sessao.prazo_ns:
+            sessao.tempo_esgotado = True
+            return None
+
+        questao = sessao.questoes[sessao.indice]
+        correta = chr(65 + int(resposta) - 1) == questao['resposta_correta']
+        sessao.respostas[questao['id']] = resposta
+        sessao.momentos[questao['id']] = time.time()
+        sessao.tempos[questao['id']] = {
+            "area": questao['area'],
+            "exibida_ms": (sessao.exibida_ns - sessao.inicio_ns) // 1_000_000,  # desde o início do simulado
+            "resposta_ms": (agora_ns - sessao.exibida_ns) // 1_000_000,
+            "revisao_ms": 0
+        }
+        sessao.desempenho_areas[questao['area']]['total'] += 1
+        if correta:
+            sessao.acertos += 1
+            sessao.desempenho_areas[questao['area']]['acertos'] += 1
+
+        sessao.indice += 1
+        sessao.exibida_ns = None
+        sessao.respondida_ns = agora_ns
+        return {"correta": correta, "resposta_correta": questao['resposta_correta']}
+
+    def finalizar(self, sessao_id):
+        """Corrige a sessão, registra o resultado no desempenho do aluno (via barramento) e retorna
+        (resultado, novidades), com as conquistas e os níveis desbloqueados"""
+        sessao = self._encerrar(sessao_id)
+        if sessao.tipo == "diagnostico":
+            return self._finalizar_diagnostico(sessao)
+        return self._finalizar_simulado(sessao)
+
+    def finalizar_sem_registrar(self, sessao_id):
+        """Corrige um simulado sem tocar no desempenho nem no barramento (simulados de evento).
+
+        Devolve o evento SimuladoConcluido ainda não publicado: quem chamou grava o resultado em lote e
+        publica o evento quando ele for consolidado no histórico do aluno.
+        """
+        sessao = self._encerrar(sessao_id)
+        return SimuladoConcluido(sessao.email, self._corrigir_simulado(sessao), sessao.questoes,
+                                 sessao.respostas, sessao.tempos, sessao.momentos)
+
+    def _encerrar(self, sessao_id):
+        with self.trava_sessoes:
+            sessao = self.sessoes.pop(sessao_id)
+        sessao.fechar_revisao()
+        sessao.finalizada = True
+        return sessao
+
+    def salvar(self):
+        """Grava os dados do sistema, acumulando o tempo gasto (usado também pelo barramento de eventos).
+
+        Não pode ser chamado com `self.trava` adquirida. Os dados são serializados sob a trava (uma foto
+        consistente) e os arquivos são escritos fora dela; se várias threads pedem a gravação ao mesmo
+        tempo, a que grava leva as mudanças de todas e as outras não gravam de novo.
+        """
+        with self.trava:
+            self.versao_dados += 1
+            versao = self.versao_dados
+        with self.trava_gravacao:
+            if self.versao_gravada >= versao:  # outra thread já gravou uma foto com esta mudança
+                return
+            inicio = time.perf_counter_ns()
+            with self.trava:
+                versao = self.versao_dados
+                conteudos = self.sistema.serializar_dados()
+            self.sistema.salvar_dados(conteudos)
+            self.versao_gravada = versao
+            self.tempo_persistencia_ns += time.perf_counter_ns() - inicio
+            self.gravacoes += 1
+
+    def _corrigir_simulado(self, sessao):
+        """Resultado do simulado a partir das respostas da sessão"""
+        tempo_gasto = (time.monotonic_ns() - sessao.inicio_ns) / 1e9 / 60
+        total_questoes_respondidas = len(sessao.respostas)
+        percentual = (sessao.acertos / total_questoes_respondidas) * 100 if total_questoes_respondidas > 0 else 0
+
+        return {
+            "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "area": sessao.area,
+            "titulo": sessao.titulo,
+            "pontuacao": sessao.acertos,
+            "total_questoes": total_questoes_respondidas, # Usa o número de respondidas
+            "percentual": percentual,
+            "tempo_gasto": tempo_gasto,
+            "desempenho_areas": dict(sessao.desempenho_areas),
+            "tempos_questoes": sessao.tempos
+        }
+
+    def _finalizar_simulado(self, sessao):
+        resultado = self._corrigir_simulado(sessao)
+        novidades = self.registrar_simulado(SimuladoConcluido(sessao.email, resultado, sessao.questoes,
+                                                              sessao.respostas, sessao.tempos, sessao.momentos))
+        return resultado, novidades
+
+    def registrar_simulado(self, evento, gravar=True):
+        """Acrescenta o resultado do SimuladoConcluido ao histórico do aluno, publica o evento e retorna as
+        novidades (conquistas e níveis desbloqueados).
+
+        A trava cobre só as mudanças em memória; os lotes de estatísticas e respostas que completaram e os
+        dados são gravados depois de soltá-la. Com `gravar=False` a gravação dos dados fica com quem chamou
+        (ex.: a consolidação de um evento, que grava uma única vez no final).
+        """
+        sistema = self.sistema
+        with self.trava:
+            desempenho = sistema.desempenho.setdefault(evento.email, {})
+            desempenho.setdefault('gamificacao', {'pontos': 0, 'conquistas': []})
+            if 'simulados' not in desempenho:
+                desempenho['simulados'] = []
+            desempenho['simulados'].append(evento.resultado)
+
+            # Estatísticas, agregados, percentis, cubo, cache e conquistas ficam com os consumidores do evento
+            sistema.barramento.publicar(evento, gravar=False)
+            novidades = sistema.novidades.pop(evento.email, [])
+            lotes = sistema.separar_lotes_completos()
+        sistema.gravar_lotes(lotes)
+        if gravar:
+            self.salvar()
+        return novidades
+
+    def _finalizar_diagnostico(self, sessao):
+        sistema = self.sistema
+        email = sessao.email
+        total = len(sessao.questoes)
+        percentual = (sessao.acertos / total) * 100
+
+        if percentual >= 70:
+            nivel = "Avançado"
+        elif percentual >= 50:
+            nivel = "Intermediário"
+        else:
+            nivel = "Básico"
+
+        resultado = {
+            "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "pontuacao": sessao.acertos,
+            "total_questoes": total,
+            "percentual": percentual,
+            "nivel": nivel,
+            "desempenho_areas": dict(sessao.desempenho_areas)
+        }
+
+        with self.trava:
+            if email not in sistema.desempenho:
+                sistema.desempenho[email] = {}
+            sistema.desempenho[email]['diagnostico_inicial'] = resultado
+
+            # Atualiza gamificação
+            if 'gamificacao' not in sistema.desempenho[email]:
+                sistema.desempenho[email]['gamificacao'] = {'pontos': 0, 'conquistas': []}
+
+            sistema.barramento.publicar(DiagnosticoConcluido(email, resultado, sessao.questoes, sessao.respostas),
+                                        gravar=False)
+            novidades = sistema.novidades.pop(email, [])
+            lotes = sistema.separar_lotes_completos()
+        sistema.gravar_lotes(lotes)
+        self.salvar()
+
+        return resultado, novidades
+
+    def gerar_plano(self, email):
+        """Gera e grava o plano de estudos a partir do diagnóstico do aluno e o retorna"""
+        sistema = self.sistema
+        usuario = next(u for u in sistema.usuarios if u['email'] == email)
+        diagnostico = sistema.desempenho[email]['diagnostico_inicial']
+        plano = sistema.montar_plano_estudo(diagnostico['nivel'], diagnostico['desempenho_areas'])
+        with self.trava:
+            sistema.planos[usuario['email']] = plano
+            sistema.cache_derivados.invalidar(email)
+        self.salvar()
+        return plano
@@ -0,0 +1,105 @@
+import os
+import json
+import math
+
+
+class EsbocoQuantis:
+    """Esboço de quantis com erro relativo limitado (buckets logarítmicos, no estilo DDSketch).
+
+    Cada valor é somado em O(1) e o esboço ocupa memória proporcional ao número de buckets
+    distintos, não ao número de valores. Dois esboços podem ser mesclados somando os buckets.
+    """
+
+    def __init__(self, erro_relativo=0.01):
+        self.erro_relativo = erro_relativo
+        self.gama = (1 + erro_relativo) / (1 - erro_relativo)
+        self.log_gama = math.log(self.gama)
+        self.buckets = {}
+        self.zeros = 0
+        self.contagem = 0
+
+    def adicionar(self, valor):
+        """Acrescenta um valor (não negativo) ao esboço"""
+        self.contagem += 1
+        if valor <= 0:
+            self.zeros += 1
+            return
+        indice = math.ceil(math.log(valor) / self.log_gama)
+        self.buckets[indice] = self.buckets.get(indice, 0) + 1
+
+    def quantil(self, q):
+        """Valor aproximado do quantil q (0-1), ou None se o esboço estiver vazio"""
+        if self.contagem == 0:
+            return None
+        posicao = q * (self.contagem - 1)
+        acumulado = self.zeros
+        if posicao < acumulado:
+            return 0.0
+        for indice in sorted(self.buckets):
+            acumulado += self.buckets[indice]
+            if posicao < acumulado:
+                return 2 * self.gama ** indice / (self.gama + 1)
+        return 2 * self.gama ** max(self.buckets) / (self.gama + 1)
+
+    def mesclar(self, outro):
+        """Soma os valores de outro esboço (com o mesmo erro relativo) a este"""
+        for indice, n in outro.buckets.items():
+            self.buckets[indice] = self.buckets.get(indice, 0) + n
+        self.zeros += outro.zeros
+        self.contagem += outro.contagem
+
+    def para_dict(self):
+        """Representação serializável em JSON"""
+        return {"erro_relativo": self.erro_relativo, "zeros": self.zeros, "contagem": self.contagem,
+                "buckets": {str(i): n for i, n in self.buckets.items()}}
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Reconstrói um esboço a partir de `para_dict`"""
+        esboco = cls(dados.get("erro_relativo", 0.01))
+        esboco.zeros = dados.get("zeros", 0)
+        esboco.contagem = dados.get("contagem", 0)
+        esboco.buckets = {int(i): n for i, n in dados.get("buckets", {}).items()}
+        return esboco
+
+
+class TemposResposta:
+    """Esboços de quantis do tempo de resposta (ms) por área e por questão"""
+
+    def __init__(self, arquivo):
+        self.ARQUIVO = arquivo
+        self.esbocos = {}
+        self.carregar()
+
+    def carregar(self):
+        """Carrega os esboços do arquivo JSON"""
+        if not os.path.exists(self.ARQUIVO):
+            return
+        try:
+            with open(self.ARQUIVO, 'r') as f:
+                self.esbocos = {chave: EsbocoQuantis.de_dict(dados) for chave, dados in json.load(f).items()}
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Erro ao carregar tempos de resposta: {e}")
+            self.esbocos = {}
+
+    def salvar(self):
+        """Grava os esboços no arquivo JSON"""
+        try:
+            with open(self.ARQUIVO, 'w') as f:
+                json.dump({chave: esboco.para_dict() for chave, esboco in self.esbocos.items()}, f)
+        except IOError as e:
+            print(f"Erro ao salvar tempos de resposta: {e}")
+
+    def registrar(self, area, questao_id, tempo_ms):
+        """Acrescenta o tempo de uma resposta aos esboços da área e da questão"""
+        for chave in (f"area:{area}", f"questao:{questao_id}"):
+            if chave not in self.esbocos:
+                self.esbocos[chave] = EsbocoQuantis()
+            self.esbocos[chave].adicionar(tempo_ms)
+
+    def percentis(self, chave):
+        """Retorna (p50, p90, p99) em ms para a chave ('area:...' ou 'questao:...'), ou None"""
+        esboco = self.esbocos.get(chave)
+        if not esboco or esboco.contagem == 0:
+            return None
+        return esboco.quantil(0.5), esboco.quantil(0.9), esboco.quantil(0.99)
@@ -0,0 +1,217 @@
+"""Catálogo de recompensas com estoque por item e limite de resgates por aluno.
+
+O catálogo fica em `recompensas.json`. O estoque de cada item é um contador de 8 bytes em
+`recompensas_estoque.bin`, numa posição fixa atribuída ao id do item no índice
+`recompensas_estoque.json` (ESTOQUE_ILIMITADO para itens sem limite): reordenar ou remover itens do
+catálogo não muda a posição dos outros. Os resgates de cada aluno por item também são contadores, um
+arquivo por item (`recompensas_resgates/<posição>.bin`) com o contador do aluno na posição do seu
+ordinal.
+
+Reservar uma unidade do estoque ou um resgate do limite do aluno é um compare-and-swap no contador: lê
+o valor, e só grava o novo se ninguém o mudou entretanto, com uma trava de faixa de bytes (lockf)
+apenas naqueles 8 bytes. Resgates de itens diferentes não disputam a mesma trava, e nenhum resgate
+regrava um arquivo inteiro. Sem `os.pread`/`os.pwrite` (Windows), os contadores são lidos e gravados
+com `os.lseek` + `os.read`/`os.write` sob uma trava entre threads.
+"""
+import os
+import json
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos, só entre threads
+    fcntl = None
+
+ESTOQUE_ILIMITADO = -1
+TAMANHO_CONTADOR = 8
+TRAVAS_ALUNOS = 64  # travas entre threads dos contadores por aluno (o aluno usa a do seu ordinal % 64)
+
+CATALOGO_PADRAO = [
+    {"id": "simulado_premium", "nome": "Simulado Premium", "custo": 100, "estoque": None, "limite_por_aluno": None},
+    {"id": "material_exclusivo", "nome": "Material Exclusivo", "custo": 200, "estoque": None, "limite_por_aluno": 3},
+    {"id": "aula_tutor", "nome": "Aula com Tutor", "custo": 500, "estoque": 20, "limite_por_aluno": 1},
+    {"id": "certificado", "nome": "Certificado de Excelência", "custo": 1000, "estoque": None, "limite_por_aluno": 1}
+]
+
+
+def _abrir(caminho):
+    return os.open(caminho, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+
+
+class EstoqueRecompensas:
+    """Catálogo de recompensas, contadores de estoque e de resgates por aluno com compare-and-swap"""
+
+    def __init__(self, arquivo_catalogo, arquivo_estoque, arquivo_indice, diretorio_resgates):
+        self.ARQUIVO_CATALOGO = arquivo_catalogo
+        self.ARQUIVO_ESTOQUE = arquivo_estoque
+        self.ARQUIVO_INDICE = arquivo_indice
+        self.DIRETORIO_RESGATES = diretorio_resgates
+        self.catalogo = []
+        self.itens = {}     # id do item -> item do catálogo
+        self.posicoes = {}  # id do item -> posição do contador (permanente, gravada no índice)
+        self.conflitos = 0  # compare-and-swap que falharam e tiveram de ser refeitos
+
+        self.carregar_catalogo()
+        self.trava_posicao = threading.Lock()  # lseek + read/write quando não há pread/pwrite
+        self.fd = _abrir(self.ARQUIVO_ESTOQUE)
+        self._iniciar_contadores()
+        self.travas = [threading.Lock() for _ in self.posicoes]
+        self.travas_alunos = [threading.Lock() for _ in range(TRAVAS_ALUNOS)]
+        self.fds_resgates = {}  # posição do item -> arquivo de resgates por aluno
+        self.trava_arquivos = threading.Lock()  # abertura (sob demanda) e fechamento dos arquivos de resgates
+        os.makedirs(self.DIRETORIO_RESGATES, exist_ok=True)
+
+    def carregar_catalogo(self):
+        """Carrega o catálogo (criando o padrão se o arquivo não existir)"""
+        if os.path.exists(self.ARQUIVO_CATALOGO):
+            try:
+                with open(self.ARQUIVO_CATALOGO, 'r') as f:
+                    self.catalogo = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Erro ao carregar catálogo de recompensas: {e}")
+                self.catalogo = []
+        else:
+            self.catalogo = [dict(item) for item in CATALOGO_PADRAO]
+            try:
+                with open(self.ARQUIVO_CATALOGO, 'w') as f:
+                    json.dump(self.catalogo, f, indent=4, ensure_ascii=False)
+            except IOError as e:
+                print(f"Erro ao salvar catálogo de recompensas: {e}")
+        self.itens = {item['id']: item for item in self.catalogo}
+
+    def _iniciar_contadores(self):
+        """Carrega o índice id -> posição e acrescenta os contadores dos itens novos do catálogo.
+
+        Sem índice, os contadores já gravados seguem a ordem atual do catálogo (como eram criados antes).
+        """
+        existentes = os.fstat(self.fd).st_size // TAMANHO_CONTADOR
+        if os.path.exists(self.ARQUIVO_INDICE):
+            try:
+                with open(self.ARQUIVO_INDICE, 'r') as f:
+                    ids = json.load(f).get('ids', [])
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Erro ao carregar índice do estoque de recompensas: {e}")
+                ids = []
+        else:
+            ids = [item['id'] for item in self.catalogo[:existentes]]
+        self.posicoes = {item_id: i for i, item_id in enumerate(ids)}
+
+        novos = [item for item in self.catalogo if item['id'] not in self.posicoes]
+        for item in novos:
+            posicao = self.posicoes[item['id']] = len(ids)
+            ids.append(item['id'])
+            inicial = ESTOQUE_ILIMITADO if item.get('estoque') is None else item['estoque']
+            self._gravar(self.fd, posicao * TAMANHO_CONTADOR, inicial)
+        if novos or not os.path.exists(self.ARQUIVO_INDICE):
+            try:
+                with open(self.ARQUIVO_INDICE, 'w') as f:
+                    json.dump({'ids': ids}, f)
+            except IOError as e:
+                print(f"Erro ao salvar índice do estoque de recompensas: {e}")
+
+    def _ler(self, fd, inicio):
+        """Valor do contador que começa no byte `inicio` (0 além do fim do arquivo)"""
+        if hasattr(os, 'pread'):
+            dados = os.pread(fd, TAMANHO_CONTADOR, inicio)
+        else:
+            with self.trava_posicao:
+                os.lseek(fd, inicio, os.SEEK_SET)
+                dados = os.read(fd, TAMANHO_CONTADOR)
+        return struct.unpack('<q', dados)[0] if len(dados) == TAMANHO_CONTADOR else 0
+
+    def _gravar(self, fd, inicio, valor):
+        """Grava o contador que começa no byte `inicio`"""
+        dados = struct.pack('<q', valor)
+        if hasattr(os, 'pwrite'):
+            os.pwrite(fd, dados, inicio)
+        else:
+            with self.trava_posicao:
+                os.lseek(fd, inicio, os.SEEK_SET)
+                os.write(fd, dados)
+
+    def _comparar_e_trocar(self, fd, inicio, trava, esperado, novo):
+        """Grava `novo` no contador apenas se ele ainda valer `esperado`"""
+        with trava:
+            if fcntl:
+                fcntl.lockf(fd, fcntl.LOCK_EX, TAMANHO_CONTADOR, inicio)
+            try:
+                if self._ler(fd, inicio) != esperado:
+                    return False
+                self._gravar(fd, inicio, novo)
+                return True
+            finally:
+                if fcntl:
+                    fcntl.lockf(fd, fcntl.LOCK_UN, TAMANHO_CONTADOR, inicio)
+
+    def _somar(self, fd, inicio, trava, variacao, permitido):
+        """Soma `variacao` ao contador com compare-and-swap se `permitido(valor atual)`; devolve se somou"""
+        while True:
+            atual = self._ler(fd, inicio)
+            if not permitido(atual):
+                return False
+            if self._comparar_e_trocar(fd, inicio, trava, atual, atual + variacao):
+                return True
+            self.conflitos += 1
+
+    def item(self, item_id):
+        """Item do catálogo pelo id (None se não existir)"""
+        return self.itens.get(item_id)
+
+    def disponivel(self, item_id):
+        """Unidades em estoque do item (ESTOQUE_ILIMITADO se não houver limite)"""
+        return self._ler(self.fd, self.posicoes[item_id] * TAMANHO_CONTADOR)
+
+    def reservar(self, item_id):
+        """Tira uma unidade do estoque; devolve False se o item estiver esgotado"""
+        posicao = self.posicoes[item_id]
+        if self.disponivel(item_id) == ESTOQUE_ILIMITADO:
+            return True
+        return self._somar(self.fd, posicao * TAMANHO_CONTADOR, self.travas[posicao], -1, lambda atual: atual > 0)
+
+    def devolver(self, item_id):
+        """Devolve ao estoque uma unidade reservada (resgate que não se concretizou)"""
+        posicao = self.posicoes[item_id]
+        self._somar(self.fd, posicao * TAMANHO_CONTADOR, self.travas[posicao], 1,
+                    lambda atual: atual != ESTOQUE_ILIMITADO)
+
+    def _contador_aluno(self, item_id, aluno):
+        """(arquivo, byte inicial, trava) do contador de resgates do aluno (ordinal) no item"""
+        posicao = self.posicoes[item_id]
+        fd = self.fds_resgates.get(posicao)
+        if fd is None:
+            with self.trava_arquivos:  # duas threads no primeiro resgate do item abririam dois descritores
+                fd = self.fds_resgates.get(posicao)
+                if fd is None:
+                    fd = self.fds_resgates[posicao] = _abrir(os.path.join(self.DIRETORIO_RESGATES, f"{posicao}.bin"))
+        return fd, aluno * TAMANHO_CONTADOR, self.travas_alunos[aluno % TRAVAS_ALUNOS]
+
+    def resgates_aluno(self, item_id, aluno):
+        """Quantas vezes o aluno (ordinal) já resgatou o item"""
+        fd, inicio, _ = self._contador_aluno(item_id, aluno)
+        return self._ler(fd, inicio)
+
+    def reservar_resgate_aluno(self, item_id, aluno, limite):
+        """Conta um resgate do aluno no item se ele ainda estiver abaixo do limite (None = sem limite)"""
+        fd, inicio, trava = self._contador_aluno(item_id, aluno)
+        return self._somar(fd, inicio, trava, 1, lambda atual: limite is None or atual < limite)
+
+    def devolver_resgate_aluno(self, item_id, aluno):
+        """Desfaz um resgate reservado do aluno (resgate que não se concretizou)"""
+        fd, inicio, trava = self._contador_aluno(item_id, aluno)
+        self._somar(fd, inicio, trava, -1, lambda atual: atual > 0)
+
+    def definir_resgates_aluno(self, item_id, aluno, quantidade):
+        """Grava direto a contagem de resgates do aluno no item (migração do histórico)"""
+        fd, inicio, _ = self._contador_aluno(item_id, aluno)
+        self._gravar(fd, inicio, quantidade)
+
+    def fechar(self):
+        """Fecha os arquivos de contadores (na saída do sistema; chamar de novo não faz nada)"""
+        with self.trava_arquivos:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+            for fd in self.fds_resgates.values():
+                os.close(fd)
+            self.fds_resgates = {}
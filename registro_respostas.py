@@ -0,0 +1,137 @@
+"""Registro colunar, somente de acréscimo, de todas as respostas dadas nos simulados.
+
+Cada coluna é um arquivo binário próprio (`<coluna>.col`) com valores de tamanho fixo, gravados em
+blocos de CHUNK_LINHAS linhas. A leitura para análise é feita com `np.memmap`, sem carregar o JSON.
+"""
+import os
+import threading
+from array import array
+
+# Nome da coluna e código de tipo (o mesmo código serve para `array` e para o dtype do NumPy)
+COLUNAS = (
+    ('usuario', 'I'),    # ordinal do usuário
+    ('questao', 'I'),    # ordinal da questão
+    ('opcao', 'b'),      # alternativa escolhida (0 = A)
+    ('correta', 'B'),    # 1 se acertou
+    ('tempo_ms', 'I'),   # tempo de resposta em milissegundos
+    ('timestamp', 'q'),  # momento da resposta (ms desde a época Unix)
+)
+CHUNK_LINHAS = 4096
+
+
+class RegistroRespostas:
+    """Grava eventos de resposta em colunas paralelas, em blocos de tamanho fixo"""
+
+    def __init__(self, diretorio, chunk_linhas=CHUNK_LINHAS):
+        self.diretorio = diretorio
+        self.chunk_linhas = chunk_linhas
+        self.buffer = {nome: array(tipo) for nome, tipo in COLUNAS}
+        self.blocos_pendentes = []  # blocos separados do buffer e ainda não gravados, em ordem
+        self.trava_gravacao = threading.Lock()  # Uma gravação dos arquivos por vez
+
+    def caminho(self, coluna):
+        """Caminho do arquivo de uma coluna"""
+        return os.path.join(self.diretorio, f"{coluna}.col")
+
+    def registrar(self, usuario, questao, opcao, correta, tempo_ms, timestamp):
+        """Acrescenta uma resposta ao bloco atual, só em memória; `bloco_completo()` indica quando gravar"""
+        self.buffer['usuario'].append(usuario)
+        self.buffer['questao'].append(questao)
+        self.buffer['opcao'].append(opcao)
+        self.buffer['correta'].append(1 if correta else 0)
+        self.buffer['tempo_ms'].append(max(0, int(tempo_ms)))
+        self.buffer['timestamp'].append(int(timestamp))
+
+    def bloco_completo(self):
+        """Indica se o bloco atual já tem `chunk_linhas` linhas"""
+        return len(self.buffer['usuario']) >= self.chunk_linhas
+
+    def separar_bloco(self):
+        """Tira as linhas do buffer para gravá-las depois com `gravar(bloco)`.
+
+        Quem chama garante que nenhuma resposta é registrada ao mesmo tempo (ex.: a trava do motor).
+        """
+        bloco, self.buffer = self.buffer, {nome: array(tipo) for nome, tipo in COLUNAS}
+        return bloco
+
+    def _alinhar(self, linhas):
+        """Corta todas as colunas em `linhas` linhas (descarta acréscimos parciais)"""
+        for nome, tipo in COLUNAS:
+            caminho = self.caminho(nome)
+            tamanho = linhas * array(tipo).itemsize
+            if os.path.exists(caminho) and os.path.getsize(caminho) != tamanho:
+                os.truncate(caminho, tamanho)
+
+    def gravar(self, bloco=None):
+        """Acrescenta ao final dos arquivos de coluna as linhas de `bloco` (padrão: as do buffer).
+
+        Um bloco só é dado por gravado depois que todas as colunas foram gravadas. Se uma coluna falhar,
+        as já acrescentadas voltam ao tamanho anterior e o bloco fica pendente para a próxima gravação,
+        então as colunas nunca ficam desalinhadas.
+        """
+        if bloco is None:
+            bloco = self.separar_bloco()
+        with self.trava_gravacao:
+            if len(bloco['usuario']):
+                self.blocos_pendentes.append(bloco)
+            while self.blocos_pendentes:
+                if not self._acrescentar(self.blocos_pendentes[0]):
+                    return
+                self.blocos_pendentes.pop(0)
+
+    def _acrescentar(self, bloco):
+        """Grava um bloco em todas as colunas; False (com as colunas restauradas) se a gravação falhar"""
+        linhas = None
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            linhas = contar_linhas(self.diretorio)
+            self._alinhar(linhas)  # restos de uma gravação interrompida
+            for nome, _ in COLUNAS:
+                with open(self.caminho(nome), 'ab') as f:
+                    bloco[nome].tofile(f)
+            return True
+        except IOError as e:
+            print(f"Erro ao gravar registro de respostas: {e}")
+            if linhas is not None:
+                try:
+                    self._alinhar(linhas)
+                except IOError as e:
+                    print(f"Erro ao desfazer gravação parcial do registro de respostas: {e}")
+            return False
+
+
+def contar_linhas(diretorio):
+    """Número de linhas completas do registro (a menor contagem entre as colunas)"""
+    linhas = []
+    for nome, tipo in COLUNAS:
+        caminho = os.path.join(diretorio, f"{nome}.col")
+        tamanho = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+        linhas.append(tamanho // array(tipo).itemsize)
+    return min(linhas)
+
+
+def ler_colunas(diretorio, colunas=None):
+    """Abre as colunas do registro como `np.memmap` (somente leitura), todas com o mesmo número de linhas"""
+    import numpy as np
+
+    linhas = contar_linhas(diretorio)
+    tipos = dict(COLUNAS)
+    resultado = {}
+    for nome in colunas or tipos:
+        if linhas == 0:
+            resultado[nome] = np.empty(0, dtype=tipos[nome])
+        else:
+            resultado[nome] = np.memmap(os.path.join(diretorio, f"{nome}.col"), dtype=tipos[nome],
+                                        mode='r', shape=(linhas,))
+    return resultado
+
+
+def taxa_acerto_por_questao(diretorio):
+    """Tentativas e proporção de acertos por ordinal de questão, calculadas direto nas colunas"""
+    import numpy as np
+
+    colunas = ler_colunas(diretorio, ['questao', 'correta'])
+    tentativas = np.bincount(colunas['questao'])
+    acertos = np.bincount(colunas['questao'], weights=colunas['correta'], minlength=len(tentativas))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return tentativas, acertos / tentativas
@@ -0,0 +1,57 @@
+"""Motor de regras das conquistas: o catálogo é compilado uma vez num índice (tipo, área) -> regras.
+
+O código do sistema só informa eventos ("simulado", "area", "plano", "frequencia", ...) com um valor
+(quantidade de simulados, percentual na área, semanas concluídas, dias seguidos); o motor avalia apenas
+as regras daquele tipo/área, compara o valor com o mínimo de cada regra e devolve as conquistas novas.
+Os níveis são resolvidos por busca binária nos limites de pontos.
+"""
+from bisect import bisect_right
+
+# Valor mínimo do evento quando a conquista do catálogo não define "minimo"
+MINIMO_PADRAO = {"area": 80, "frequencia": 7}
+
+
+class MotorConquistas:
+    """Índice das regras do catálogo e conjunto de conquistas já desbloqueadas de cada usuário"""
+
+    def __init__(self, catalogo):
+        self.indice = {}
+        for conquista in catalogo.get('conquistas', []):
+            chave = (conquista['tipo'], conquista.get('area') if conquista['tipo'] == "area" else None)
+            self.indice.setdefault(chave, []).append(conquista)
+
+        niveis = sorted(catalogo.get('niveis', []), key=lambda n: n['pontos_necessarios'])
+        self.limites = [n['pontos_necessarios'] for n in niveis]
+        self.niveis = [n['nivel'] for n in niveis]
+        self.desbloqueadas = {}  # email -> nomes das conquistas desbloqueadas
+
+    def conjunto_usuario(self, email, conquistas_usuario):
+        """Conjunto de nomes desbloqueados do usuário (montado a partir da lista gravada na primeira vez)"""
+        nomes = self.desbloqueadas.get(email)
+        if nomes is None:
+            nomes = self.desbloqueadas[email] = {c['nome'] for c in conquistas_usuario}
+        return nomes
+
+    def avaliar(self, email, conquistas_usuario, tipo, area=None, valor=None):
+        """Conquistas novas do usuário para um evento; `valor` None satisfaz qualquer mínimo"""
+        regras = self.indice.get((tipo, area if tipo == "area" else None), [])
+        if not regras:
+            return []
+        nomes = self.conjunto_usuario(email, conquistas_usuario)
+        novas = []
+        for regra in regras:
+            minimo = regra.get('minimo', MINIMO_PADRAO.get(tipo, 1))
+            if regra['nome'] not in nomes and (valor is None or valor >= minimo):
+                nomes.add(regra['nome'])
+                novas.append(regra)
+        return novas
+
+    def nivel_para(self, pontos):
+        """Maior nível cujo limite de pontos foi atingido"""
+        i = bisect_right(self.limites, pontos)
+        return self.niveis[i - 1] if i > 0 else 1
+
+    def pontos_proximo_nivel(self, pontos):
+        """Pontos necessários para o próximo nível, ou None no nível máximo"""
+        i = bisect_right(self.limites, pontos)
+        return self.limites[i] if i < len(self.limites) else None
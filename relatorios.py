@@ -0,0 +1,313 @@
+"""Montagem dos relatórios e das telas de análise sem entrada nem saída: as funções recebem os dados do
+aluno e devolvem linhas de texto, ou o relatório como {"titulo", "secoes": [(título, linhas)], "tabela":
+(colunas, linhas) ou None}, que é impresso no console pelo sistema ou gravado em Markdown/HTML pelos
+relatórios em lote.
+"""
+import html
+from collections import Counter
+
+from agregados import percentual_acertos
+from serie_temporal import serie_aluno, tendencia_semanal
+
+LIMITE_AREA_FRACA = 0.5  # proporção de acertos no diagnóstico abaixo da qual a área precisa de reforço
+
+
+def areas_fracas(desempenho_aluno):
+    """Áreas do diagnóstico com menos de 50% de acertos"""
+    diagnostico = desempenho_aluno.get('diagnostico_inicial')
+    if not diagnostico:
+        return []
+    return [area for area, dados in diagnostico['desempenho_areas'].items()
+            if dados['total'] > 0 and dados['acertos'] / dados['total'] < LIMITE_AREA_FRACA]
+
+
+def relatorio_professor(usuario, desempenho_aluno, data, frequencia=None):
+    """Relatório detalhado de um aluno para professores.
+
+    `frequencia` (opcional) traz dias_7, sequencia e recorde do aluno e, se conhecidos, turma_ativos e turma_total.
+    """
+    secoes = [(None, [
+        f"👨‍🎓 Aluno: {usuario['nome']}",
+        f"🏫 Escola: {usuario['escola']}",
+        f"📅 Série: {usuario['serie']}",
+        f"📅 Data: {data.strftime('%d/%m/%Y')}"
+    ])]
+
+    if frequencia is not None:
+        secoes.append(secao_frequencia(frequencia))
+
+    linhas = []
+    if 'diagnostico_inicial' in desempenho_aluno:
+        diag = desempenho_aluno['diagnostico_inicial']
+        linhas += ["", "🔍 Teste Diagnóstico Inicial:",
+                   f"Pontuação: {diag['pontuacao']}/{diag['total_questoes']}",
+                   f"Percentual: {diag['percentual']:.1f}%",
+                   f"Nível: {diag['nivel']}",
+                   "", "Áreas de conhecimento:"]
+        for area, dados in diag['desempenho_areas'].items():
+            if dados['total'] > 0:
+                perc = (dados['acertos'] / dados['total']) * 100
+                status = "Ponto forte" if perc >= 70 else "Médio desempenho" if perc >= 50 else "Ponto fraco"
+                linhas += ["", f"{area}:", f"Acertos: {dados['acertos']}/{dados['total']} ({perc:.1f}%)",
+                           f"Status: {status}"]
+            else:
+                linhas += ["", f"{area}: Nenhuma questão respondida."]
+
+    if desempenho_aluno.get('simulados'):
+        linhas += ["", "📝 Histórico de Simulados:"]
+        for i, simulado in enumerate(desempenho_aluno['simulados'], 1):
+            linhas += ["", f"Simulado {i}:",
+                       f"Data: {simulado['data']}",
+                       f"Área: {simulado['area']}",
+                       f"Pontuação: {simulado['pontuacao']}/{simulado['total_questoes']}",
+                       f"Percentual: {simulado['percentual']:.1f}%"]
+    secoes.append(("📊 DESEMPENHO DETALHADO", linhas))
+
+    linhas = []
+    if 'diagnostico_inicial' in desempenho_aluno and 'simulados' in desempenho_aluno:
+        fracas = areas_fracas(desempenho_aluno)
+        if fracas:
+            linhas += ["", "Áreas que necessitam de reforço:"] + [f"- {area}" for area in fracas]
+            linhas += ["", "Sugestões de abordagem:",
+                       "- Priorizar exercícios práticos nas áreas de dificuldade",
+                       "- Utilizar materiais visuais e exemplos concretos",
+                       "- Dividir conceitos complexos em partes menores"]
+        else:
+            linhas += ["", "O aluno demonstra bom desempenho em todas as áreas.",
+                       "Sugestões:",
+                       "- Propor desafios mais complexos",
+                       "- Estimular o aprofundamento em tópicos de interesse"]
+    secoes.append(("📌 ANÁLISE PEDAGÓGICA", linhas))
+
+    return {"titulo": "RELATÓRIO PARA PROFESSORES", "secoes": secoes, "tabela": None}
+
+
+def secao_frequencia(frequencia):
+    """Seção de frequência do relatório para professores"""
+    linhas = [f"Dias de estudo nos últimos 7 dias: {frequencia['dias_7']}",
+              f"Sequência atual: {frequencia['sequencia']} dias (recorde: {frequencia['recorde']})"]
+    if 'turma_total' in frequencia:
+        linhas.append(f"Alunos da turma que estudaram 5 dos últimos 7 dias: "
+                      f"{frequencia['turma_ativos']} de {frequencia['turma_total']}")
+    return ("🔥 FREQUÊNCIA", linhas)
+
+
+def relatorio_pais(usuario, plano, desempenho_aluno, data):
+    """Relatório simplificado de um aluno para os pais"""
+    secoes = [(None, [f"📝 Relatório de {usuario['nome']}", f"📅 Data: {data.strftime('%d/%m/%Y')}"])]
+
+    linhas = []
+    if 'diagnostico_inicial' in desempenho_aluno and 'simulados' in desempenho_aluno:
+        # Progresso desde o diagnóstico
+        perc_inicial = desempenho_aluno['diagnostico_inicial']['percentual']
+        ultimo_simulado = desempenho_aluno['simulados'][-1]['percentual'] if desempenho_aluno['simulados'] else 0
+        linhas.append(f"Evolução: {perc_inicial:.1f}% → {ultimo_simulado:.1f}%")
+        if ultimo_simulado > perc_inicial + 5:
+            linhas.append("Tendência: Melhora significativa 📈")
+        elif ultimo_simulado > perc_inicial:
+            linhas.append("Tendência: Pequena melhora ↗️")
+        elif ultimo_simulado == perc_inicial:
+            linhas.append("Tendência: Estabilidade ↔️")
+        else:
+            linhas.append("Tendência: Queda de desempenho 📉")
+
+        variacao = tendencia_semanal(serie_aluno(desempenho_aluno))
+        if variacao is not None:
+            linhas.append(f"Últimas 4 semanas vs. 4 anteriores: {variacao:+.1f} pontos percentuais")
+    else:
+        linhas.append("Dados de desempenho ainda não disponíveis.")
+    secoes.append(("📊 DESEMPENHO GERAL", linhas))
+
+    if plano:
+        semanas_concluidas = sum(1 for meta in plano['metas_semanais'] if meta.get('concluida', False))
+        linhas = [f"Progresso: {semanas_concluidas}/{plano['duracao_semanas']} semanas concluídas",
+                  f"Horas semanais recomendadas: {plano['horas_semanais']}h"]
+    else:
+        linhas = ["Plano de estudo ainda não gerado."]
+    secoes.append(("📚 PLANO DE ESTUDO", linhas))
+
+    conquistas = desempenho_aluno.get('gamificacao', {}).get('conquistas')
+    if conquistas is not None:
+        linhas = [f"Total: {len(conquistas)} conquistas",
+                  f"Última conquista: {conquistas[-1]['nome']}" if conquistas else "Nenhuma conquista ainda"]
+    else:
+        linhas = ["Nenhuma conquista registrada."]
+    secoes.append(("🏅 CONQUISTAS", linhas))
+
+    linhas = []
+    if plano and 'diagnostico_inicial' in desempenho_aluno:
+        fracas = areas_fracas(desempenho_aluno)
+        if fracas:
+            linhas += ["Áreas que precisam de mais atenção:"] + [f"- {area}" for area in fracas[:3]]
+        else:
+            linhas.append("Continue mantendo o bom desempenho em todas as áreas!")
+    secoes.append(("📌 RECOMENDAÇÕES", linhas))
+
+    return {"titulo": "RELATÓRIO PARA PAIS", "secoes": secoes, "tabela": None}
+
+
+def linhas_pontos_fortes_fracos(agregados):
+    """Linhas da tela de pontos fortes e fracos a partir dos agregados do aluno"""
+    # Ordena áreas por desempenho
+    areas_ordenadas = sorted(agregados['areas'].items(),
+                             key=lambda x: (x[1]['acertos'] / x[1]['total']) if x[1]['total'] > 0 else 0)
+
+    linhas = ["\nSeus pontos fortes:"]
+    for area, dados in areas_ordenadas[-3:]:  # Top 3 melhores desempenhos
+        if dados['total'] > 0 and percentual_acertos(dados) >= 70:
+            linhas.append(f"\n⭐ {area}: {percentual_acertos(dados):.1f}% de acertos")
+
+    linhas.append("\n\nÁreas que precisam de mais atenção:")
+    subareas = agregados['subareas']
+    for area, dados in areas_ordenadas[:3]:  # Top 3 piores desempenhos
+        if dados['total'] > 0 and percentual_acertos(dados) < 50:
+            linhas.append(f"\n⚠️ {area}: {percentual_acertos(dados):.1f}% de acertos")
+            if subareas.get(area):
+                pior = min(subareas[area].items(), key=lambda x: percentual_acertos(x[1]))
+                linhas.append(f"   Mais erros em: {pior[0]} ({percentual_acertos(pior[1]):.1f}% de acertos)")
+
+    if len(agregados['recentes']) > 1:
+        linhas.append(f"\n\nÚltimos {len(agregados['recentes'])} resultados:")
+        for area, dados in sorted(agregados['janela'].items()):
+            if dados['total'] > 0:
+                linhas.append(f"- {area}: {percentual_acertos(dados):.1f}% de acertos")
+    return linhas
+
+
+SUGESTOES_AREA = [
+    (("Matemática",), ["- Pratique exercícios básicos diariamente",
+                       "- Assista videoaulas explicativas sobre os conceitos fundamentais",
+                       "- Resolva questões de provas anteriores do ENEM"]),
+    (("Linguagens", "Redação"), ["- Leia textos variados diariamente (notícias, artigos, literatura)",
+                                 "- Pratique a escrita regularmente",
+                                 "- Estude a estrutura da redação dissertativa-argumentativa"]),
+    (("Ciências",), ["- Crie mapas mentais para organizar os conceitos",
+                     "- Relacione os conceitos com situações do cotidiano",
+                     "- Faça resumos com suas próprias palavras"]),
+    (("Humanas",), ["- Assista documentários sobre os temas estudados",
+                    "- Relacione os eventos históricos com o contexto atual",
+                    "- Crie linhas do tempo para visualizar a sequência de eventos"])
+]
+
+
+def linhas_sugestoes(agregados):
+    """Linhas da tela de sugestões de melhoria a partir dos agregados do aluno"""
+    # Áreas com desempenho abaixo de 50%
+    fracas = [area for area, dados in agregados['areas'].items()
+              if dados['total'] > 0 and (dados['acertos'] / dados['total']) < LIMITE_AREA_FRACA]
+    if not fracas:
+        return ["\nSeu desempenho está bom em todas as áreas! Continue assim!",
+                "Sugestão: Tente desafios mais difíceis para melhorar ainda mais."]
+
+    linhas = ["\nCom base no seu desempenho, sugerimos focar nas seguintes áreas:"]
+    for area in fracas[:3]:  # Limita a 3 áreas para não sobrecarregar
+        linhas.append(f"\n📚 {area}:")
+        linhas += next((dicas for chaves, dicas in SUGESTOES_AREA if any(c in area for c in chaves)), [])
+    linhas.append("\n💡 Dica geral: Dedique pelo menos 1 hora por dia para revisar essas áreas!")
+    return linhas
+
+
+def resumo_aluno(usuario, desempenho_aluno, frequencia=None):
+    """Linha do aluno no resumo da turma"""
+    simulados = desempenho_aluno.get('simulados', [])
+    diagnostico = desempenho_aluno.get('diagnostico_inicial')
+    return {
+        "nome": usuario['nome'],
+        "email": usuario['email'],
+        "diagnostico": diagnostico['percentual'] if diagnostico else None,
+        "ultimo_simulado": simulados[-1]['percentual'] if simulados else None,
+        "simulados": len(simulados),
+        "areas_fracas": areas_fracas(desempenho_aluno),
+        "dias_7": frequencia['dias_7'] if frequencia else None
+    }
+
+
+def relatorio_turma(escola, serie, data, resumos, alunos_ativos=None):
+    """Resumo da turma a partir das linhas de resumo_aluno (em qualquer ordem)"""
+    resumos = sorted(resumos, key=lambda r: (r['nome'], r['email']))
+
+    def media(chave):
+        valores = [r[chave] for r in resumos if r[chave] is not None]
+        return f"{sum(valores) / len(valores):.1f}%" if valores else "-"
+
+    linhas = [f"Alunos: {len(resumos)}",
+              f"Média no diagnóstico: {media('diagnostico')}",
+              f"Média no último simulado: {media('ultimo_simulado')}"]
+    if alunos_ativos is not None:
+        linhas.append(f"Alunos que estudaram 5 dos últimos 7 dias: {alunos_ativos} de {len(resumos)}")
+    contagem = Counter(area for r in resumos for area in r['areas_fracas'])
+    if contagem:
+        linhas += ["", "Áreas que mais precisam de reforço:"]
+        linhas += [f"- {area}: {n} alunos" for area, n in contagem.most_common()]
+
+    formatar = lambda valor: "-" if valor is None else f"{valor:.1f}%"
+    tabela = (["Aluno", "E-mail", "Diagnóstico", "Último simulado", "Simulados", "Dias (7d)", "Áreas fracas"],
+              [[r['nome'], r['email'], formatar(r['diagnostico']), formatar(r['ultimo_simulado']),
+                str(r['simulados']), "-" if r['dias_7'] is None else str(r['dias_7']),
+                ", ".join(r['areas_fracas']) or "-"] for r in resumos])
+    return {
+        "titulo": "RESUMO DA TURMA",
+        "secoes": [(None, [f"🏫 {escola} - {serie}", f"📅 Data: {data.strftime('%d/%m/%Y')}"]),
+                   ("📊 VISÃO GERAL", linhas)],
+        "tabela": tabela
+    }
+
+
+def linhas_console(relatorio):
+    """Linhas do relatório no formato das telas do sistema (o título é mostrado pela própria tela)"""
+    linhas = []
+    for titulo, conteudo in relatorio['secoes']:
+        if titulo:
+            linhas.append(f"\n{titulo}:")
+        linhas += conteudo
+    return linhas
+
+
+def para_markdown(relatorio):
+    """Relatório em Markdown"""
+    partes = [f"# {relatorio['titulo']}"]
+    for titulo, conteudo in relatorio['secoes']:
+        if titulo:
+            partes.append(f"## {titulo}")
+        paragrafo = []
+        for linha in conteudo + [""]:
+            if linha:
+                paragrafo.append(linha)
+            elif paragrafo:
+                partes.append("  \n".join(paragrafo))
+                paragrafo = []
+    if relatorio['tabela']:
+        colunas, linhas = relatorio['tabela']
+        escapar = lambda texto: texto.replace("|", "\\|")
+        partes.append("\n".join(["| " + " | ".join(colunas) + " |", "|" + " --- |" * len(colunas)] +
+                                ["| " + " | ".join(escapar(c) for c in linha) + " |" for linha in linhas]))
+    return "\n\n".join(partes) + "\n"
+
+
+def para_html(relatorio):
+    """Relatório em HTML (página única, sem dependências externas)"""
+    partes = ["<!DOCTYPE html>", "<html lang=\"pt-BR\"><head><meta charset=\"utf-8\">",
+              f"<title>{html.escape(relatorio['titulo'])}</title>",
+              "<style>body{font-family:sans-serif;max-width:60em;margin:auto}"
+              "table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:.2em .5em}</style>",
+              "</head><body>", f"<h1>{html.escape(relatorio['titulo'])}</h1>"]
+    for titulo, conteudo in relatorio['secoes']:
+        if titulo:
+            partes.append(f"<h2>{html.escape(titulo)}</h2>")
+        paragrafo = []
+        for linha in conteudo + [""]:
+            if linha:
+                paragrafo.append(html.escape(linha))
+            elif paragrafo:
+                partes.append("<p>" + "<br>".join(paragrafo) + "</p>")
+                paragrafo = []
+    if relatorio['tabela']:
+        colunas, linhas = relatorio['tabela']
+        partes.append("<table><tr>" + "".join(f"<th>{html.escape(c)}</th>" for c in colunas) + "</tr>")
+        partes += ["<tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in linha) + "</tr>" for linha in linhas]
+        partes.append("</table>")
+    partes.append("</body></html>")
+    return "\n".join(partes) + "\n"
+
+
+RENDERIZADORES = {"md": para_markdown, "html": para_html}
@@ -0,0 +1,151 @@
+"""Relatórios para professores de uma turma inteira (escola e série) de uma vez.
+
+Os alunos são divididos em lotes e os relatórios montados num pool de processos; cada processo grava
+os arquivos dos seus alunos (um .md ou .html por aluno) e devolve só uma linha de resumo por aluno,
+usada no resumo da turma. No máximo alguns lotes ficam pendentes ao mesmo tempo, então a memória não
+cresce com o tamanho da turma. Pela linha de comando o desempenho.json é lido aluno a aluno, sem carregar
+o arquivo inteiro.
+
+Uso: python relatorios_lote.py --escola "Escola A" --serie "3º EM" [--formato html] [--saida relatorios]
+"""
+import os
+import re
+import json
+import hashlib
+import time
+import argparse
+from datetime import datetime, date
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from relatorios import relatorio_professor, resumo_aluno, relatorio_turma, RENDERIZADORES
+from atividade import AtividadeDiaria
+from exportacao_bi import iterar_objeto_json
+
+TAMANHO_LOTE = 50        # alunos por tarefa enviada ao pool
+LOTES_POR_PROCESSO = 2   # lotes pendentes por processo (limita a memória)
+
+
+def nome_arquivo(email, formato):
+    """Nome do arquivo do aluno: o e-mail legível mais um resumo do e-mail original.
+
+    A troca dos caracteres especiais por "_" junta e-mails diferentes (a+b@x.com e a_b@x.com); o resumo
+    separa os dois.
+    """
+    resumo = hashlib.sha256(email.encode('utf-8')).hexdigest()[:10]
+    return f"{re.sub(r'[^A-Za-z0-9._-]', '_', email.replace('@', '_em_'))}-{resumo}.{formato}"
+
+
+def frequencia_aluno(atividade, email, hoje):
+    """Frequência do aluno a partir dos bitmaps de atividade (None sem bitmaps)"""
+    if atividade is None:
+        return None
+    return {"dias_7": atividade.dias_ativos(email, 7, hoje),
+            "sequencia": atividade.sequencia_atual(email, hoje),
+            "recorde": atividade.maior_sequencia(email)}
+
+
+def gerar_lote_alunos(alunos, formato, diretorio_saida, data):
+    """Executado nos processos do pool: grava o relatório de cada aluno e devolve as linhas de resumo"""
+    renderizar = RENDERIZADORES[formato]
+    resumos = []
+    for usuario, desempenho_aluno, frequencia in alunos:
+        relatorio = relatorio_professor(usuario, desempenho_aluno, data, frequencia)
+        with open(os.path.join(diretorio_saida, nome_arquivo(usuario['email'], formato)), 'w', encoding='utf-8') as f:
+            f.write(renderizar(relatorio))
+        resumos.append(resumo_aluno(usuario, desempenho_aluno, frequencia))
+    return resumos
+
+
+def gerar_relatorios_turma(usuarios, desempenho, escola, serie, diretorio_saida, formato="md",
+                           atividade=None, processos=None):
+    """Gera os relatórios dos alunos da turma e o resumo da turma; devolve (alunos, caminho do resumo).
+
+    `desempenho` é o dicionário email -> desempenho ou uma sequência de pares (email, desempenho), lida
+    uma única vez (ex.: iterar_objeto_json sobre o desempenho.json).
+    """
+    os.makedirs(diretorio_saida, exist_ok=True)
+    data = datetime.now()
+    hoje = data.date()
+    turma = [u for u in usuarios if u.get('escola') == escola and u.get('serie') == serie]
+    alunos_ativos = None
+    if atividade is not None:
+        alunos_ativos = atividade.contar_ativos(5, 7, hoje, emails=[u['email'] for u in turma])
+
+    def alunos():
+        if isinstance(desempenho, dict):
+            for usuario in turma:
+                yield usuario, desempenho.get(usuario['email'], {})
+            return
+        por_email = {u['email']: u for u in turma}
+        for email, desempenho_aluno in desempenho:
+            usuario = por_email.pop(email, None)
+            if usuario is not None:
+                yield usuario, desempenho_aluno
+        yield from ((usuario, {}) for usuario in por_email.values())  # alunos da turma sem desempenho
+
+    def lotes():
+        lote = []
+        for usuario, desempenho_aluno in alunos():
+            lote.append((usuario, desempenho_aluno, frequencia_aluno(atividade, usuario['email'], hoje)))
+            if len(lote) == TAMANHO_LOTE:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+    resumos = []
+    processos = processos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        pendentes = set()
+        for lote in lotes():
+            if len(pendentes) >= processos * LOTES_POR_PROCESSO:
+                concluidos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    resumos += futuro.result()
+            pendentes.add(executor.submit(gerar_lote_alunos, lote, formato, diretorio_saida, data))
+        for futuro in pendentes:
+            resumos += futuro.result()
+
+    caminho_resumo = os.path.join(diretorio_saida, "turma." + formato)
+    with open(caminho_resumo, 'w', encoding='utf-8') as f:
+        f.write(RENDERIZADORES[formato](relatorio_turma(escola, serie, data, resumos, alunos_ativos)))
+    return len(resumos), caminho_resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatórios para professores de uma turma inteira")
+    parser.add_argument('--escola', required=True, help="Escola da turma")
+    parser.add_argument('--serie', required=True, help="Série da turma (ex.: \"3º EM\")")
+    parser.add_argument('--formato', choices=sorted(RENDERIZADORES), default="md", help="Formato dos arquivos")
+    parser.add_argument('--saida', default="relatorios", help="Diretório dos relatórios gerados")
+    parser.add_argument('--dados', default=".", help="Diretório de dados do sistema")
+    parser.add_argument('--processos', type=int, default=None, help="Processos do pool (padrão: núcleos da máquina)")
+    args = parser.parse_args()
+
+    try:
+        with open(os.path.join(args.dados, 'usuarios.json'), 'r') as f:
+            usuarios = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Erro ao carregar dados: {e}")
+        return
+    atividade = AtividadeDiaria(os.path.join(args.dados, 'atividade.json'),
+                                os.path.join(args.dados, 'atividade.bin'), date.today())
+
+    inicio = time.perf_counter()
+    try:
+        quantidade, caminho_resumo = gerar_relatorios_turma(
+            usuarios, iterar_objeto_json(os.path.join(args.dados, 'desempenho.json')), args.escola, args.serie,
+            args.saida, args.formato, atividade, args.processos)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Erro ao carregar dados: {e}")
+        return
+    duracao = time.perf_counter() - inicio
+    if not quantidade:
+        print(f"Nenhum aluno encontrado em {args.escola} - {args.serie}.")
+        return
+    print(f"{quantidade} relatórios em {duracao:.2f}s ({quantidade / duracao * 60:.0f} por minuto)")
+    print(f"Resumo da turma: {caminho_resumo}")
+
+
+if __name__ == "__main__":
+    main()
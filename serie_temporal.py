@@ -0,0 +1,110 @@
+"""Série temporal do percentual de acertos de cada aluno, em baldes diários e semanais de tamanho fixo.
+
+Fica em desempenho[email]['serie'] e é atualizada a cada resultado, então os gráficos não percorrem o
+histórico inteiro:
+    diario:  [[dia (ordinal da data), soma dos percentuais, resultados]] dos últimos MAX_DIAS dias com resultado
+    semanal: [[semana (ordinal // 7), soma, resultados]] das últimas MAX_SEMANAS semanas com resultado
+Para exibir, os baldes são reduzidos a um número fixo de pontos com o LTTB
+(Largest-Triangle-Three-Buckets), que preserva picos e quedas melhor que uma média simples.
+"""
+from datetime import datetime, date
+
+MAX_DIAS = 90
+MAX_SEMANAS = 104
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+
+
+def _acrescentar(baldes, chave, percentual, maximo):
+    """Soma o ponto ao balde da chave (criando-o na posição certa) e descarta os baldes mais antigos"""
+    i = len(baldes)
+    while i > 0 and baldes[i - 1][0] > chave:  # resultados fora de ordem são raros e recentes
+        i -= 1
+    if i > 0 and baldes[i - 1][0] == chave:
+        baldes[i - 1][1] += percentual
+        baldes[i - 1][2] += 1
+    else:
+        baldes.insert(i, [chave, percentual, 1])
+        if len(baldes) > maximo:
+            del baldes[0]
+
+
+def registrar_ponto(serie, data, percentual):
+    """Acrescenta um resultado (data no formato do sistema) à série"""
+    dia = datetime.strptime(data, FORMATO_DATA).date().toordinal()
+    _acrescentar(serie['diario'], dia, percentual, MAX_DIAS)
+    _acrescentar(serie['semanal'], (dia - 1) // 7, percentual, MAX_SEMANAS)  # semanas começando na segunda
+
+
+def serie_aluno(desempenho_aluno):
+    """Série do aluno sem alterar o desempenho (montada do histórico se ainda não foi guardada)"""
+    serie = desempenho_aluno.get('serie')
+    if serie is None:
+        serie = {'diario': [], 'semanal': []}
+        resultados = list(desempenho_aluno.get('simulados', []))
+        if 'diagnostico_inicial' in desempenho_aluno:
+            resultados.insert(0, desempenho_aluno['diagnostico_inicial'])
+        for resultado in resultados:
+            registrar_ponto(serie, resultado['data'], resultado['percentual'])
+    return serie
+
+
+def obter_serie(desempenho_aluno):
+    """Série do aluno; na primeira vez é montada a partir do histórico já gravado e guardada no desempenho"""
+    if 'serie' not in desempenho_aluno:
+        desempenho_aluno['serie'] = serie_aluno(desempenho_aluno)
+    return desempenho_aluno['serie']
+
+
+def lttb(pontos, alvo):
+    """Reduz pontos (x, y) ordenados por x a `alvo` pontos com o algoritmo Largest-Triangle-Three-Buckets"""
+    if alvo >= len(pontos) or alvo < 3:
+        return list(pontos)
+    reduzidos = [pontos[0]]
+    tamanho_balde = (len(pontos) - 2) / (alvo - 2)
+    anterior = pontos[0]
+    for b in range(alvo - 2):
+        inicio = int(b * tamanho_balde) + 1
+        fim = int((b + 1) * tamanho_balde) + 1
+        # Média do balde seguinte (ou o último ponto, no último balde)
+        proximo = pontos[fim:int((b + 2) * tamanho_balde) + 1] or [pontos[-1]]
+        media_x = sum(p[0] for p in proximo) / len(proximo)
+        media_y = sum(p[1] for p in proximo) / len(proximo)
+        escolhido = max(pontos[inicio:fim], key=lambda p: abs(
+            (anterior[0] - media_x) * (p[1] - anterior[1]) - (anterior[0] - p[0]) * (media_y - anterior[1])))
+        reduzidos.append(escolhido)
+        anterior = escolhido
+    reduzidos.append(pontos[-1])
+    return reduzidos
+
+
+def pontos_grafico(serie, alvo):
+    """Até `alvo` pontos (data, percentual médio) para o gráfico de evolução.
+
+    Usa os baldes diários enquanto eles cobrem todo o histórico guardado, e os semanais depois disso.
+    """
+    diario, semanal = serie['diario'], serie['semanal']
+    if not diario:
+        return []
+    if not semanal or diario[0][0] <= semanal[0][0] * 7 + 1:
+        pontos = [(dia, soma / n) for dia, soma, n in diario]
+    else:
+        pontos = [(semana * 7 + 1, soma / n) for semana, soma, n in semanal]
+    return [(date.fromordinal(int(dia)), percentual) for dia, percentual in lttb(pontos, alvo)]
+
+
+def tendencia_semanal(serie, semanas=4):
+    """Diferença entre a média das últimas `semanas` semanas e a das `semanas` anteriores (None sem dados)"""
+    semanal = serie['semanal']
+    recentes, anteriores = semanal[-semanas:], semanal[-2 * semanas:-semanas]
+    if not recentes or not anteriores:
+        return None
+    media = lambda baldes: sum(b[1] for b in baldes) / sum(b[2] for b in baldes)
+    return media(recentes) - media(anteriores)
+
+
+def atualizar_serie(desempenho_aluno, resultado):
+    """Acrescenta à série um resultado que acabou de entrar no histórico do aluno"""
+    if 'serie' not in desempenho_aluno:
+        obter_serie(desempenho_aluno)  # montada a partir do histórico, que já inclui o resultado
+        return
+    registrar_ponto(desempenho_aluno['serie'], resultado['data'], resultado['percentual'])
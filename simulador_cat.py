@@ -0,0 +1,202 @@
+"""Simulador Monte-Carlo para avaliar se o banco de questões suporta o diagnóstico adaptativo (CAT).
+
+Gera alunos virtuais a partir de uma distribuição de proficiência e executa, para todos de uma vez
+(vetorizado com NumPy), o ciclo de seleção de questão por máxima informação + estimação EAP.
+
+Uso: python simulador_cat.py --banco banco_simulados.json --alunos 10000
+"""
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from tri import parametros_questao
+
+# Pontos de quadratura usados na estimação EAP da proficiência
+PONTOS_QUADRATURA = np.linspace(-4, 4, 41)
+# Limite de elementos da matriz alunos x questões calculada de uma vez (controla o uso de memória)
+MAX_ELEMENTOS_BLOCO = 4_000_000
+
+
+def carregar_questoes(caminho):
+    """Carrega as questões do banco de simulados agrupadas por área"""
+    with open(caminho, 'r') as f:
+        banco = json.load(f)
+
+    questoes_por_area = defaultdict(list)
+    for questao in banco.get('questoes', []):
+        questoes_por_area[questao['area']].append(questao)
+    return dict(questoes_por_area)
+
+
+def _probabilidades(theta, a, b, c):
+    """Matriz de probabilidades de acerto (len(theta) x len(a))"""
+    return c + (1 - c) / (1 + np.exp(-a * (theta[:, None] - b)))
+
+
+def _informacao(theta, a, b, c):
+    """Matriz de informação de Fisher (len(theta) x len(a))"""
+    p = _probabilidades(theta, a, b, c)
+    return (a ** 2) * ((p - c) ** 2 / (1 - c) ** 2) * ((1 - p) / p)
+
+
+def _estimar(log_posterior):
+    """Estimativa EAP e erro padrão a partir do log da posterior em cada ponto de quadratura"""
+    pesos = np.exp(log_posterior - log_posterior.max(axis=1, keepdims=True))
+    pesos /= pesos.sum(axis=1, keepdims=True)
+    theta = pesos @ PONTOS_QUADRATURA
+    variancia = pesos @ (PONTOS_QUADRATURA ** 2) - theta ** 2
+    return theta, np.sqrt(np.maximum(variancia, 0))
+
+
+def simular_area(questoes, num_alunos=10000, media=0.0, desvio=1.0, max_itens=30, min_itens=5,
+                 erro_alvo=0.3, aleatorio=1, semente=None):
+    """Simula sessões adaptativas para uma área e retorna as métricas de adequação do banco.
+
+    A priori da estimação EAP é a própria distribuição N(`media`, `desvio`) dos alunos simulados, como
+    faria uma prova calibrada para essa população.
+    """
+    if desvio <= 0:
+        raise ValueError("O desvio padrão da proficiência deve ser positivo.")
+    rng = np.random.default_rng(semente)
+    parametros = np.array([parametros_questao(q) for q in questoes], dtype=float)
+    a, b, c = parametros[:, 0], parametros[:, 1], parametros[:, 2]
+    num_questoes = len(questoes)
+    max_itens = min(max_itens, num_questoes)
+    aleatorio = max(1, min(aleatorio, num_questoes))
+
+    inicio = time.perf_counter()
+
+    theta_real = rng.normal(media, desvio, num_alunos)
+    log_posterior = np.tile(-0.5 * ((PONTOS_QUADRATURA - media) / desvio) ** 2, (num_alunos, 1))
+    # Log-verossimilhança de acerto/erro de cada questão em cada ponto de quadratura
+    p_grade = _probabilidades(PONTOS_QUADRATURA, a, b, c).T
+    log_acerto, log_erro = np.log(p_grade), np.log(1 - p_grade)
+
+    usadas = np.zeros((num_alunos, num_questoes), dtype=bool)
+    comprimento = np.zeros(num_alunos, dtype=np.int32)
+    exposicao = np.zeros(num_questoes, dtype=np.int64)
+    ativos = np.arange(num_alunos)
+    tamanho_bloco = max(1, MAX_ELEMENTOS_BLOCO // num_questoes)
+
+    for passo in range(max_itens):
+        theta_est, erro = _estimar(log_posterior[ativos])
+        if passo >= min_itens:
+            continua = erro > erro_alvo
+            ativos, theta_est = ativos[continua], theta_est[continua]
+        if len(ativos) == 0:
+            break
+
+        escolhidas = np.empty(len(ativos), dtype=np.int64)
+        for ini in range(0, len(ativos), tamanho_bloco):
+            bloco = ativos[ini:ini + tamanho_bloco]
+            info = _informacao(theta_est[ini:ini + tamanho_bloco], a, b, c)
+            info[usadas[bloco]] = -np.inf
+            if aleatorio == 1:
+                escolhidas[ini:ini + len(bloco)] = info.argmax(axis=1)
+            else:
+                # Controle de exposição "randomesque": sorteia entre as k questões mais informativas
+                melhores = np.argpartition(-info, aleatorio - 1, axis=1)[:, :aleatorio]
+                # Perto do fim do banco o aluno pode ter menos de k questões livres: as já usadas (-inf)
+                # vão para o fim de cada linha e o sorteio fica só entre as livres
+                info_melhores = np.take_along_axis(info, melhores, axis=1)
+                melhores = np.take_along_axis(melhores, np.argsort(-info_melhores, axis=1), axis=1)
+                livres = np.isfinite(info_melhores).sum(axis=1)
+                sorteio = (rng.random(len(bloco)) * livres).astype(int)
+                escolhidas[ini:ini + len(bloco)] = melhores[np.arange(len(bloco)), sorteio]
+
+        p_real = c[escolhidas] + (1 - c[escolhidas]) / (1 + np.exp(-a[escolhidas] * (theta_real[ativos] - b[escolhidas])))
+        acertou = rng.random(len(ativos)) < p_real
+
+        log_posterior[ativos] += np.where(acertou[:, None], log_acerto[escolhidas], log_erro[escolhidas])
+        usadas[ativos, escolhidas] = True
+        comprimento[ativos] += 1
+        exposicao += np.bincount(escolhidas, minlength=num_questoes)
+
+    theta_final, erro_final = _estimar(log_posterior)
+    tempo = time.perf_counter() - inicio
+    taxa_exposicao = exposicao / num_alunos
+    diferenca = theta_final - theta_real
+
+    return {
+        "questoes_banco": num_questoes,
+        "alunos": num_alunos,
+        "comprimento_medio": float(comprimento.mean()),
+        "comprimento_min": int(comprimento.min()),
+        "comprimento_max": int(comprimento.max()),
+        "atingiram_erro_alvo": float((erro_final <= erro_alvo).mean()),
+        "vies": float(diferenca.mean()),
+        "rmse": float(np.sqrt((diferenca ** 2).mean())),
+        "exposicao_max": float(taxa_exposicao.max()),
+        "exposicao_acima_20": float((taxa_exposicao > 0.2).mean()),
+        "questoes_nao_usadas": float((exposicao == 0).mean()),
+        "tempo_total": tempo,
+        "tempo_por_10k": tempo * 10000 / num_alunos,
+    }
+
+
+def mostrar_relatorio(area, resultado, limite_exposicao, rmse_maximo):
+    """Exibe as métricas de uma área e o parecer sobre a adequação do banco"""
+    print(f"\n{area} ({resultado['questoes_banco']} questões no banco)")
+    print(f"  Comprimento do teste: média {resultado['comprimento_medio']:.1f} "
+          f"(mín {resultado['comprimento_min']}, máx {resultado['comprimento_max']})")
+    print(f"  Atingiram o erro alvo: {resultado['atingiram_erro_alvo'] * 100:.1f}%")
+    print(f"  Viés: {resultado['vies']:+.3f} | RMSE: {resultado['rmse']:.3f}")
+    print(f"  Exposição máxima: {resultado['exposicao_max'] * 100:.1f}% | "
+          f"Questões acima de 20%: {resultado['exposicao_acima_20'] * 100:.1f}% | "
+          f"Não usadas: {resultado['questoes_nao_usadas'] * 100:.1f}%")
+    print(f"  Tempo: {resultado['tempo_total']:.2f}s ({resultado['tempo_por_10k']:.2f}s por 10k sessões)")
+
+    adequado = resultado['rmse'] <= rmse_maximo and resultado['exposicao_max'] <= limite_exposicao
+    print(f"  Situação: {'Adequado ✅' if adequado else 'Insuficiente para o modo adaptativo ⚠️'}")
+    return adequado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulação Monte-Carlo do diagnóstico adaptativo por área")
+    parser.add_argument('--banco', default='banco_simulados.json', help="Arquivo do banco de simulados")
+    parser.add_argument('--alunos', type=int, default=10000, help="Número de alunos virtuais por área")
+    parser.add_argument('--media', type=float, default=0.0, help="Média da proficiência simulada")
+    parser.add_argument('--desvio', type=float, default=1.0, help="Desvio padrão da proficiência simulada")
+    parser.add_argument('--max-itens', type=int, default=30, help="Comprimento máximo do teste")
+    parser.add_argument('--min-itens', type=int, default=5, help="Comprimento mínimo do teste")
+    parser.add_argument('--erro-alvo', type=float, default=0.3, help="Erro padrão para encerrar o teste")
+    parser.add_argument('--aleatorio', type=int, default=1,
+                        help="Sorteia entre as k questões mais informativas (controle de exposição)")
+    parser.add_argument('--limite-exposicao', type=float, default=0.25, help="Exposição máxima aceitável")
+    parser.add_argument('--rmse-maximo', type=float, default=0.35, help="RMSE máximo aceitável")
+    parser.add_argument('--semente', type=int, default=None, help="Semente do gerador aleatório")
+    args = parser.parse_args()
+
+    if args.desvio <= 0:
+        print("O desvio padrão deve ser positivo.")
+        return
+
+    if not os.path.exists(args.banco):
+        print(f"Banco de questões não encontrado: {args.banco}")
+        return
+
+    questoes_por_area = carregar_questoes(args.banco)
+    if not questoes_por_area:
+        print("Não há questões cadastradas no banco.")
+        return
+
+    print("=" * 50)
+    print("SIMULAÇÃO DO DIAGNÓSTICO ADAPTATIVO".center(50))
+    print("=" * 50)
+    print(f"{args.alunos} alunos virtuais por área ~ N({args.media}, {args.desvio}) (também a priori da EAP)")
+
+    adequadas = 0
+    for area, questoes in sorted(questoes_por_area.items()):
+        resultado = simular_area(questoes, args.alunos, args.media, args.desvio, args.max_itens,
+                                 args.min_itens, args.erro_alvo, args.aleatorio, args.semente)
+        adequadas += mostrar_relatorio(area, resultado, args.limite_exposicao, args.rmse_maximo)
+
+    print(f"\nÁreas adequadas para o modo adaptativo: {adequadas}/{len(questoes_por_area)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+import classificacao
+from classificacao import RankingOrdenado
+
+
+@pytest.fixture
+def blocos_pequenos(monkeypatch):
+    """Blocos de 4 chaves, para as operações dividirem e esvaziarem blocos com poucos alunos"""
+    monkeypatch.setattr(classificacao, "TAMANHO_BLOCO", 4)
+
+
+def conferir(ranking, referencia):
+    chaves = sorted((-pontos, email) for email, pontos in referencia.items())
+    assert [chave for bloco in ranking.blocos for chave in bloco] == chaves
+    assert ranking.maximos == [bloco[-1] for bloco in ranking.blocos]
+    assert all(ranking.blocos)
+    assert len(ranking) == len(referencia)
+    for email, pontos in referencia.items():
+        assert ranking.posicao(email) == 1 + sum(1 for p in referencia.values() if p > pontos)
+    for pontos in range(-1, 32):
+        assert ranking.acima_de(pontos) == sum(1 for p in referencia.values() if p > pontos)
+    for k in (0, 1, 5, len(referencia), len(referencia) + 3):
+        assert ranking.topo(k) == [(email, -negativo) for negativo, email in chaves[:k]]
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_ranking_igual_a_lista_ordenada(blocos_pequenos, semente):
+    rng = random.Random(semente)
+    inicial = {f"aluno{i}@x.com": rng.randint(0, 30) for i in range(rng.randint(0, 40))}
+    ranking = RankingOrdenado(inicial)
+    referencia = dict(inicial)
+    conferir(ranking, referencia)
+
+    for passo in range(400):
+        email = f"aluno{rng.randint(0, 60)}@x.com"
+        if rng.random() < 0.2:
+            ranking.remover(email)
+            referencia.pop(email, None)
+        else:
+            pontos = rng.randint(0, 30)  # poucos valores: muitos empates
+            ranking.atualizar(email, pontos)
+            referencia[email] = pontos
+        if passo % 10 == 0:
+            conferir(ranking, referencia)
+    conferir(ranking, referencia)
+
+
+def test_posicao_de_quem_nao_esta_no_ranking():
+    ranking = RankingOrdenado({"a@x.com": 10})
+    assert ranking.posicao("b@x.com") is None
+    ranking.remover("a@x.com")
+    assert ranking.posicao("a@x.com") is None
+    assert ranking.topo(3) == []
+    assert ranking.acima_de(0) == 0
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from exportacao_bi import iterar_objeto_json
+
+OBJETO = {
+    "ana@x.com": {"simulados": [{"percentual": 66.66666666666667, "area": "Matemática"}], "pontos": 1250},
+    "chaves{}@x.com": {"texto": "aspas \" e chaves { } [ ] no meio", "vazio": {}, "lista": []},
+    "numeros": [0, -1, 2.5e-10, 123456789012345678, 1.0],
+    "unicode": "Ciências Da Natureza – ação ✅",
+    "nulos": [None, True, False],
+    "ultimo": 98765,
+}
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1, 2, 3, 5, 7, 16, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 4])
+def test_pares_iguais_ao_json_carregado(tmp_path, tamanho_bloco, indent):
+    caminho = tmp_path / "desempenho.json"
+    caminho.write_text(json.dumps(OBJETO, indent=indent, ensure_ascii=False), encoding='utf-8')
+    assert list(iterar_objeto_json(caminho, tamanho_bloco)) == list(OBJETO.items())
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1, 4, 1 << 20])
+def test_numero_no_fim_do_bloco_nao_e_cortado(tmp_path, tamanho_bloco):
+    caminho = tmp_path / "numeros.json"
+    caminho.write_text('{"a":12345,"b":678}', encoding='utf-8')
+    assert list(iterar_objeto_json(caminho, tamanho_bloco)) == [("a", 12345), ("b", 678)]
+
+
+def test_objeto_vazio(tmp_path):
+    caminho = tmp_path / "vazio.json"
+    caminho.write_text("  {\n}\n", encoding='utf-8')
+    assert list(iterar_objeto_json(caminho, 1)) == []
+
+
+@pytest.mark.parametrize("texto", ['{"a": 1, "b": ', '{"a": [1, 2', '[1, 2]'])
+def test_arquivo_invalido(tmp_path, texto):
+    caminho = tmp_path / "invalido.json"
+    caminho.write_text(texto, encoding='utf-8')
+    with pytest.raises(json.JSONDecodeError):
+        list(iterar_objeto_json(caminho, 3))
@@ -0,0 +1,54 @@
+import random
+from datetime import date, datetime, timedelta
+
+from livro_pontos import LivroPontos
+
+
+def momento(dia):
+    return datetime.combine(dia, datetime.min.time()).replace(hour=12).timestamp()
+
+
+def abrir(tmp_path, checkpoint_a_cada=500):
+    return LivroPontos(str(tmp_path / "pontos.jsonl"), str(tmp_path / "pontos_checkpoint.json"), checkpoint_a_cada)
+
+
+def ganhos_no_periodo(lancamentos, email, inicio, fim):
+    return sum(pontos for e, dia, pontos in lancamentos if e == email and pontos > 0 and inicio <= dia <= fim)
+
+
+def test_somas_por_periodo_iguais_a_soma_direta(tmp_path):
+    rng = random.Random(7)
+    hoje = date.today()
+    livro = abrir(tmp_path, checkpoint_a_cada=37)
+    lancamentos = []
+    # Os lançamentos chegam em ordem de tempo, como no sistema
+    for atraso in sorted((rng.randint(0, 55) for _ in range(600)), reverse=True):
+        email = rng.choice(["ana@x.com", "bruno@x.com", "carla@x.com"])
+        dia = hoje - timedelta(days=atraso)
+        pontos = rng.randint(1, 50)
+        livro.creditar(email, pontos, "teste", momento(dia))
+        lancamentos.append((email, dia, pontos))
+
+    recarregado = abrir(tmp_path)  # checkpoint mais os lançamentos gravados depois dele
+    for _ in range(300):
+        email = rng.choice(["ana@x.com", "bruno@x.com", "carla@x.com", "sem_pontos@x.com"])
+        inicio = hoje - timedelta(days=rng.randint(0, 60))
+        fim = inicio + timedelta(days=rng.randint(0, 30))
+        esperado = ganhos_no_periodo(lancamentos, email, inicio, fim)
+        assert livro.pontos_periodo(email, inicio, fim) == esperado
+        assert recarregado.pontos_periodo(email, inicio, fim) == esperado
+    for email in ("ana@x.com", "bruno@x.com", "carla@x.com"):
+        assert recarregado.saldo(email) == livro.saldo(email) == sum(p for e, _, p in lancamentos if e == email)
+
+
+def test_gastos_nao_entram_nos_ganhos_do_periodo(tmp_path):
+    hoje = date.today()
+    livro = abrir(tmp_path)
+    livro.creditar("ana@x.com", 100, "conquista", momento(hoje - timedelta(days=2)))
+    livro.creditar("ana@x.com", 30, "conquista", momento(hoje))
+    assert livro.debitar("ana@x.com", 120, "recompensa")
+    assert not livro.debitar("ana@x.com", 11, "recompensa")  # saldo 10
+    assert livro.saldo("ana@x.com") == 10
+    assert livro.pontos_periodo("ana@x.com", hoje - timedelta(days=6), hoje) == 130
+    assert livro.pontos_periodo("ana@x.com", hoje, hoje) == 30
+    assert livro.pontos_periodo("ana@x.com", hoje - timedelta(days=1), hoje - timedelta(days=1)) == 0
@@ -0,0 +1,27 @@
+import math
+
+# Parâmetros padrão da TRI (modelo logístico de 3 parâmetros) para as questões do banco.
+# Questões sem calibração própria recebem a dificuldade (b) correspondente ao seu nível.
+DIFICULDADE_NIVEL = {"Fácil": -1.0, "Médio": 0.0, "Difícil": 1.0}
+DISCRIMINACAO_PADRAO = 1.0
+ACERTO_CASUAL_PADRAO = 0.2  # 5 alternativas (A-E)
+
+
+def parametros_questao(questao):
+    """Retorna os parâmetros (a, b, c) da questão, usando o nível quando não houver calibração"""
+    calibracao = questao.get('tri', {})
+    a = calibracao.get('a', DISCRIMINACAO_PADRAO)
+    b = calibracao.get('b', DIFICULDADE_NIVEL.get(questao.get('nivel'), 0.0))
+    c = calibracao.get('c', ACERTO_CASUAL_PADRAO)
+    return a, b, c
+
+
+def probabilidade_acerto(theta, a, b, c):
+    """Probabilidade de acerto de um aluno com proficiência theta"""
+    return c + (1 - c) / (1 + math.exp(-a * (theta - b)))
+
+
+def informacao_questao(theta, a, b, c):
+    """Informação de Fisher da questão no ponto theta"""
+    p = probabilidade_acerto(theta, a, b, c)
+    return (a ** 2) * ((p - c) ** 2 / (1 - c) ** 2) * ((1 - p) / p)